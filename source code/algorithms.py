@@ -1,125 +1,774 @@
-from collections import deque
+from array import array
+from collections import deque, OrderedDict
 import heapq
+import math
+import threading
+
+from all_pairs import all_pairs
+from components import group, strong_components, weak_components
+from csr_graph import CSRGraph
+from max_flow import max_flow
+from structures import IndexedMinHeap, UnionFind
+
+# Số cây đường đi ngắn nhất (theo đỉnh nguồn) giữ lại trên mỗi ảnh chụp
+SPT_CACHE_SIZE = 16
+# Mật độ cạnh (m / (n(n-1)/2)) từ ngưỡng này trở lên thì Prim dùng bản mảng O(V^2)
+PRIM_DENSE_DENSITY = 0.75
+
+
+def _as_csr(graph):
+    """Nhận Graph hoặc CSRGraph, trả về ảnh chụp CSR"""
+    if isinstance(graph, CSRGraph):
+        return graph
+    return graph.freeze()
+
+
+class ShortestPathTree:
+    """
+    Cây đường đi ngắn nhất từ một nguồn trên ảnh chụp CSR.
+    Dijkstra chạy dần: mỗi truy vấn chỉ chốt thêm các đỉnh còn thiếu,
+    truy vấn tới đỉnh đã chốt chỉ còn là lần ngược theo prev. Thứ tự chốt
+    được ghi lại để phát lại callback như một lần chạy mới.
+    """
+    
+    def __init__(self, csr, source):
+        """
+        :param csr: Ảnh chụp CSRGraph
+        :param source: Chỉ số (không phải id) của đỉnh nguồn
+        """
+        self.csr = csr
+        self.source = csr.node_ids[source]
+        self.dist = [float('inf')] * csr.n
+        self.prev = [-1] * csr.n
+        self.settled = bytearray(csr.n)
+        self.order = array('i')  # Các đỉnh theo thứ tự chốt
+        self.dist[source] = 0
+        self._heap = [(0, source)]
+        self._pending = -1  # Đỉnh đã chốt nhưng chưa nới cạnh (do dừng sớm ở đích)
+        self._lock = threading.Lock()
+    
+    @property
+    def complete(self):
+        """Đã chốt hết các đỉnh đi tới được"""
+        return not self._heap and self._pending == -1
+    
+    def settle(self, target=None, callback=None):
+        """
+        Chạy tiếp Dijkstra đến khi chốt được đỉnh có chỉ số target
+        (None: chạy đến hết). callback(node_id, 'visiting'|'visited', dist)
+        được gọi cho cả các đỉnh đã chốt từ trước, cùng thứ tự như khi chạy từ đầu.
+        """
+        with self._lock:
+            if callback and self._replay(target, callback):
+                return
+            if target is not None and self.settled[target]:
+                return
+            
+            ids = self.csr.node_ids
+            dist, settled, pq = self.dist, self.settled, self._heap
+            
+            if self._pending != -1:
+                u, self._pending = self._pending, -1
+                self._relax(u)
+                if callback:
+                    callback(ids[u], 'visited', dist[u])
+            
+            while pq:
+                current_dist, u = heapq.heappop(pq)
+                
+                if settled[u]:
+                    continue
+                
+                settled[u] = 1
+                self.order.append(u)
+                # Ghi nhận trước khi gọi callback: nếu callback ném lỗi (vd StepRunner
+                # bị đóng) thì lần settle sau vẫn nới cạnh của u, cây trong memo không hỏng
+                self._pending = u
+                
+                if callback:
+                    callback(ids[u], 'visiting', dist[u])
+                
+                if u == target:
+                    return
+                
+                self._pending = -1
+                self._relax(u)
+                
+                if callback:
+                    callback(ids[u], 'visited', dist[u])
+    
+    def _replay(self, target, callback):
+        """Phát lại callback của các đỉnh đã chốt; trả về True nếu đã tới target"""
+        ids, dist = self.csr.node_ids, self.dist
+        for u in self.order:
+            callback(ids[u], 'visiting', dist[u])
+            if u == target:
+                return True
+            if u != self._pending:
+                callback(ids[u], 'visited', dist[u])
+        return False
+    
+    def _relax(self, u):
+        csr = self.csr
+        offsets, targets, weights = csr.offsets, csr.targets, csr.weights
+        dist, prev, settled, pq = self.dist, self.prev, self.settled, self._heap
+        du = dist[u]
+        for k in range(offsets[u], offsets[u + 1]):
+            v = targets[k]
+            if not settled[v]:
+                alt = du + weights[k]
+                
+                if alt < dist[v]:
+                    dist[v] = alt
+                    prev[v] = u
+                    heapq.heappush(pq, (alt, v))
+    
+    def path_to(self, target, callback=None):
+        """Đường đi ngắn nhất tới id target: (path, distance) hoặc (None, inf)"""
+        t = self.csr.index(target)
+        if t is None:
+            return None, float('inf')
+        
+        self.settle(t, callback)
+        
+        if self.dist[t] == float('inf'):
+            return None, float('inf')
+        
+        return _walk_path(self.csr.node_ids, self.prev, t), self.dist[t]
+    
+    def distances(self):
+        """Khoảng cách tới các đỉnh đã chốt: {node_id: dist}"""
+        ids = self.csr.node_ids
+        return {ids[i]: self.dist[i] for i in range(self.csr.n) if self.settled[i]}
+
+
+def _walk_path(ids, prev, t):
+    """Lần ngược theo prev từ chỉ số t, trả về đường đi theo id"""
+    path = []
+    current = t
+    while current != -1:
+        path.append(ids[current])
+        current = prev[current]
+    path.reverse()
+    return path
+
+
+def _heuristic_factor(csr):
+    """
+    Hệ số nhỏ nhất trọng số / độ dài cạnh trên canvas. Nhân với khoảng cách
+    Euclid tới đích cho heuristic chấp nhận được (và nhất quán) cho A*.
+    Có cạnh độ dài 0 thì hệ số là 0 (A* trở thành Dijkstra).
+    """
+    factor = csr.memo.get('astar_factor')
+    if factor is None:
+        factor = float('inf')
+        xs, ys = csr.xs, csr.ys
+        for e in range(csr.edge_count):
+            u, v = csr.edge_from[e], csr.edge_to[e]
+            length = math.hypot(xs[u] - xs[v], ys[u] - ys[v])
+            if length == 0:
+                factor = 0.0
+                break
+            factor = min(factor, csr.edge_weight[e] / length)
+        if factor == float('inf') or factor < 0:
+            factor = 0.0
+        # Bớt một chút để sai số làm tròn không làm heuristic vượt quá khoảng cách thật
+        factor *= 1 - 1e-9
+        csr.memo['astar_factor'] = factor
+    return factor
+
+
+def _cached_tree(csr, source):
+    """Lấy (hoặc tạo) cây đường đi ngắn nhất của một nguồn trong bộ đệm LRU của ảnh chụp"""
+    s = csr.index(source)
+    if s is None:
+        return None
+    trees = csr.memo.setdefault('spt', OrderedDict())
+    tree = trees.get(s)
+    if tree is None:
+        tree = ShortestPathTree(csr, s)
+        trees[s] = tree
+        while len(trees) > SPT_CACHE_SIZE:
+            trees.popitem(last=False)
+    else:
+        trees.move_to_end(s)
+    return tree
+
+
+class DFSResult:
+    """
+    Kết quả DFS: thứ tự thăm, thời điểm phát hiện / kết thúc và cha của mỗi đỉnh
+    (theo id), cùng loại của từng cạnh đã xét: 'tree', 'back', 'forward', 'cross'.
+    Đồ thị vô hướng chỉ có cạnh 'tree' và 'back'.
+    """
+    
+    def __init__(self, order, discovery, finish, parent, edge_types):
+        self.order = order
+        self.discovery = discovery
+        self.finish = finish
+        self.parent = parent
+        self.edge_types = edge_types
+
+
+def _depth_first(csr, roots, callback=None, classify=False):
+    """
+    DFS bằng ngăn xếp tường minh (không đệ quy), cùng thứ tự thăm với bản đệ quy.
+    Mỗi đỉnh giữ con trỏ tới cung kế tiếp cần xét trong cursor.
+    :param roots: Các chỉ số gốc, lần lượt bắt đầu từ gốc chưa được thăm
+    :param classify: Có phân loại cạnh hay không
+    :return: (order, discovery, finish, parent, edge_types) theo chỉ số
+    """
+    ids, offsets, targets, arc_edge = csr.node_ids, csr.offsets, csr.targets, csr.arc_edge
+    n = csr.n
+    discovery = [-1] * n
+    finish = [-1] * n
+    parent = [-1] * n
+    parent_edge = [-1] * n
+    cursor = list(offsets[:-1])
+    edge_types = {}
+    order = []
+    clock = 0
+    
+    for root in roots:
+        if discovery[root] >= 0:
+            continue
+        
+        discovery[root] = clock
+        clock += 1
+        order.append(ids[root])
+        if callback:
+            callback(ids[root], 'visiting')
+        stack = [root]
+        
+        while stack:
+            u = stack[-1]
+            k = cursor[u]
+            if k < offsets[u + 1]:
+                cursor[u] = k + 1
+                v = targets[k]
+                if discovery[v] < 0:
+                    discovery[v] = clock
+                    clock += 1
+                    parent[v] = u
+                    parent_edge[v] = arc_edge[k]
+                    order.append(ids[v])
+                    if classify:
+                        edge_types[arc_edge[k]] = 'tree'
+                    if callback:
+                        callback(ids[v], 'visiting')
+                    stack.append(v)
+                elif classify:
+                    e = arc_edge[k]
+                    if e in edge_types or (not csr.directed and e == parent_edge[u]):
+                        continue
+                    if finish[v] < 0:
+                        edge_types[e] = 'back'
+                    elif discovery[u] < discovery[v]:
+                        edge_types[e] = 'forward'
+                    else:
+                        edge_types[e] = 'cross'
+            else:
+                stack.pop()
+                finish[u] = clock
+                clock += 1
+                if callback:
+                    callback(ids[u], 'visited')
+    
+    return order, discovery, finish, parent, edge_types
+
+
+def _euler_start(csr, allow_path):
+    """
+    Chọn đỉnh xuất phát cho đường/chu trình Euler theo bậc, None nếu không thể.
+    Vô hướng: mọi đỉnh bậc chẵn (chu trình) hoặc đúng hai đỉnh bậc lẻ (đường,
+    bắt đầu ở đỉnh lẻ đầu tiên). Có hướng: mọi đỉnh bậc vào = bậc ra, hoặc
+    đúng một đỉnh ra - vào = 1 (xuất phát) và một đỉnh vào - ra = 1.
+    Tính liên thông được kiểm tra sau khi đi: mọi cạnh phải được dùng.
+    """
+    n, offsets, targets = csr.n, csr.offsets, csr.targets
+    balance = [offsets[i + 1] - offsets[i] for i in range(n)]
+    # Không có đường/chu trình riêng: xuất phát ở đỉnh đầu tiên có cạnh
+    first = next((i for i in range(n) if balance[i]), 0)
+    
+    if csr.directed:
+        for v in targets:
+            balance[v] -= 1
+        starts = [i for i in range(n) if balance[i] > 0]
+        ends = [i for i in range(n) if balance[i] < 0]
+        if not starts and not ends:
+            return first
+        if (allow_path and len(starts) == 1 and len(ends) == 1
+                and balance[starts[0]] == 1 and balance[ends[0]] == -1):
+            return starts[0]
+        return None
+    
+    # Khuyên vô hướng chỉ có một cung nhưng góp 2 vào bậc
+    for i in range(n):
+        for k in range(offsets[i], offsets[i + 1]):
+            if targets[k] == i:
+                balance[i] += 1
+    odd = [i for i in range(n) if balance[i] % 2]
+    if not odd:
+        return first
+    if allow_path and len(odd) == 2:
+        return odd[0]
+    return None
+
+
+def _is_bridge(csr, used, e, u, v, mark, stamp):
+    """
+    Cạnh e = (u, v) có phải cầu của phần đồ thị chưa dùng hay không.
+    Tìm kiếm theo chiều rộng xen kẽ từ hai đầu (bỏ qua e), mỗi bên một cung mỗi lượt:
+    hai bên gặp nhau thì không phải cầu, một bên cạn thì là cầu. Chi phí tỉ lệ
+    với phía nhỏ hơn khi e là cầu.
+    :param mark: Mảng đánh dấu dùng chung giữa các lần gọi
+    :param stamp: Số chẵn mới cho lần gọi này (phía u dùng stamp, phía v dùng stamp + 1)
+    """
+    if u == v:
+        return False
+    offsets, targets, arc_edge = csr.offsets, csr.targets, csr.arc_edge
+    mark[u] = stamp
+    mark[v] = stamp + 1
+    # Mỗi bên: [hàng đợi, vị trí đầu hàng, cung đang xét, cung cuối của đỉnh đang xét, nhãn]
+    sides = ([[u], 0, offsets[u], offsets[u + 1], stamp],
+             [[v], 0, offsets[v], offsets[v + 1], stamp + 1])
+    turn = 0
+    while True:
+        side = sides[turn]
+        queue, head, k, end, own = side
+        while k == end:
+            head += 1
+            if head == len(queue):
+                return True
+            k, end = offsets[queue[head]], offsets[queue[head] + 1]
+        f = arc_edge[k]
+        if f != e and not used[f]:
+            w = targets[k]
+            if mark[w] == own ^ 1:
+                return False
+            if mark[w] != own:
+                mark[w] = own
+                queue.append(w)
+        side[1], side[2], side[3] = head, k + 1, end
+        turn ^= 1
+
+
+def _prim_heap(csr, callback):
+    """Prim với đống có giảm khóa: O(E log V); mỗi đỉnh chưa thăm là gốc của một cây mới"""
+    ids, offsets, targets, weights = csr.node_ids, csr.offsets, csr.targets, csr.weights
+    n = csr.n
+    visited = bytearray(n)
+    via = [-1] * n
+    heap = IndexedMinHeap(n)
+    mst_edges = []
+    total_weight = 0
+    
+    for root in range(n):
+        if visited[root]:
+            continue
+        heap.push(root, 0)
+        
+        while heap:
+            v, weight = heap.pop()
+            visited[v] = 1
+            u = via[v]
+            if u >= 0:
+                mst_edges.append((ids[u], ids[v], weight))
+                total_weight += weight
+                if callback:
+                    callback(ids[v], 'added', ids[u], ids[v], weight)
+            
+            for k in range(offsets[v], offsets[v + 1]):
+                neighbor = targets[k]
+                if not visited[neighbor] and heap.push_or_decrease(neighbor, weights[k]):
+                    via[neighbor] = v
+    
+    return mst_edges, total_weight
+
+
+def _prim_dense(csr, callback):
+    """
+    Prim dạng mảng: mỗi bước tìm đỉnh gần cây nhất bằng một lần quét min() trên
+    mảng khoảng cách, O(V^2 + E), hợp với đồ thị dày
+    """
+    ids, offsets, targets, weights = csr.node_ids, csr.offsets, csr.targets, csr.weights
+    n = csr.n
+    inf = float('inf')
+    visited = bytearray(n)
+    best = [inf] * n  # Đỉnh đã thăm giữ inf để không được chọn lại
+    via = [-1] * n
+    next_root = 0
+    mst_edges = []
+    total_weight = 0
+    
+    for _ in range(n):
+        low = min(best)
+        if low == inf:
+            # Không còn đỉnh nào nối được với cây hiện tại: mở cây mới
+            while visited[next_root]:
+                next_root += 1
+            v = next_root
+        else:
+            v = best.index(low)
+        
+        visited[v] = 1
+        best[v] = inf
+        u = via[v]
+        if u >= 0:
+            mst_edges.append((ids[u], ids[v], low))
+            total_weight += low
+            if callback:
+                callback(ids[v], 'added', ids[u], ids[v], low)
+        
+        for k in range(offsets[v], offsets[v + 1]):
+            neighbor = targets[k]
+            if not visited[neighbor] and weights[k] < best[neighbor]:
+                best[neighbor] = weights[k]
+                via[neighbor] = v
+    
+    return mst_edges, total_weight
+
+def _weight_order(csr):
+    """Chỉ số cạnh theo trọng số tăng dần, sắp một lần cho mỗi ảnh chụp (version)"""
+    order = csr.memo.get('weight_order')
+    if order is None:
+        order = array('i', sorted(range(csr.edge_count), key=csr.edge_weight.__getitem__))
+        csr.memo['weight_order'] = order
+    return order
+
+
+def _separated(graph, source, target):
+    """
+    True nếu bộ theo dõi 'components' (khi có) cho biết hai đỉnh nằm ở hai
+    thành phần khác nhau, tức là chắc chắn không có đường đi
+    """
+    if isinstance(graph, CSRGraph):
+        return False
+    tracker = graph.get_tracker('components')
+    return tracker is not None and not tracker.connected(source, target)
+
+
+def _odd_cycle(ids, parent, u, v):
+    """
+    Chu trình lẻ từ cạnh (u, v) nối hai đỉnh cùng màu trong cây BFS:
+    u -> ... -> tổ tiên chung -> ... -> v -> u (theo id)
+    """
+    up = [u]
+    while parent[up[-1]] != -1:
+        up.append(parent[up[-1]])
+    position = {node: i for i, node in enumerate(up)}
+    down = [v]
+    while down[-1] not in position:
+        down.append(parent[down[-1]])
+    cycle = up[:position[down[-1]] + 1] + down[-2::-1] + [u]
+    return [ids[i] for i in cycle]
 
 
 class GraphAlgorithms:
     
     @staticmethod
     def bfs(graph, start_node, callback=None):
-        if start_node not in graph.nodes:
+        csr = _as_csr(graph)
+        start = csr.index(start_node)
+        if start is None:
             return []
         
-        visited = set()
-        queue = deque([start_node])
-        visited.add(start_node)
+        ids, offsets, targets = csr.node_ids, csr.offsets, csr.targets
+        visited = bytearray(csr.n)
+        queue = deque([start])
+        visited[start] = 1
         order = []
         
         while queue:
             current = queue.popleft()
-            order.append(current)
+            order.append(ids[current])
             
             if callback:
-                callback(current, 'visiting')
+                callback(ids[current], 'visiting')
             
-            neighbors = graph.get_neighbors(current)
-            for neighbor in neighbors:
-                if neighbor not in visited:
-                    visited.add(neighbor)
+            for k in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[k]
+                if not visited[neighbor]:
+                    visited[neighbor] = 1
                     queue.append(neighbor)
                     if callback:
-                        callback(neighbor, 'queued')
+                        callback(ids[neighbor], 'queued')
             
             if callback:
-                callback(current, 'visited')
+                callback(ids[current], 'visited')
         
         return order
     
     @staticmethod
     def dfs(graph, start_node, callback=None):
-        if start_node not in graph.nodes:
+        csr = _as_csr(graph)
+        start = csr.index(start_node)
+        if start is None:
             return []
         
-        visited = set()
-        order = []
+        return _depth_first(csr, (start,), callback)[0]
+    
+    @staticmethod
+    def dfs_tree(graph, start_node=None, callback=None):
+        """
+        DFS kèm thời điểm phát hiện / kết thúc và phân loại cạnh, tính trong cùng một lượt
+        :param start_node: Đỉnh bắt đầu; None thì duyệt cả rừng DFS theo thứ tự id
+        :param callback: callback(node, 'visiting' | 'visited') như dfs
+        :return: DFSResult, None nếu start_node không tồn tại
+        """
+        csr = _as_csr(graph)
+        if start_node is None:
+            roots = range(csr.n)
+        else:
+            start = csr.index(start_node)
+            if start is None:
+                return None
+            roots = (start,)
+        
+        order, discovery, finish, parent, edge_types = _depth_first(csr, roots, callback, classify=True)
+        ids = csr.node_ids
+        reached = [i for i in range(csr.n) if discovery[i] >= 0]
+        return DFSResult(
+            order,
+            {ids[i]: discovery[i] for i in reached},
+            {ids[i]: finish[i] for i in reached},
+            {ids[i]: ids[parent[i]] if parent[i] >= 0 else None for i in reached},
+            {(ids[csr.edge_from[e]], ids[csr.edge_to[e]]): kind for e, kind in edge_types.items()}
+        )
+    
+    @staticmethod
+    def dijkstra(graph, source, target, callback=None, reuse=True):
+        """
+        Đường đi ngắn nhất source -> target, dừng ngay khi chốt được target.
+        Với reuse=True cây của source được giữ lại theo ảnh chụp (version) của
+        đồ thị: truy vấn sau từ cùng nguồn chỉ chạy tiếp phần còn thiếu, hoặc
+        chỉ lần theo prev nếu target đã được chốt.
+        """
+        csr = _as_csr(graph)
+        if csr.index(target) is None or _separated(graph, source, target):
+            return None, float('inf')
         
-        def dfs_visit(node):
-            visited.add(node)
-            order.append(node)
-            
-            if callback:
-                callback(node, 'visiting')
-            
-            neighbors = graph.get_neighbors(node)
-            for neighbor in neighbors:
-                if neighbor not in visited:
-                    dfs_visit(neighbor)
-            
-            if callback:
-                callback(node, 'visited')
+        if reuse:
+            tree = _cached_tree(csr, source)
+        else:
+            s = csr.index(source)
+            tree = ShortestPathTree(csr, s) if s is not None else None
+        if tree is None:
+            return None, float('inf')
         
-        dfs_visit(start_node)
-        return order
+        return tree.path_to(target, callback)
     
     @staticmethod
-    def dijkstra(graph, source, target, callback=None):
-        if source not in graph.nodes or target not in graph.nodes:
+    def shortest_path_tree(graph, source, callback=None):
+        """Dijkstra một nguồn tới mọi đỉnh, trả về ShortestPathTree (None nếu không có nguồn)"""
+        tree = _cached_tree(_as_csr(graph), source)
+        if tree is not None:
+            tree.settle(None, callback)
+        return tree
+    
+    @staticmethod
+    def astar(graph, source, target, callback=None):
+        """
+        A* dùng tọa độ đỉnh: h(v) = hệ số nhỏ nhất (trọng số / độ dài cạnh) x
+        khoảng cách Euclid tới đích. Cùng callback và kết quả như dijkstra.
+        """
+        csr = _as_csr(graph)
+        s = csr.index(source)
+        t = csr.index(target)
+        if s is None or t is None or _separated(graph, source, target):
             return None, float('inf')
         
-        dist = {node: float('inf') for node in graph.nodes}
-        prev = {node: None for node in graph.nodes}
-        dist[source] = 0
+        ids, offsets, targets, weights = csr.node_ids, csr.offsets, csr.targets, csr.weights
+        factor = _heuristic_factor(csr)
+        xs, ys = csr.xs, csr.ys
+        tx, ty = xs[t], ys[t]
+        hypot = math.hypot
+        
+        dist = [float('inf')] * csr.n
+        prev = [-1] * csr.n
+        dist[s] = 0
         
-        pq = [(0, source)]
-        visited = set()
+        pq = [(factor * hypot(xs[s] - tx, ys[s] - ty), 0, s)]
+        closed = bytearray(csr.n)
         
         while pq:
-            current_dist, u = heapq.heappop(pq)
+            estimate, current_dist, u = heapq.heappop(pq)
             
-            if u in visited:
+            if closed[u]:
                 continue
             
-            visited.add(u)
+            closed[u] = 1
             
             if callback:
-                callback(u, 'visiting', dist[u])
+                callback(ids[u], 'visiting', dist[u])
             
-            if u == target:
+            if u == t:
                 break
             
-            neighbors = graph.get_neighbors(u)
-            for v in neighbors:
-                if v not in visited:
-                    weight = graph.get_edge_weight(u, v)
-                    alt = dist[u] + weight
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                if not closed[v]:
+                    alt = dist[u] + weights[k]
                     
                     if alt < dist[v]:
                         dist[v] = alt
                         prev[v] = u
-                        heapq.heappush(pq, (alt, v))
+                        heapq.heappush(pq, (alt + factor * hypot(xs[v] - tx, ys[v] - ty), alt, v))
             
             if callback:
-                callback(u, 'visited', dist[u])
+                callback(ids[u], 'visited', dist[u])
         
-        if dist[target] == float('inf'):
+        if dist[t] == float('inf'):
             return None, float('inf')
         
-        path = []
-        current = target
-        while current is not None:
-            path.append(current)
-            current = prev[current]
-        path.reverse()
-        
-        return path, dist[target]
+        return _walk_path(ids, prev, t), dist[t]
     
     @staticmethod
-    def check_bipartite(graph, callback=None):
-        if len(graph.nodes) == 0:
-            return True, {}
+    def bidirectional_dijkstra(graph, source, target, callback=None):
+        """
+        Dijkstra hai chiều: một phía từ source theo cung ra, một phía từ target
+        theo cung vào; dừng khi tổng hai đỉnh hàng đợi không nhỏ hơn đường tốt nhất.
+        Cùng callback và kết quả như dijkstra.
+        """
+        csr = _as_csr(graph)
+        s = csr.index(source)
+        t = csr.index(target)
+        if s is None or t is None or _separated(graph, source, target):
+            return None, float('inf')
         
-        color = {node: -1 for node in graph.nodes}
+        ids, n = csr.node_ids, csr.n
+        if s == t:
+            if callback:
+                callback(ids[s], 'visiting', 0)
+            return [ids[s]], 0
+        
+        inf = float('inf')
+        # Mỗi phía: (offsets, đỉnh kề, trọng số, dist, prev, đã chốt, hàng đợi)
+        forward = (csr.offsets, csr.targets, csr.weights,
+                   [inf] * n, [-1] * n, bytearray(n), [(0, s)])
+        backward = csr.in_arcs() + ([inf] * n, [-1] * n, bytearray(n), [(0, t)])
+        forward[3][s] = 0
+        backward[3][t] = 0
+        
+        best = inf
+        meet = -1
+        
+        while forward[6] and backward[6]:
+            if forward[6][0][0] + backward[6][0][0] >= best:
+                break
+            
+            # Mở rộng phía có hàng đợi nhỏ hơn
+            side, other = (forward, backward) if len(forward[6]) <= len(backward[6]) else (backward, forward)
+            offsets, adjacent, weights, dist, prev, settled, pq = side
+            other_dist = other[3]
+            
+            current_dist, u = heapq.heappop(pq)
+            if settled[u]:
+                continue
+            settled[u] = 1
+            
+            if callback:
+                callback(ids[u], 'visiting', dist[u])
+            
+            for k in range(offsets[u], offsets[u + 1]):
+                v = adjacent[k]
+                alt = current_dist + weights[k]
+                if alt < dist[v]:
+                    dist[v] = alt
+                    prev[v] = u
+                    heapq.heappush(pq, (alt, v))
+                if dist[v] + other_dist[v] < best:
+                    best = dist[v] + other_dist[v]
+                    meet = v
+            
+            if callback:
+                callback(ids[u], 'visited', dist[u])
         
-        for start_node in graph.nodes:
+        if meet == -1:
+            return None, inf
+        
+        path = _walk_path(ids, forward[4], meet)
+        current = backward[4][meet]
+        while current != -1:
+            path.append(ids[current])
+            current = backward[4][current]
+        
+        return path, best
+    
+    @staticmethod
+    def all_pairs_shortest_paths(graph, backend='auto', predecessors=False, workers=None):
+        """
+        Khoảng cách giữa mọi cặp đỉnh (xem all_pairs.py)
+        :param backend: 'auto' chọn theo mật độ: dày dùng Floyd–Warshall (NumPy),
+                        thưa dùng Dijkstra song song trên nhiều tiến trình
+        :param predecessors: Có trả về ma trận đỉnh đứng trước hay không
+        :return: AllPairsResult (dist, pred, node_ids)
+        """
+        return all_pairs(_as_csr(graph), backend, predecessors, workers)
+    
+    @staticmethod
+    def connected_components(graph):
+        """
+        Các thành phần liên thông (đồ thị có hướng: liên thông yếu), mỗi thành phần
+        là danh sách id đỉnh. Dùng bộ theo dõi graph.track('components') nếu có.
+        """
+        if not isinstance(graph, CSRGraph):
+            tracker = graph.get_tracker('components')
+            if tracker is not None:
+                return tracker.components()
+        csr = _as_csr(graph)
+        labels, count = weak_components(csr)
+        return group(csr, labels, count)
+    
+    @staticmethod
+    def strongly_connected_components(graph):
+        """
+        Các thành phần liên thông mạnh (Tarjan không đệ quy), theo thứ tự tô-pô
+        ngược của đồ thị thu gọn. Đồ thị vô hướng: như connected_components.
+        """
+        csr = _as_csr(graph)
+        labels, count = strong_components(csr)
+        return group(csr, labels, count)
+    
+    @staticmethod
+    def component_labels(graph, strong=False):
+        """
+        {id đỉnh: số thứ tự thành phần}, tính một lần cho mỗi ảnh chụp (version)
+        :param strong: Theo thành phần liên thông mạnh thay vì liên thông (yếu)
+        """
+        csr = _as_csr(graph)
+        labels, _ = strong_components(csr) if strong else weak_components(csr)
+        return dict(zip(csr.node_ids, labels))
+    
+    @staticmethod
+    def check_bipartite(graph, callback=None, witness=False):
+        """
+        Kiểm tra đồ thị 2 phía bằng tô màu BFS (đồ thị có hướng: xét cả cung ra và cung vào).
+        Nếu đồ thị đang được theo dõi bằng graph.track('bipartite') và không có callback
+        thì trả lời ngay từ bộ theo dõi.
+        :param witness: Trả thêm một chu trình lẻ (danh sách id, đỉnh đầu lặp lại ở cuối)
+                        khi không phải đồ thị 2 phía, None nếu là đồ thị 2 phía
+        :return: (is_bipartite, coloring) hoặc (is_bipartite, coloring, odd_cycle);
+                 coloring là None khi không phải đồ thị 2 phía
+        """
+        if callback is None and not isinstance(graph, CSRGraph):
+            tracker = graph.get_tracker('bipartite')
+            if tracker is not None:
+                if tracker.is_bipartite:
+                    coloring = tracker.coloring()
+                    return (True, coloring, None) if witness else (True, coloring)
+                return (False, None, tracker.odd_cycle()) if witness else (False, None)
+        
+        csr = _as_csr(graph)
+        if csr.n == 0:
+            return (True, {}, None) if witness else (True, {})
+        
+        ids, offsets, targets = csr.node_ids, csr.offsets, csr.targets
+        in_offsets, sources, _ = csr.in_arcs()
+        color = [-1] * csr.n
+        parent = [-1] * csr.n
+        
+        for start_node in range(csr.n):
             if color[start_node] == -1:
                 queue = deque([start_node])
                 color[start_node] = 0
@@ -128,242 +777,244 @@ class GraphAlgorithms:
                     u = queue.popleft()
                     
                     if callback:
-                        callback(u, 'visiting', color[u])
+                        callback(ids[u], 'visiting', color[u])
                     
-                    neighbors = graph.get_neighbors(u)
+                    neighbors = targets[offsets[u]:offsets[u + 1]]
+                    if csr.directed:
+                        neighbors += sources[in_offsets[u]:in_offsets[u + 1]]
                     for v in neighbors:
                         if color[v] == -1:
                             color[v] = 1 - color[u]
+                            parent[v] = u
                             queue.append(v)
                         elif color[v] == color[u]:
                             if callback:
-                                callback(u, 'conflict', color[u])
-                                callback(v, 'conflict', color[v])
-                            return False, color
+                                callback(ids[u], 'conflict', color[u])
+                                callback(ids[v], 'conflict', color[v])
+                            if witness:
+                                return False, None, _odd_cycle(ids, parent, u, v)
+                            return False, None
                     
                     if callback:
-                        callback(u, 'colored', color[u])
+                        callback(ids[u], 'colored', color[u])
         
-        return True, color
+        coloring = dict(zip(ids, color))
+        return (True, coloring, None) if witness else (True, coloring)
     
     @staticmethod
-    def prim(graph, callback=None):
-        if len(graph.nodes) == 0 or graph.directed:
+    def prim(graph, callback=None, method='auto'):
+        """
+        Rừng khung nhỏ nhất theo Prim, phủ mọi thành phần liên thông
+        :param method: 'heap' (đống có giảm khóa, đồ thị thưa), 'dense' (mảng O(V^2),
+                       đồ thị dày) hoặc 'auto' chọn theo mật độ (PRIM_DENSE_DENSITY)
+        :return: (danh sách cạnh (u, v, w), tổng trọng số)
+        """
+        csr = _as_csr(graph)
+        if csr.n == 0 or csr.directed:
             return [], 0
         
-        start_node = list(graph.nodes.keys())[0]
-        visited = set([start_node])
-        mst_edges = []
-        total_weight = 0
-        
-        edges = []
-        for neighbor in graph.get_neighbors(start_node):
-            weight = graph.get_edge_weight(start_node, neighbor)
-            heapq.heappush(edges, (weight, start_node, neighbor))
-        
-        while edges and len(visited) < len(graph.nodes):
-            weight, u, v = heapq.heappop(edges)
-            
-            if v in visited:
-                continue
-            
-            visited.add(v)
-            mst_edges.append((u, v, weight))
-            total_weight += weight
-            
-            if callback:
-                callback(v, 'added', u, v, weight)
-            
-            for neighbor in graph.get_neighbors(v):
-                if neighbor not in visited:
-                    w = graph.get_edge_weight(v, neighbor)
-                    heapq.heappush(edges, (w, v, neighbor))
-        
-        return mst_edges, total_weight
+        if method == 'auto':
+            pairs = csr.n * (csr.n - 1) / 2
+            method = 'dense' if pairs and csr.edge_count >= PRIM_DENSE_DENSITY * pairs else 'heap'
+        if method == 'dense':
+            return _prim_dense(csr, callback)
+        if method == 'heap':
+            return _prim_heap(csr, callback)
+        raise ValueError(f"Phương pháp không hợp lệ: {method}")
     
     @staticmethod
-    def kruskal(graph, callback=None):
-        if len(graph.nodes) == 0 or graph.directed:
-            return [], 0
-        
-        parent = {node: node for node in graph.nodes}
-        rank = {node: 0 for node in graph.nodes}
-        
-        def find(x):
-            if parent[x] != x:
-                parent[x] = find(parent[x])
-            return parent[x]
-        
-        def union(x, y):
-            px, py = find(x), find(y)
-            if px == py:
-                return False
-            if rank[px] < rank[py]:
-                parent[px] = py
-            elif rank[px] > rank[py]:
-                parent[py] = px
-            else:
-                parent[py] = px
-                rank[px] += 1
-            return True
-        
-        edges = sorted(graph.edges, key=lambda e: e['weight'])
+    def kruskal(graph, callback=None, weight_only=False):
+        """
+        Rừng khung nhỏ nhất theo Kruskal trên thứ tự cạnh đã sắp sẵn (_weight_order)
+        :param weight_only: Chỉ tính tổng trọng số: không gọi callback, không dựng
+                            danh sách cạnh, dừng ngay khi cây đã đủ n - 1 cạnh
+        :return: (danh sách cạnh (u, v, w), tổng trọng số), hoặc chỉ tổng trọng số
+        """
+        csr = _as_csr(graph)
+        if csr.n == 0 or csr.directed:
+            return 0 if weight_only else ([], 0)
+        
+        ids = csr.node_ids
+        edge_from, edge_to, edge_weight = csr.edge_from, csr.edge_to, csr.edge_weight
+        sets = UnionFind(csr.n)
+        union = sets.union
+        
+        if weight_only:
+            total_weight = 0
+            for e in _weight_order(csr):
+                if union(edge_from[e], edge_to[e]):
+                    total_weight += edge_weight[e]
+                    if sets.count == 1:
+                        break
+            return total_weight
         
         mst_edges = []
         total_weight = 0
         
-        for edge in edges:
-            u, v, w = edge['from'], edge['to'], edge['weight']
+        for e in _weight_order(csr):
+            u, v, w = edge_from[e], edge_to[e], edge_weight[e]
             
             if callback:
-                callback(None, 'checking', u, v, w)
+                callback(None, 'checking', ids[u], ids[v], w)
             
             if union(u, v):
-                mst_edges.append((u, v, w))
+                mst_edges.append((ids[u], ids[v], w))
                 total_weight += w
                 
                 if callback:
-                    callback(None, 'added', u, v, w)
+                    callback(None, 'added', ids[u], ids[v], w)
                 
-                if len(mst_edges) == len(graph.nodes) - 1:
+                if len(mst_edges) == csr.n - 1:
                     break
             else:
                 if callback:
-                    callback(None, 'rejected', u, v, w)
+                    callback(None, 'rejected', ids[u], ids[v], w)
         
         return mst_edges, total_weight
     
     @staticmethod
-    def ford_fulkerson(graph, source, sink, callback=None):
-        if source not in graph.nodes or sink not in graph.nodes:
-            return 0
-        
-        residual = {}
-        for node in graph.nodes:
-            residual[node] = {}
-        
-        for edge in graph.edges:
-            u, v, w = edge['from'], edge['to'], edge['weight']
-            residual[u][v] = w
-            if v not in residual or u not in residual[v]:
-                residual[v][u] = 0
-        
-        def bfs_find_path(source, sink):
-            visited = set([source])
-            queue = deque([(source, [source])])
-            
-            while queue:
-                node, path = queue.popleft()
-                
-                for neighbor in residual[node]:
-                    if neighbor not in visited and residual[node][neighbor] > 0:
-                        visited.add(neighbor)
-                        new_path = path + [neighbor]
-                        
-                        if neighbor == sink:
-                            return new_path
-                        
-                        queue.append((neighbor, new_path))
-            
+    def max_flow(graph, source, sink, callback=None, method='dinic'):
+        """
+        Luồng cực đại từ source tới sink (xem max_flow.py)
+        :param callback: callback(path, 'path_found', flow, iterations) cho mỗi đường tăng luồng
+        :param method: 'dinic' hoặc 'push_relabel'
+        :return: MaxFlowResult (value, edge_flows, source_side, sink_side, cut_edges), None nếu đỉnh không tồn tại
+        """
+        csr = _as_csr(graph)
+        s = csr.index(source)
+        t = csr.index(sink)
+        if s is None or t is None:
             return None
         
-        max_flow = 0
-        iterations = 0
-        
-        while True:
-            path = bfs_find_path(source, sink)
-            if not path:
-                break
-            
-            flow = min(residual[path[i]][path[i+1]] for i in range(len(path)-1))
-            
-            for i in range(len(path)-1):
-                u, v = path[i], path[i+1]
-                residual[u][v] -= flow
-                residual[v][u] += flow
-            
-            max_flow += flow
-            iterations += 1
-            
-            if callback:
-                callback(path, 'path_found', flow, iterations)
-            
-            if iterations > 100:
-                break
-        
-        return max_flow
+        return max_flow(csr, s, t, method, callback)
+    
+    @staticmethod
+    def ford_fulkerson(graph, source, sink, callback=None, method='dinic'):
+        """Giá trị luồng cực đại (giữ giao diện cũ, tính bằng max_flow)"""
+        result = GraphAlgorithms.max_flow(graph, source, sink, callback, method)
+        return result.value if result else 0
     
     @staticmethod
-    def fleury(graph, callback=None):
-        if graph.directed or len(graph.nodes) == 0:
+    def fleury(graph, callback=None, allow_path=False):
+        """
+        Fleury: từ đỉnh hiện tại chỉ đi qua cầu khi không còn cạnh nào khác.
+        Trong đồ thị còn đường Euler, mỗi đỉnh có nhiều nhất một cạnh là cầu,
+        nên mỗi bước chỉ cần kiểm tra tối đa hai cạnh (xem _is_bridge).
+        :param allow_path: Cho phép trả về đường Euler khi không có chu trình
+        :return: Danh sách id theo thứ tự đi, None nếu không có (hoặc đồ thị có hướng)
+        """
+        csr = _as_csr(graph)
+        if csr.directed or csr.n == 0:
             return None
         
-        degrees = {node: len(graph.get_neighbors(node)) for node in graph.nodes}
-        for degree in degrees.values():
-            if degree % 2 != 0:
-                return None
-        
-        remaining_edges = graph.edges.copy()
-        circuit = [list(graph.nodes.keys())[0]]
+        current = _euler_start(csr, allow_path)
+        if current is None:
+            return None
         
-        while remaining_edges:
-            current = circuit[-1]
-            neighbors = []
+        offsets, targets, arc_edge = csr.offsets, csr.targets, csr.arc_edge
+        # Con trỏ cung đầu tiên chưa dùng và số cung chưa dùng của mỗi đỉnh
+        cursor = list(offsets[:-1])
+        left = [offsets[i + 1] - offsets[i] for i in range(csr.n)]
+        used = bytearray(csr.edge_count)
+        mark = [0] * csr.n
+        stamp = 0
+        remaining = csr.edge_count
+        circuit = [csr.node_ids[current]]
+        
+        while remaining:
+            k = cursor[current]
+            end = offsets[current + 1]
+            while k < end and used[arc_edge[k]]:
+                k += 1
+            cursor[current] = k
             
-            for edge in remaining_edges:
-                if edge['from'] == current:
-                    neighbors.append((edge['to'], edge))
-                elif edge['to'] == current:
-                    neighbors.append((edge['from'], edge))
-            
-            if not neighbors:
+            if k == end:
                 break
             
-            next_node, chosen_edge = neighbors[0]
-            circuit.append(next_node)
-            remaining_edges.remove(chosen_edge)
+            # Lấy cạnh đầu tiên không phải cầu; cung cuối cùng của đỉnh thì lấy luôn
+            candidates = left[current]
+            while candidates > 1:
+                if not used[arc_edge[k]]:
+                    stamp += 2
+                    if not _is_bridge(csr, used, arc_edge[k], current, targets[k], mark, stamp):
+                        break
+                    candidates -= 1
+                k += 1
+            while used[arc_edge[k]]:
+                k += 1
+            
+            e = arc_edge[k]
+            used[e] = 1
+            remaining -= 1
+            nxt = targets[k]
+            left[current] -= 1
+            if nxt != current:
+                left[nxt] -= 1
+            current = nxt
+            circuit.append(csr.node_ids[current])
             
             if callback:
-                callback(circuit, 'edge_added', chosen_edge)
+                callback(circuit, 'edge_added', csr.edge_record(e))
         
-        if remaining_edges:
+        if remaining:
             return None
         
         return circuit
     
     @staticmethod
-    def hierholzer(graph, callback=None):
-        if graph.directed or len(graph.nodes) == 0:
+    def hierholzer(graph, callback=None, allow_path=False):
+        """
+        Hierholzer O(V + E): mỗi đỉnh giữ con trỏ cung, mỗi cạnh một cờ đã dùng.
+        Chạy cho cả đồ thị có hướng. Với allow_path=True trả về đường Euler khi
+        không có chu trình (đầu và cuối khác nhau).
+        :param callback: Nhận từng bước thay đổi, O(1) mỗi lần gọi: (đỉnh, 'exploring')
+                         khi đỉnh được đẩy vào ngăn xếp, (đỉnh, 'backtrack') khi đỉnh
+                         ở đỉnh ngăn xếp được lấy ra và nối vào chu trình; người nhận
+                         tự giữ đường đang đi nếu cần
+        :return: Danh sách id theo thứ tự đi, None nếu không có chu trình/đường Euler
+                 (sai điều kiện bậc hoặc các cạnh không liên thông)
+        """
+        csr = _as_csr(graph)
+        if csr.n == 0:
             return None
         
-        degrees = {node: len(graph.get_neighbors(node)) for node in graph.nodes}
-        for degree in degrees.values():
-            if degree % 2 != 0:
-                return None
+        start = _euler_start(csr, allow_path)
+        if start is None:
+            return None
         
-        adj = {node: [] for node in graph.nodes}
-        for edge in graph.edges:
-            adj[edge['from']].append(edge['to'])
-            adj[edge['to']].append(edge['from'])
+        offsets, targets, arc_edge = csr.offsets, csr.targets, csr.arc_edge
+        # Mỗi đỉnh lấy cung từ cuối danh sách, bỏ qua cạnh đã dùng
+        cursor = list(offsets[1:])
+        used = bytearray(csr.edge_count)
+        ids = csr.node_ids
         
-        start = list(graph.nodes.keys())[0]
         stack = [start]
         circuit = []
         
         while stack:
             v = stack[-1]
-            if adj[v]:
-                u = adj[v].pop()
-                adj[u].remove(v)
-                stack.append(u)
+            k = cursor[v]
+            begin = offsets[v]
+            while k > begin and used[arc_edge[k - 1]]:
+                k -= 1
+            cursor[v] = k
+            
+            if k > begin:
+                cursor[v] = k - 1
+                used[arc_edge[k - 1]] = 1
+                stack.append(targets[k - 1])
                 
                 if callback:
-                    callback(stack, 'exploring')
+                    callback(ids[targets[k - 1]], 'exploring')
             else:
-                circuit.append(stack.pop())
+                circuit.append(ids[stack.pop()])
                 
                 if callback:
-                    callback(circuit, 'backtrack')
+                    callback(circuit[-1], 'backtrack')
+        
+        # Còn cạnh chưa đi tới: các cạnh không nằm trong cùng một thành phần liên thông
+        if len(circuit) != csr.edge_count + 1:
+            return None
         
         circuit.reverse()
         return circuit
@@ -0,0 +1,247 @@
+"""
+all_pairs.py - Đường đi ngắn nhất giữa mọi cặp đỉnh
+
+Hai cách tính:
+- 'floyd_warshall': Floyd–Warshall vector hóa bằng NumPy (cập nhật min theo
+  cả hàng một lúc), hợp với đồ thị dày.
+- 'dijkstra': Dijkstra một nguồn lặp cho mọi đỉnh, chia cho các tiến trình
+  con (ProcessPoolExecutor) đọc chung một vùng nhớ CSR, hợp với đồ thị thưa.
+"""
+
+import heapq
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # Không có NumPy: Floyd–Warshall chạy bằng Python thuần
+    np = None
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python < 3.8: truyền mảng CSR cho từng tiến trình con
+    shared_memory = None
+
+# Mật độ cạnh (m / n(n-1)) từ ngưỡng này trở lên thì dùng Floyd–Warshall
+DENSE_THRESHOLD = 0.25
+# Dưới số đỉnh này chạy Dijkstra ngay trong tiến trình hiện tại
+PARALLEL_MIN_NODES = 400
+# Số đỉnh nguồn mỗi lần giao cho một tiến trình con
+CHUNK_SIZE = 64
+
+INF = float('inf')
+
+
+class AllPairsResult:
+    """
+    Kết quả: dist[i][j] là khoảng cách từ node_ids[i] tới node_ids[j] (inf nếu
+    không tới được); pred[i][j] là chỉ số đỉnh đứng trước j trên đường đi từ i
+    (-1 nếu không có). dist/pred là ndarray khi có NumPy, ngược lại là list các array.
+    """
+
+    def __init__(self, node_ids, dist, pred, backend):
+        self.node_ids = node_ids
+        self.dist = dist
+        self.pred = pred
+        self.backend = backend
+        self._index = {node_id: i for i, node_id in enumerate(node_ids)}
+
+    def distance(self, source, target):
+        """Khoảng cách giữa hai id đỉnh"""
+        return self.dist[self._index[source]][self._index[target]]
+
+    def path(self, source, target):
+        """Đường đi giữa hai id đỉnh (cần predecessors=True), None nếu không có"""
+        if self.pred is None:
+            raise ValueError("Cần tính với predecessors=True")
+        i, j = self._index[source], self._index[target]
+        if self.dist[i][j] == INF:
+            return None
+        path = [j]
+        while j != i:
+            j = int(self.pred[i][j])
+            path.append(j)
+        path.reverse()
+        return [self.node_ids[k] for k in path]
+
+
+def all_pairs(csr, backend='auto', predecessors=False, workers=None):
+    """
+    Tính khoảng cách mọi cặp trên ảnh chụp CSR
+    :param backend: 'auto' (chọn theo mật độ), 'floyd_warshall' hoặc 'dijkstra'
+    :param predecessors: Có tính ma trận đỉnh đứng trước hay không
+    :param workers: Số tiến trình con cho 'dijkstra' (mặc định os.cpu_count())
+    """
+    n = csr.n
+    if backend == 'auto':
+        density = len(csr.targets) / (n * (n - 1)) if n > 1 else 1.0
+        backend = 'floyd_warshall' if np is not None and density >= DENSE_THRESHOLD else 'dijkstra'
+
+    if backend == 'floyd_warshall':
+        if np is not None:
+            dist, pred = _floyd_warshall_numpy(csr, predecessors)
+        else:
+            dist, pred = _floyd_warshall_python(csr, predecessors)
+    elif backend == 'dijkstra':
+        dist, pred = _repeated_dijkstra(csr, predecessors, workers)
+    else:
+        raise ValueError(f"Backend không hợp lệ: {backend}")
+
+    return AllPairsResult(csr.node_ids, dist, pred, backend)
+
+
+def _floyd_warshall_numpy(csr, predecessors):
+    n = csr.n
+    dist = np.full((n, n), np.inf)
+    rows = np.repeat(np.arange(n), np.diff(np.asarray(csr.offsets)))
+    cols = np.asarray(csr.targets)
+    # Cạnh song song: giữ trọng số nhỏ nhất
+    np.minimum.at(dist, (rows, cols), np.asarray(csr.weights, dtype=np.float64))
+    np.fill_diagonal(dist, 0)
+
+    pred = None
+    if predecessors:
+        pred = np.where(np.isfinite(dist), np.arange(n)[:, None], -1)
+        np.fill_diagonal(pred, -1)
+
+    for k in range(n):
+        # dist[i][j] = min(dist[i][j], dist[i][k] + dist[k][j]) cho mọi i, j cùng lúc
+        via = dist[:, k, None] + dist[None, k, :]
+        if pred is not None:
+            better = via < dist
+            pred = np.where(better, pred[k][None, :], pred)
+            dist = np.where(better, via, dist)
+        else:
+            np.minimum(dist, via, out=dist)
+    return dist, pred
+
+
+def _floyd_warshall_python(csr, predecessors):
+    n = csr.n
+    dist = [[INF] * n for _ in range(n)]
+    pred = [[-1] * n for _ in range(n)] if predecessors else None
+    for i in range(n):
+        dist[i][i] = 0
+        for k in range(csr.offsets[i], csr.offsets[i + 1]):
+            j = csr.targets[k]
+            if i != j and csr.weights[k] < dist[i][j]:
+                dist[i][j] = csr.weights[k]
+                if pred is not None:
+                    pred[i][j] = i
+
+    for k in range(n):
+        row_k = dist[k]
+        pred_k = pred[k] if pred is not None else None
+        for i in range(n):
+            row_i = dist[i]
+            d_ik = row_i[k]
+            if d_ik == INF:
+                continue
+            for j in range(n):
+                alt = d_ik + row_k[j]
+                if alt < row_i[j]:
+                    row_i[j] = alt
+                    if pred is not None:
+                        pred[i][j] = pred_k[j]
+    return ([array('d', row) for row in dist],
+            [array('i', row) for row in pred] if pred is not None else None)
+
+
+# --- Dijkstra lặp trong các tiến trình con ---
+
+# Mảng CSR của tiến trình con (gán trong _init_worker)
+_worker_csr = None
+
+
+def _init_worker(source, layout):
+    """Khởi tạo tiến trình con: gắn vào vùng nhớ chung (hoặc nhận bản sao các mảng)"""
+    global _worker_csr
+    n, num_arcs, typecode = layout
+    if isinstance(source, str):
+        shm = shared_memory.SharedMemory(name=source)
+        buf = shm.buf
+        offsets_end = (n + 1) * 4
+        targets_end = offsets_end + num_arcs * 4
+        weights_end = targets_end + num_arcs * array(typecode).itemsize
+        _worker_csr = (n,
+                       buf[:offsets_end].cast('i'),
+                       buf[offsets_end:targets_end].cast('i'),
+                       buf[targets_end:weights_end].cast(typecode),
+                       shm)  # Giữ tham chiếu để vùng nhớ không bị đóng
+    else:
+        offsets, targets, weights = source
+        _worker_csr = (n, offsets, targets, weights, None)
+
+
+def _dijkstra_rows(sources, predecessors):
+    """Dijkstra từ một nhóm đỉnh nguồn trên CSR của tiến trình con"""
+    n, offsets, targets, weights = _worker_csr[:4]
+    return [_dijkstra_row(n, offsets, targets, weights, s, predecessors) for s in sources]
+
+
+def _dijkstra_row(n, offsets, targets, weights, source, predecessors):
+    dist = array('d', [INF]) * n
+    prev = array('i', [-1]) * n if predecessors else None
+    settled = bytearray(n)
+    dist[source] = 0
+    pq = [(0.0, source)]
+    while pq:
+        d, u = heapq.heappop(pq)
+        if settled[u]:
+            continue
+        settled[u] = 1
+        for k in range(offsets[u], offsets[u + 1]):
+            v = targets[k]
+            alt = d + weights[k]
+            if alt < dist[v]:
+                dist[v] = alt
+                if prev is not None:
+                    prev[v] = u
+                heapq.heappush(pq, (alt, v))
+    return source, dist, prev
+
+
+def _repeated_dijkstra(csr, predecessors, workers):
+    n = csr.n
+    rows = [None] * n
+    pred_rows = [None] * n if predecessors else None
+
+    def store(result):
+        source, dist, prev = result
+        rows[source] = dist
+        if pred_rows is not None:
+            pred_rows[source] = prev
+
+    if n < PARALLEL_MIN_NODES or workers == 1:
+        for s in range(n):
+            store(_dijkstra_row(n, csr.offsets, csr.targets, csr.weights, s, predecessors))
+    else:
+        layout = (n, len(csr.targets), csr.weights.typecode)
+        shm = None
+        if shared_memory is not None:
+            data = csr.offsets.tobytes() + csr.targets.tobytes() + csr.weights.tobytes()
+            shm = shared_memory.SharedMemory(create=True, size=len(data))
+            shm.buf[:len(data)] = data
+            source = shm.name
+        else:
+            source = (csr.offsets, csr.targets, csr.weights)
+        try:
+            with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                     initializer=_init_worker,
+                                     initargs=(source, layout)) as pool:
+                chunks = [range(s, min(s + CHUNK_SIZE, n)) for s in range(0, n, CHUNK_SIZE)]
+                futures = [pool.submit(_dijkstra_rows, list(chunk), predecessors) for chunk in chunks]
+                for future in futures:
+                    for result in future.result():
+                        store(result)
+        finally:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+    if np is not None:
+        dist = np.array(rows, dtype=np.float64).reshape(n, n)
+        pred = np.array(pred_rows, dtype=np.int64).reshape(n, n) if predecessors else None
+        return dist, pred
+    return rows, pred_rows
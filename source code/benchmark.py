@@ -0,0 +1,609 @@
+"""
+benchmark.py - Đo hiệu năng / bộ nhớ của cấu trúc đồ thị
+
+Cách chạy:
+    python benchmark.py memory --edges 1000000
+    python benchmark.py stress --seconds 5
+    python benchmark.py search --size 200
+    python benchmark.py apsp --nodes 1000
+    python benchmark.py check
+"""
+
+import argparse
+import gc
+import json
+import math
+import random
+import threading
+import time
+import tracemalloc
+
+import graph as graph_module
+from algorithms import GraphAlgorithms
+from graph import Graph
+from records import NodeRecord, EdgeRecord
+from result_cache import ResultCache
+from steps import StepRunner
+
+
+def measure(build):
+    """Đo số byte được cấp phát (còn giữ lại) bởi hàm build"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def random_edges(num_nodes, num_edges, seed=0):
+    """Sinh danh sách cạnh ngẫu nhiên không trùng (vô hướng, không khuyên)"""
+    rng = random.Random(seed)
+    seen = set()
+    edges = []
+    while len(edges) < num_edges:
+        u, v = rng.randrange(num_nodes), rng.randrange(num_nodes)
+        if u == v or (u, v) in seen or (v, u) in seen:
+            continue
+        seen.add((u, v))
+        edges.append((u, v, rng.randint(1, 10)))
+    return edges
+
+
+def bench_memory(num_nodes, num_edges):
+    """
+    So sánh số byte mỗi đỉnh / mỗi cạnh: dict cũ và bản ghi __slots__, và cả
+    Graph (đo bằng tracemalloc) với cách lưu ban đầu
+    """
+    edges = random_edges(num_nodes, num_edges)
+
+    node_dict_bytes, _ = measure(lambda: [
+        {'x': float(i), 'y': float(i), 'label': str(i)} for i in range(num_nodes)
+    ])
+    node_slot_bytes, _ = measure(lambda: [
+        NodeRecord(float(i), float(i), str(i)) for i in range(num_nodes)
+    ])
+    edge_dict_bytes, _ = measure(lambda: [
+        {'from': u, 'to': v, 'weight': w} for u, v, w in edges
+    ])
+    edge_slot_bytes, _ = measure(lambda: [
+        EdgeRecord(u, v, w) for u, v, w in edges
+    ])
+
+    def build_graph():
+        graph = Graph(directed=False, weighted=True)
+        for i in range(num_nodes):
+            graph.add_node(float(i), float(i))
+        for u, v, w in edges:
+            graph.add_edge(u, v, w)
+        return graph
+
+    def build_baseline():
+        # Cách lưu của Graph ban đầu: dict các dict đỉnh + list các dict cạnh, không
+        # có chỉ mục kề (add_edge gốc quét cả list nên ở đây chèn thẳng)
+        nodes = {}
+        for i in range(num_nodes):
+            nodes[i] = {'x': float(i), 'y': float(i), 'label': str(i)}
+        return nodes, [{'from': u, 'to': v, 'weight': w} for u, v, w in edges]
+
+    baseline_bytes, _ = measure(build_baseline)
+    graph_bytes, graph = measure(build_graph)
+    csr_bytes, _ = measure(graph.freeze)
+
+    print(f"Đồ thị: {num_nodes} đỉnh, {num_edges} cạnh")
+    print(f"{'':28}{'trước (dict)':>16}{'sau (__slots__)':>18}")
+    print(f"{'byte / bản ghi đỉnh':28}{node_dict_bytes / num_nodes:>16.1f}"
+          f"{node_slot_bytes / num_nodes:>18.1f}")
+    print(f"{'byte / bản ghi cạnh':28}{edge_dict_bytes / num_edges:>16.1f}"
+          f"{edge_slot_bytes / num_edges:>18.1f}")
+    print(f"Graph ban đầu (dict + list):  {baseline_bytes / num_edges:.1f} byte / cạnh")
+    print(f"Graph (kể cả chỉ mục kề):     {graph_bytes / num_edges:.1f} byte / cạnh"
+          f" ({(graph_bytes - baseline_bytes) / baseline_bytes:+.0%} so với ban đầu)")
+    print(f"Ảnh chụp CSR:                 {csr_bytes / num_edges:.1f} byte / cạnh")
+
+
+def check_consistent(graph):
+    """Kiểm tra một ảnh chụp: mọi cạnh nối hai đỉnh tồn tại, chỉ mục kề khớp danh sách cạnh"""
+    for edge in graph.edges:
+        assert edge['from'] in graph.nodes and edge['to'] in graph.nodes
+        assert graph.get_edge(edge['from'], edge['to']) is not None
+    for node_id in graph.nodes:
+        for neighbor in graph.get_neighbors(node_id):
+            assert neighbor in graph.nodes
+
+
+def stress_concurrency(seconds, mutators, readers, num_nodes=300):
+    """
+    Kiểm thử tải: nhiều luồng sửa đồ thị (thread_safe=True) trong khi nhiều luồng
+    chạy GraphAlgorithms trên đồ thị và trên ảnh chụp. Lỗi bất kỳ được báo lại.
+    """
+    graph = Graph(directed=False, weighted=True, thread_safe=True)
+    graph.add_nodes_from((random.random() * 800, random.random() * 600)
+                         for _ in range(num_nodes))
+    mst = graph.track('mst')
+    deadline = time.time() + seconds
+    counts = {'writes': 0, 'reads': 0, 'snapshots': 0}
+    errors = []
+    count_lock = threading.Lock()
+
+    def bump(key):
+        with count_lock:
+            counts[key] += 1
+
+    def mutator(seed):
+        rng = random.Random(seed)
+        try:
+            while time.time() < deadline:
+                op = rng.random()
+                with graph.read_locked():
+                    ids = list(graph.nodes)
+                if op < 0.4 and ids:
+                    graph.add_edge(rng.choice(ids), rng.choice(ids), rng.randint(1, 10))
+                elif op < 0.6 and ids:
+                    graph.remove_edge(rng.choice(ids), rng.choice(ids))
+                elif op < 0.7:
+                    graph.add_edges_from((rng.choice(ids), rng.choice(ids)) for _ in range(20))
+                elif op < 0.8 and len(ids) > num_nodes // 2:
+                    graph.remove_nodes(rng.sample(ids, 3))
+                elif op < 0.85 and ids:
+                    graph.move_node(rng.choice(ids), rng.random() * 800, rng.random() * 600)
+                elif op < 0.9 and ids:
+                    graph.set_edge_weight(rng.choice(ids), rng.choice(ids), rng.randint(1, 10))
+                else:
+                    graph.add_node(rng.random() * 800, rng.random() * 600)
+                bump('writes')
+        except Exception as e:  # Báo lỗi về luồng chính
+            errors.append(repr(e))
+
+    def reader(seed):
+        rng = random.Random(seed)
+        try:
+            while time.time() < deadline:
+                if rng.random() < 0.5:
+                    snap = graph.snapshot()
+                    check_consistent(snap)
+                    target = snap
+                    bump('snapshots')
+                else:
+                    target = graph
+                ids = list(graph.snapshot().nodes)
+                if not ids:
+                    continue
+                start = rng.choice(ids)
+                GraphAlgorithms.bfs(target, start)
+                GraphAlgorithms.dfs(target, start)
+                GraphAlgorithms.dijkstra(target, start, rng.choice(ids))
+                GraphAlgorithms.prim(target)
+                GraphAlgorithms.kruskal(target)
+                GraphAlgorithms.check_bipartite(target)
+                bump('reads')
+        except Exception as e:  # Báo lỗi về luồng chính
+            errors.append(repr(e))
+
+    threads = [threading.Thread(target=mutator, args=(i,)) for i in range(mutators)]
+    threads += [threading.Thread(target=reader, args=(100 + i,)) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    check_consistent(graph)
+    if abs(mst.weight - GraphAlgorithms.kruskal(graph, weight_only=True)) > 1e-9:
+        errors.append("Rừng khung gia tăng lệch với Kruskal")
+    print(f"{mutators} luồng ghi, {readers} luồng đọc trong {seconds} giây")
+    print(f"Số thao tác ghi: {counts['writes']}, lượt chạy thuật toán: {counts['reads']}, "
+          f"ảnh chụp đã kiểm tra: {counts['snapshots']}")
+    if errors:
+        print(f"LỖI ({len(errors)}):")
+        for error in errors[:10]:
+            print("  " + error)
+        return False
+    print("Không có lỗi")
+    return True
+
+
+def grid_graph(size, spacing=40, seed=0):
+    """Lưới size x size, trọng số = độ dài cạnh x hệ số ngẫu nhiên trong [1, 2]"""
+    rng = random.Random(seed)
+    graph = Graph(directed=False, weighted=True)
+    graph.add_nodes_from((col * spacing, row * spacing)
+                         for row in range(size) for col in range(size))
+    edges = []
+    for row in range(size):
+        for col in range(size):
+            node = row * size + col
+            if col + 1 < size:
+                edges.append((node, node + 1, spacing + rng.randint(0, spacing)))
+            if row + 1 < size:
+                edges.append((node, node + size, spacing + rng.randint(0, spacing)))
+    graph.add_edges_from(edges)
+    return graph
+
+
+def geometric_graph(num_nodes, radius, width=10000, seed=0):
+    """Đồ thị hình học ngẫu nhiên: nối các điểm cách nhau < radius, trọng số = ceil(độ dài)"""
+    rng = random.Random(seed)
+    points = [(rng.random() * width, rng.random() * width) for _ in range(num_nodes)]
+    graph = Graph(directed=False, weighted=True)
+    graph.add_nodes_from(points)
+    buckets = {}
+    for i, (x, y) in enumerate(points):
+        buckets.setdefault((int(x // radius), int(y // radius)), []).append(i)
+    edges = []
+    for i, (x, y) in enumerate(points):
+        bx, by = int(x // radius), int(y // radius)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for j in buckets.get((bx + dx, by + dy), ()):
+                    if j > i:
+                        length = math.hypot(x - points[j][0], y - points[j][1])
+                        if length < radius:
+                            edges.append((i, j, math.ceil(length)))
+    graph.add_edges_from(edges)
+    return graph
+
+
+def bench_search(size, num_nodes, queries):
+    """So sánh số đỉnh được chốt của Dijkstra, A* và Dijkstra hai chiều"""
+    graphs = [
+        (f"lưới {size}x{size}", grid_graph(size)),
+        (f"hình học {num_nodes} đỉnh", geometric_graph(num_nodes, 10000 * math.sqrt(8 / num_nodes))),
+    ]
+    methods = [
+        ('Dijkstra', lambda g, s, t, cb: GraphAlgorithms.dijkstra(g, s, t, cb, reuse=False)),
+        ('A*', GraphAlgorithms.astar),
+        ('Hai chiều', GraphAlgorithms.bidirectional_dijkstra),
+    ]
+    for name, graph in graphs:
+        rng = random.Random(1)
+        ids = list(graph.nodes)
+        pairs = [(rng.choice(ids), rng.choice(ids)) for _ in range(queries)]
+        print(f"Đồ thị {name}: {graph.get_node_count()} đỉnh, {graph.get_edge_count()} cạnh, "
+              f"{queries} truy vấn")
+        graph.freeze()
+        for method_name, method in methods:
+            settled = [0]
+
+            def count(node_id, state, distance):
+                if state == 'visiting':
+                    settled[0] += 1
+
+            start = time.perf_counter()
+            for source, target in pairs:
+                method(graph, source, target, count)
+            elapsed = time.perf_counter() - start
+            print(f"  {method_name:10} đỉnh chốt TB: {settled[0] / queries:10.1f}"
+                  f"   thời gian TB: {elapsed / queries * 1000:8.2f} ms")
+
+
+def bench_all_pairs(num_nodes, sparse_degree, dense_density):
+    """So sánh các backend tính khoảng cách mọi cặp với Dijkstra gọi cho từng cặp"""
+    graphs = [
+        (f"thưa (bậc TB {sparse_degree})", num_nodes * sparse_degree // 2),
+        (f"dày (mật độ {dense_density})", int(num_nodes * (num_nodes - 1) / 2 * dense_density)),
+    ]
+    for name, num_edges in graphs:
+        graph = Graph(directed=False, weighted=True)
+        graph.add_nodes_from((float(i), float(i)) for i in range(num_nodes))
+        graph.add_edges_from(random_edges(num_nodes, num_edges))
+        graph.freeze()
+        print(f"Đồ thị {name}: {num_nodes} đỉnh, {num_edges} cạnh")
+
+        # Cách cũ: mỗi cặp một lần dijkstra, ước lượng theo một hàng
+        ids = list(graph.nodes)
+        start = time.perf_counter()
+        for target in ids:
+            GraphAlgorithms.dijkstra(graph, ids[0], target, reuse=False)
+        per_row = time.perf_counter() - start
+        print(f"  {'dijkstra từng cặp (ước lượng)':32}{per_row * num_nodes:10.2f} s")
+
+        for backend in ('auto', 'floyd_warshall', 'dijkstra'):
+            start = time.perf_counter()
+            result = GraphAlgorithms.all_pairs_shortest_paths(graph, backend)
+            elapsed = time.perf_counter() - start
+            label = f"{backend} ({result.backend})" if backend == 'auto' else backend
+            print(f"  {label:32}{elapsed:10.2f} s")
+
+
+def chain_graph(num_nodes):
+    """Đường thẳng 0 - 1 - ... - (n-1), mọi cạnh trọng số 1"""
+    graph = Graph(directed=False, weighted=True)
+    for i in range(num_nodes):
+        graph.add_node(float(i) * 40, 0.0)
+    for i in range(num_nodes - 1):
+        graph.add_edge(i, i + 1, 1)
+    return graph
+
+
+# Các kiểm tra hồi quy chạy bằng: python benchmark.py check
+def check_dijkstra_after_callback_error():
+    """Callback ném lỗi giữa chừng không được làm hỏng cây đường đi đã lưu theo version"""
+    graph = chain_graph(5)
+    expected = GraphAlgorithms.dijkstra(graph, 0, 4, reuse=False)
+
+    for fail_on in ('visiting', 'visited'):
+        graph.add_node(0.0, 100.0)  # Version mới: cây đường đi dựng lại từ đầu
+
+        def callback(node_id, state, distance):
+            if node_id == 1 and state == fail_on:
+                raise RuntimeError("callback lỗi")
+
+        try:
+            GraphAlgorithms.dijkstra(graph, 0, 4, callback)
+        except RuntimeError:
+            pass
+        result = GraphAlgorithms.dijkstra(graph, 0, 4)
+        assert result == expected, f"sau lỗi ở '{fail_on}': {result} != {expected}"
+
+
+def check_dijkstra_reuse_replays_callbacks():
+    """Dijkstra dùng lại cây đã lưu vẫn gọi callback giống hệt một lần chạy mới"""
+    graph = chain_graph(6)
+    for first, second in ((5, 2), (2, 5), (3, 3)):
+        graph.add_node(0.0, 100.0)  # Version mới: cây đường đi dựng lại từ đầu
+        GraphAlgorithms.dijkstra(graph, 0, first)
+        fresh, reused = [], []
+        expected = GraphAlgorithms.dijkstra(graph, 0, second, lambda *e: fresh.append(e), reuse=False)
+        result = GraphAlgorithms.dijkstra(graph, 0, second, lambda *e: reused.append(e))
+        assert result == expected and reused == fresh, f"{first} -> {second}: {reused} != {fresh}"
+
+
+def check_step_runner_close():
+    """
+    Đóng StepRunner giữa chừng (close(), khối with hoặc bỏ rơi) không làm hỏng kết quả
+    đã lưu và luồng thuật toán phải kết thúc
+    """
+    graph = chain_graph(5)
+    expected = GraphAlgorithms.dijkstra(graph, 0, 4, reuse=False)
+
+    runner = StepRunner(GraphAlgorithms.dijkstra, graph, 0, 4)
+    next(runner)
+    runner.close()
+    assert GraphAlgorithms.dijkstra(graph, 0, 4) == expected, "dijkstra sai sau close()"
+    runner._thread.join(5)
+    assert not runner._thread.is_alive(), "luồng thuật toán còn chạy sau close()"
+
+    graph.add_node(0.0, 100.0)
+    with StepRunner(GraphAlgorithms.dijkstra, graph, 0, 4) as runner:
+        next(runner)
+    assert GraphAlgorithms.dijkstra(graph, 0, 4) == expected, "dijkstra sai sau khối with"
+
+    graph.add_node(0.0, 200.0)
+    runner = StepRunner(GraphAlgorithms.dijkstra, graph, 0, 4)
+    next(runner)
+    thread = runner._thread
+    del runner
+    gc.collect()
+    thread.join(5)
+    assert not thread.is_alive(), "luồng thuật toán bị treo khi StepRunner bị bỏ rơi"
+    assert GraphAlgorithms.dijkstra(graph, 0, 4) == expected, "dijkstra sai sau khi bỏ rơi"
+
+
+def check_records_read_only():
+    """Gán record['key'] phải bị chặn; sửa qua Graph thì version, băm nội dung và ảnh chụp đúng"""
+    graph = chain_graph(3)
+    snapshot = graph.snapshot()
+    version, content_hash = graph.version, graph.content_hash
+    for record, key in ((graph.nodes[0], 'x'), (graph.get_edge(0, 1), 'weight')):
+        try:
+            record[key] = 99
+        except TypeError:
+            pass
+        else:
+            raise AssertionError(f"gán '{key}' vào bản ghi không bị chặn")
+    assert graph.version == version and graph.content_hash == content_hash
+
+    graph.move_node(0, 99, 0)
+    graph.set_edge_weight(0, 1, 99)
+    assert graph.version > version and graph.content_hash != content_hash
+    assert snapshot.nodes[0]['x'] != 99 and snapshot.get_edge_weight(0, 1) != 99
+    assert graph.nodes[0]['x'] == 99 and graph.get_edge_weight(1, 0) == 99
+
+
+def check_hierholzer_steps():
+    """Hierholzer chỉ báo từng đỉnh (không sao chép đường đi); dựng lại được ngăn xếp và chu trình"""
+    graph = chain_graph(6)
+    graph.add_edge(5, 0, 1)
+    circuit = GraphAlgorithms.hierholzer(graph)
+    events = []
+    assert GraphAlgorithms.hierholzer(graph, callback=lambda *event: events.append(event)) == circuit
+
+    stack = [circuit[0]]
+    rebuilt = []
+    for node, state in events:
+        if state == 'exploring':
+            stack.append(node)
+        else:
+            assert stack.pop() == node
+            rebuilt.append(node)
+    assert not stack and rebuilt[::-1] == circuit
+
+
+def check_save_load_round_trip():
+    """Lưu rồi mở lại (qua JSON) giữ nguyên cạnh và băm nội dung, kể cả cặp cạnh ngược"""
+    graph = chain_graph(3)
+    graph.directed = True
+    graph.add_edge(1, 0, 5)
+    graph.directed = False  # (0, 1) và (1, 0) cùng tồn tại, (0, 1) là cạnh đại diện
+    loaded = Graph()
+    loaded.from_dict(json.loads(json.dumps(graph.to_dict())))
+    assert loaded.get_edge_count() == graph.get_edge_count(), "mất cạnh sau khi mở lại"
+    assert loaded.content_hash == graph.content_hash, "băm nội dung đổi sau khi mở lại"
+    assert loaded.get_edge_list() == graph.get_edge_list()
+    loaded.directed = True
+    assert loaded.get_edge_weight(1, 0) == 5, "cạnh ngược bị mất khi chuyển lại có hướng"
+
+
+def check_cached_views_read_only():
+    """Các biểu diễn được lưu theo version là chỉ đọc: người gọi không làm hỏng lần gọi sau"""
+    graph = chain_graph(3)
+    views = [graph.get_adjacency_list(), graph.get_edge_list(), graph.get_degree_table(),
+             graph.get_adjacency_matrix()[0], graph.get_adjacency_matrix('csr')[0][1]]
+    for view in views:
+        try:
+            view[0] = None
+        except TypeError:
+            pass
+        else:
+            raise AssertionError(f"sửa được biểu diễn đã lưu: {type(view).__name__}")
+    assert graph.get_edge_list() == ((0, 1, 1), (1, 2, 1))
+
+
+def check_matrix_rows_match_ids():
+    """Iterator 'rows' đọc CSR chụp lúc gọi: sửa đồ thị trước next() không làm lệch node_ids"""
+    graph = chain_graph(3)
+    rows, node_ids = graph.get_adjacency_matrix('rows')
+    graph.add_node(0.0, 100.0)
+    graph.add_edge(2, 3, 1)
+    assert list(rows) == [[0, 1, 0], [1, 0, 1], [0, 1, 0]] and node_ids == (0, 1, 2)
+
+
+def check_bipartite_tracker_matches_traversal():
+    """Khi không phải đồ thị 2 phía, bộ theo dõi trả về cùng dạng kết quả như lượt BFS"""
+    graph = chain_graph(3)
+    graph.add_edge(2, 0, 1)
+    traversal = GraphAlgorithms.check_bipartite(graph, witness=True)
+    graph.track('bipartite')
+    tracked = GraphAlgorithms.check_bipartite(graph, witness=True)
+    assert traversal[:2] == tracked[:2] == (False, None), f"{traversal} / {tracked}"
+    assert len(tracked[2]) == 4 and tracked[2][0] == tracked[2][-1]
+
+
+def check_step_runner_on_snapshot():
+    """Thuật toán chạy trên ảnh chụp: sửa đồ thị giữa chừng không ảnh hưởng, bộ đệm dùng chung"""
+    graph = chain_graph(20)
+    cache = ResultCache()
+    runner = StepRunner(cache.run, graph.snapshot(), 'bfs', 0)
+    next(runner)
+    graph.remove_nodes(range(10))
+    runner.drain()
+    assert runner.result == list(range(20)), f"bfs trên ảnh chụp sai: {runner.result}"
+    assert len(cache) == 0, "kết quả của version cũ vẫn được lưu"
+
+    for _ in range(2):
+        with StepRunner(cache.run, graph.snapshot(), 'bfs', 10) as runner:
+            runner.drain()
+    assert cache.hits == 1, "ảnh chụp cùng version không dùng chung kết quả"
+
+
+def check_snapshots_share_csr():
+    """Các ảnh chụp cùng version dùng chung một CSR: dijkstra lặp lại từ một nguồn chỉ dựng CSR một lần"""
+    graph = chain_graph(10)
+    cache = ResultCache()
+    builds = [0]
+    original = graph_module.CSRGraph
+
+    def counting(*args):
+        builds[0] += 1
+        return original(*args)
+
+    graph_module.CSRGraph = counting
+    try:
+        for target in (9, 3, 6, 1):
+            with StepRunner(cache.run, graph.snapshot(), 'dijkstra', 0, target) as runner:
+                runner.drain()
+            assert runner.result[1] == target
+    finally:
+        graph_module.CSRGraph = original
+    assert builds[0] == 1, f"dựng CSR {builds[0]} lần cho 4 lần chạy trên cùng version"
+
+
+def check_step_runner_close_stops_algorithm():
+    """Sau close() thuật toán dừng ở lần gọi callback kế tiếp, không chạy nốt ở nền"""
+    calls = [0]
+
+    def endless(callback):
+        for i in range(10 ** 7):
+            calls[0] += 1
+            callback(i, 'visiting')
+        return 'xong'
+
+    runner = StepRunner(endless)
+    next(runner)
+    runner.close()
+    runner._thread.join(5)
+    assert not runner._thread.is_alive(), "luồng thuật toán còn chạy sau close()"
+    assert calls[0] <= 2, f"thuật toán còn gọi callback {calls[0]} lần sau close()"
+
+    graph = chain_graph(50)
+    cache = ResultCache()
+    with StepRunner(cache.run, graph.snapshot(), 'bfs', 0) as runner:
+        next(runner)
+    runner._thread.join(5)
+    assert len(cache) == 0, "kết quả của lượt chạy bị bỏ dở vẫn được lưu"
+
+
+CHECKS = [
+    check_dijkstra_after_callback_error,
+    check_dijkstra_reuse_replays_callbacks,
+    check_step_runner_close,
+    check_records_read_only,
+    check_hierholzer_steps,
+    check_save_load_round_trip,
+    check_cached_views_read_only,
+    check_matrix_rows_match_ids,
+    check_bipartite_tracker_matches_traversal,
+    check_step_runner_on_snapshot,
+    check_snapshots_share_csr,
+    check_step_runner_close_stops_algorithm,
+]
+
+
+def run_checks():
+    """Chạy các kiểm tra hồi quy; trả về True nếu tất cả đều qua"""
+    failed = 0
+    for check in CHECKS:
+        try:
+            check()
+        except AssertionError as error:
+            failed += 1
+            print(f"LỖI  {check.__name__}: {error}")
+        else:
+            print(f"OK   {check.__name__}")
+    return failed == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cho Graph Visualizer")
+    sub = parser.add_subparsers(dest='command')
+
+    memory = sub.add_parser('memory', help="Bộ nhớ mỗi đỉnh / mỗi cạnh")
+    memory.add_argument('--nodes', type=int, default=100000)
+    memory.add_argument('--edges', type=int, default=1000000)
+
+    stress = sub.add_parser('stress', help="Kiểm thử tải đa luồng với thread_safe=True")
+    stress.add_argument('--seconds', type=float, default=5)
+    stress.add_argument('--mutators', type=int, default=4)
+    stress.add_argument('--readers', type=int, default=4)
+
+    search = sub.add_parser('search', help="Số đỉnh được chốt: Dijkstra / A* / hai chiều")
+    search.add_argument('--size', type=int, default=200, help="Cạnh của đồ thị lưới")
+    search.add_argument('--nodes', type=int, default=40000, help="Số đỉnh đồ thị hình học")
+    search.add_argument('--queries', type=int, default=20)
+
+    apsp = sub.add_parser('apsp', help="Khoảng cách mọi cặp: Floyd–Warshall / Dijkstra song song")
+    apsp.add_argument('--nodes', type=int, default=1000)
+    apsp.add_argument('--degree', type=int, default=6, help="Bậc trung bình của đồ thị thưa")
+    apsp.add_argument('--density', type=float, default=0.5, help="Mật độ của đồ thị dày")
+
+    sub.add_parser('check', help="Các kiểm tra hồi quy")
+
+    args = parser.parse_args()
+    if args.command == 'memory':
+        bench_memory(args.nodes, args.edges)
+    elif args.command == 'search':
+        bench_search(args.size, args.nodes, args.queries)
+    elif args.command == 'apsp':
+        bench_all_pairs(args.nodes, args.degree, args.density)
+    elif args.command == 'check':
+        if not run_checks():
+            raise SystemExit(1)
+    elif args.command == 'stress':
+        if not stress_concurrency(args.seconds, args.mutators, args.readers):
+            raise SystemExit(1)
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,7 @@ canvas_view.py - Giao diện Canvas để vẽ đồ thị
 
 import tkinter as tk
 from tkinter import Canvas
+from contextlib import contextmanager
 import math
 
 
@@ -27,6 +28,10 @@ class GraphCanvas(Canvas):
         'text': '#E3F2FD',
     }
     
+    # Màu lần lượt cho các thành phần liên thông
+    COMPONENT_PALETTE = ('#2196F3', '#4CAF50', '#FFC107', '#9C27B0', '#FF6B35',
+                         '#00BCD4', '#E91E63', '#8BC34A', '#795548', '#607D8B')
+    
     NODE_RADIUS = 25
     ARROW_SIZE = 12
     
@@ -36,7 +41,11 @@ class GraphCanvas(Canvas):
         self.graph = graph
         self.node_colors = {}
         self.edge_colors = {}
+        # Lớp màu thành phần (xem color_components), nằm dưới node_colors/edge_colors
+        self.component_labels = {}  # {id đỉnh: nhãn thành phần}
+        self.component_colors = {}  # {nhãn thành phần: màu}
         self.selected_node = None
+        self._batch_depth = 0  # > 0: đang trong batch(), hoãn vẽ lại
         
         # Bind events
         self.bind('<Button-1>', self.on_click)
@@ -45,20 +54,34 @@ class GraphCanvas(Canvas):
         
         self.dragging_node = None
         
+    @contextmanager
+    def batch(self):
+        """Gộp nhiều lần đổi màu thành một lần vẽ lại khi kết thúc khối with"""
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.draw_all()
+    
     def draw_all(self):
         """Vẽ toàn bộ đồ thị"""
+        if self._batch_depth:
+            return
         self.delete('all')
         
         # Vẽ lưới nền
         self.draw_grid()
         
-        # Vẽ cạnh trước
-        for edge in self.graph.edges:
-            self.draw_edge(edge)
-        
-        # Vẽ đỉnh sau
-        for node_id, node_data in self.graph.nodes.items():
-            self.draw_node(node_id, node_data)
+        with self.graph.read_locked():
+            # Vẽ cạnh trước
+            for edge in self.graph.edges:
+                self.draw_edge(edge)
+            
+            # Vẽ đỉnh sau
+            for node_id, node_data in self.graph.nodes.items():
+                self.draw_node(node_id, node_data)
     
     def draw_grid(self):
         """Vẽ lưới nền"""
@@ -78,7 +101,7 @@ class GraphCanvas(Canvas):
         r = self.NODE_RADIUS
         
         # Lấy màu
-        color = self.node_colors.get(node_id, self.COLORS['node_default'])
+        color = self._node_color(node_id)
         
         # Vẽ shadow
         self.create_oval(x - r + 2, y - r + 2, x + r + 2, y + r + 2,
@@ -87,7 +110,7 @@ class GraphCanvas(Canvas):
         # Vẽ hình tròn
         self.create_oval(x - r, y - r, x + r, y + r,
                         fill=color, outline='#90CAF9', width=2,
-                        tags=f'node_{node_id}')
+                        tags=(f'node_{node_id}', f'node_fill_{node_id}'))
         
         # Vẽ label
         self.create_text(x, y, text=node_data['label'],
@@ -120,12 +143,13 @@ class GraphCanvas(Canvas):
         end_y = y2 - (dy / distance) * r
         
         # Lấy màu
-        edge_key = (edge['from'], edge['to'])
-        color = self.edge_colors.get(edge_key, self.COLORS['edge_default'])
+        color = self._edge_color(edge['from'], edge['to'])
+        
+        tags = ('edge', f"edge_{edge['from']}_{edge['to']}")
         
         # Vẽ đường thẳng
         self.create_line(start_x, start_y, end_x, end_y,
-                        fill=color, width=2, tags='edge')
+                        fill=color, width=2, tags=tags + (f"edge_line_{edge['from']}_{edge['to']}",))
         
         # Vẽ mũi tên nếu là đồ thị có hướng
         if self.graph.directed:
@@ -137,7 +161,8 @@ class GraphCanvas(Canvas):
                 end_x - self.ARROW_SIZE * math.cos(angle + math.pi/6),
                 end_y - self.ARROW_SIZE * math.sin(angle + math.pi/6)
             ]
-            self.create_polygon(arrow_points, fill=color, outline=color, tags='edge')
+            self.create_polygon(arrow_points, fill=color, outline=color,
+                              tags=tags + (f"edge_arrow_{edge['from']}_{edge['to']}",))
         
         # Vẽ trọng số nếu có
         if self.graph.weighted:
@@ -146,18 +171,27 @@ class GraphCanvas(Canvas):
             
             # Background cho text
             self.create_rectangle(mid_x - 15, mid_y - 10, mid_x + 15, mid_y + 10,
-                                fill=self.COLORS['background'], outline='', tags='edge')
+                                fill=self.COLORS['background'], outline='', tags=tags)
             
             self.create_text(mid_x, mid_y, text=str(edge['weight']),
-                           fill='#FFC107', font=('Arial', 10, 'bold'), tags='edge')
+                           fill='#FFC107', font=('Arial', 10, 'bold'), tags=tags)
+    
+    def erase_node(self, node_id, edges):
+        """Chỉ xóa hình của một đỉnh và các cạnh liên quan, không vẽ lại toàn bộ"""
+        self.delete(f'node_{node_id}')
+        for edge in edges:
+            self.delete(f"edge_{edge['from']}_{edge['to']}")
+        self.node_colors.pop(node_id, None)
+        self.component_labels.pop(node_id, None)
     
     def find_node_at(self, x, y):
         """Tìm đỉnh tại vị trí (x, y)"""
-        for node_id, node_data in self.graph.nodes.items():
-            nx, ny = node_data['x'], node_data['y']
-            distance = math.sqrt((x - nx)**2 + (y - ny)**2)
-            if distance <= self.NODE_RADIUS:
-                return node_id
+        with self.graph.read_locked():
+            for node_id, node_data in self.graph.nodes.items():
+                nx, ny = node_data['x'], node_data['y']
+                distance = math.sqrt((x - nx)**2 + (y - ny)**2)
+                if distance <= self.NODE_RADIUS:
+                    return node_id
         return None
     
     def on_click(self, event):
@@ -169,8 +203,7 @@ class GraphCanvas(Canvas):
     def on_drag(self, event):
         """Xử lý sự kiện kéo chuột"""
         if self.dragging_node is not None:
-            self.graph.nodes[self.dragging_node]['x'] = event.x
-            self.graph.nodes[self.dragging_node]['y'] = event.y
+            self.graph.move_node(self.dragging_node, event.x, event.y)
             self.draw_all()
     
     def on_release(self, event):
@@ -193,10 +226,76 @@ class GraphCanvas(Canvas):
             self.edge_colors[(from_node, to_node)] = color_key
         self.draw_all()
     
+    def _node_color(self, node_id):
+        color = self.node_colors.get(node_id)
+        if color is None:
+            label = self.component_labels.get(node_id)
+            color = self.COLORS['node_default'] if label is None else self.component_colors[label]
+        return color
+    
+    def _edge_color(self, from_node, to_node):
+        color = self.edge_colors.get((from_node, to_node))
+        if color is None:
+            # Cạnh nằm trong một thành phần lấy màu của thành phần đó
+            label = self.component_labels.get(from_node)
+            if label is not None and label == self.component_labels.get(to_node):
+                return self.component_colors[label]
+            color = self.COLORS['edge_default']
+        return color
+    
+    def color_components(self, labels):
+        """
+        Tô mỗi thành phần một màu (cạnh nằm trong thành phần cùng màu). Nhãn giữ
+        màu cũ nếu đã có; chỉ các đỉnh đổi nhãn và cạnh của chúng được tô lại.
+        Nếu canvas đang có màu khác (của thuật toán trước) thì xóa và vẽ lại một lần.
+        :param labels: {id đỉnh: nhãn thành phần}
+        """
+        redraw = bool(self.node_colors or self.edge_colors)
+        if redraw:
+            self.node_colors = {}
+            self.edge_colors = {}
+        
+        palette = self.COMPONENT_PALETTE
+        previous = self.component_colors
+        colors = {}
+        changed = []
+        old_labels = self.component_labels
+        for node_id, label in labels.items():
+            if label not in colors:
+                colors[label] = previous.get(label, palette[len(colors) % len(palette)])
+            if old_labels.get(node_id) != label or previous.get(label) != colors[label]:
+                changed.append(node_id)
+        self.component_labels = dict(labels)
+        self.component_colors = colors
+        
+        if redraw or self._batch_depth:
+            self.draw_all()
+            return
+        
+        with self.graph.read_locked():
+            for node_id in changed:
+                if node_id not in self.graph.nodes:
+                    continue
+                self.itemconfigure(f'node_fill_{node_id}', fill=self._node_color(node_id))
+                edges = [edge for _, edge in self.graph.incident_edges(node_id)]
+                if self.graph.directed:
+                    edges.extend(self.graph.get_edge(u, node_id)
+                                 for u in self.graph.get_in_neighbors(node_id))
+                for edge in edges:
+                    u, v = edge['from'], edge['to']
+                    color = self._edge_color(u, v)
+                    # Vô hướng: cạnh ngược còn lại (nếu có) được vẽ chồng lên cùng chỗ
+                    pairs = ((u, v),) if self.graph.directed else ((u, v), (v, u))
+                    for a, b in pairs:
+                        self.itemconfigure(f'edge_line_{a}_{b}', fill=color)
+                        self.itemconfigure(f'edge_arrow_{a}_{b}', fill=color, outline=color)
+    
     def reset_colors(self):
         """Reset tất cả màu về mặc định"""
         self.node_colors = {}
         self.edge_colors = {}
+        self.component_labels = {}
+        self.component_colors = {}
         self.draw_all()
     
     def highlight_path(self, path, color='node_visiting'):
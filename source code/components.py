@@ -0,0 +1,115 @@
+"""
+components.py - Thành phần liên thông trên ảnh chụp CSR
+
+- weak_components: gán nhãn thành phần liên thông (có hướng: liên thông yếu,
+  bỏ qua chiều cạnh) bằng BFS qua cung ra và cung vào, O(V + E).
+- strong_components: thành phần liên thông mạnh bằng Tarjan không đệ quy, O(V + E).
+Kết quả (nhãn theo chỉ số đỉnh, số thành phần) được lưu vào memo của ảnh chụp
+nên các lần gọi sau trên cùng version chỉ còn là tra mảng.
+"""
+
+from array import array
+from collections import deque
+
+
+def weak_components(csr):
+    """(labels, count): labels[i] là số thứ tự thành phần của đỉnh chỉ số i"""
+    cached = csr.memo.get('weak_components')
+    if cached is not None:
+        return cached
+
+    n, offsets, targets = csr.n, csr.offsets, csr.targets
+    in_offsets, sources, _ = csr.in_arcs()
+    labels = array('i', [-1]) * n
+    count = 0
+    for root in range(n):
+        if labels[root] >= 0:
+            continue
+        labels[root] = count
+        queue = deque([root])
+        while queue:
+            u = queue.popleft()
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                if labels[v] < 0:
+                    labels[v] = count
+                    queue.append(v)
+            for k in range(in_offsets[u], in_offsets[u + 1]):
+                v = sources[k]
+                if labels[v] < 0:
+                    labels[v] = count
+                    queue.append(v)
+        count += 1
+
+    csr.memo['weak_components'] = (labels, count)
+    return labels, count
+
+
+def strong_components(csr):
+    """
+    (labels, count) theo Tarjan với ngăn xếp lời gọi tường minh.
+    Thành phần được đánh số theo thứ tự tô-pô ngược (thành phần không có cung
+    đi sang thành phần khác nhận số 0). Vô hướng: trùng với weak_components.
+    """
+    cached = csr.memo.get('strong_components')
+    if cached is not None:
+        return cached
+
+    n, offsets, targets = csr.n, csr.offsets, csr.targets
+    index = array('i', [-1]) * n  # Thứ tự thăm
+    low = array('i', [0]) * n
+    labels = array('i', [-1]) * n
+    on_stack = bytearray(n)
+    cursor = array('i', offsets[:-1]) if n else array('i')  # Cung kế tiếp cần xét của mỗi đỉnh
+    stack = []
+    counter = 0
+    count = 0
+
+    for root in range(n):
+        if index[root] >= 0:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        calls = [root]
+        while calls:
+            u = calls[-1]
+            k = cursor[u]
+            if k < offsets[u + 1]:
+                cursor[u] = k + 1
+                v = targets[k]
+                if index[v] < 0:
+                    index[v] = low[v] = counter
+                    counter += 1
+                    stack.append(v)
+                    on_stack[v] = 1
+                    calls.append(v)
+                elif on_stack[v] and index[v] < low[u]:
+                    low[u] = index[v]
+                continue
+
+            calls.pop()
+            if calls and low[u] < low[calls[-1]]:
+                low[calls[-1]] = low[u]
+            if low[u] == index[u]:
+                # u là gốc của một thành phần: lấy ra đến u
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = 0
+                    labels[w] = count
+                    if w == u:
+                        break
+                count += 1
+
+    csr.memo['strong_components'] = (labels, count)
+    return labels, count
+
+
+def group(csr, labels, count):
+    """Danh sách các thành phần, mỗi thành phần là danh sách id đỉnh"""
+    groups = [[] for _ in range(count)]
+    ids = csr.node_ids
+    for i in range(csr.n):
+        groups[labels[i]].append(ids[i])
+    return groups
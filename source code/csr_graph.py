@@ -0,0 +1,148 @@
+"""
+csr_graph.py - Ảnh chụp bất biến của đồ thị dạng CSR (compressed sparse row)
+"""
+
+from array import array
+
+
+class CSRGraph:
+    """
+    Ảnh chụp chỉ đọc của Graph dùng để chạy thuật toán.
+
+    Đỉnh được đánh chỉ số dày 0..n-1 theo thứ tự id tăng dần; id_index[node_id]
+    cho chỉ số tương ứng (-1 nếu id không tồn tại). Khi id đã dày (xem
+    Graph.compact()) thì id và chỉ số trùng nhau.
+    Láng giềng của đỉnh i là targets[offsets[i]:offsets[i + 1]], mỗi cung
+    có trọng số weights[k] và thuộc cạnh arc_edge[k]. Với đồ thị vô hướng
+    mỗi cạnh sinh ra hai cung dùng chung một chỉ số cạnh.
+    """
+
+    __slots__ = ('directed', 'weighted', 'node_ids', 'id_index', 'n', 'xs', 'ys',
+                 'offsets', 'targets', 'weights', 'arc_edge',
+                 'edge_from', 'edge_to', 'edge_weight', 'memo')
+
+    def __init__(self, graph):
+        """
+        Dựng ảnh chụp từ một Graph
+        :param graph: Đồ thị nguồn
+        """
+        self.directed = graph.directed
+        self.weighted = graph.weighted
+        self.node_ids = tuple(sorted(graph.nodes))
+        self.n = len(self.node_ids)
+
+        index_of = array('i', [-1]) * (self.node_ids[-1] + 1 if self.node_ids else 0)
+        for i, node_id in enumerate(self.node_ids):
+            index_of[node_id] = i
+        self.id_index = index_of
+
+        # Tọa độ trên canvas, dùng cho heuristic hình học (A*)
+        self.xs = array('d', (graph.nodes[node_id].x for node_id in self.node_ids))
+        self.ys = array('d', (graph.nodes[node_id].y for node_id in self.node_ids))
+
+        # Danh sách cạnh: chỉ lấy các cạnh đang nằm trong chỉ mục kề
+        edge_index = {}
+        edge_from = array('i')
+        edge_to = array('i')
+        edge_weight = []
+        for edge in graph.edges:
+            if graph.get_edge(edge.source, edge.target) is not edge:
+                continue
+            edge_index[id(edge)] = len(edge_from)
+            edge_from.append(index_of[edge.source])
+            edge_to.append(index_of[edge.target])
+            edge_weight.append(edge.weight)
+
+        typecode = _weight_typecode(edge_weight)
+
+        offsets = array('i', [0])
+        targets = array('i')
+        weights = array(typecode)
+        arc_edge = array('i')
+        for node_id in self.node_ids:
+            for neighbor, edge in graph.incident_edges(node_id):
+                targets.append(index_of[neighbor])
+                weights.append(edge.weight)
+                arc_edge.append(edge_index[id(edge)])
+            offsets.append(len(targets))
+
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.arc_edge = arc_edge
+        self.edge_from = edge_from
+        self.edge_to = edge_to
+        # Kết quả phụ tính trên ảnh chụp này (vd cây đường đi ngắn nhất);
+        # ảnh chụp gắn với một version nên bộ đệm tự hết hạn khi đồ thị đổi
+        self.memo = {}
+        self.edge_weight = array(typecode, edge_weight)
+
+    def __setattr__(self, name, value):
+        if hasattr(self, 'edge_weight'):
+            raise AttributeError("CSRGraph là bất biến")
+        object.__setattr__(self, name, value)
+
+    def index(self, node_id):
+        """Chỉ số của một id đỉnh, hoặc None nếu không tồn tại"""
+        if isinstance(node_id, int) and 0 <= node_id < len(self.id_index):
+            i = self.id_index[node_id]
+            if i >= 0:
+                return i
+        return None
+
+    @property
+    def edge_count(self):
+        """Số cạnh"""
+        return len(self.edge_from)
+
+    def degree(self, i):
+        """Bậc ra của đỉnh có chỉ số i"""
+        return self.offsets[i + 1] - self.offsets[i]
+
+    def neighbors(self, i):
+        """Chỉ số các láng giềng của đỉnh i"""
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+    def in_arcs(self):
+        """
+        Các cung đi vào theo dạng CSR: (in_offsets, sources, weights).
+        Vô hướng thì trùng với cung đi ra; có hướng thì dựng một lần và lưu vào memo.
+        """
+        if not self.directed:
+            return self.offsets, self.targets, self.weights
+        reverse = self.memo.get('in_arcs')
+        if reverse is None:
+            counts = [0] * (self.n + 1)
+            for v in self.targets:
+                counts[v + 1] += 1
+            for i in range(self.n):
+                counts[i + 1] += counts[i]
+            in_offsets = array('i', counts)
+            position = counts[:-1]
+            sources = array('i', [0]) * len(self.targets)
+            weights = array(self.weights.typecode, [0]) * len(self.targets)
+            for u in range(self.n):
+                for k in range(self.offsets[u], self.offsets[u + 1]):
+                    v = self.targets[k]
+                    sources[position[v]] = u
+                    weights[position[v]] = self.weights[k]
+                    position[v] += 1
+            reverse = (in_offsets, sources, weights)
+            self.memo['in_arcs'] = reverse
+        return reverse
+
+    def edge_record(self, e):
+        """Bản ghi cạnh dạng dict (dùng cho callback)"""
+        return {
+            'from': self.node_ids[self.edge_from[e]],
+            'to': self.node_ids[self.edge_to[e]],
+            'weight': self.edge_weight[e]
+        }
+
+
+def _weight_typecode(weights):
+    """Chọn kiểu mảng vừa với trọng số: số nguyên 64 bit hoặc số thực"""
+    for w in weights:
+        if not isinstance(w, int) or not -2**63 <= w < 2**63:
+            return 'd'
+    return 'q'
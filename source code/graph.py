@@ -2,113 +2,735 @@
 graph.py - Class đại diện cho đồ thị
 """
 
+try:
+    import numpy as np
+except ImportError:  # NumPy là tùy chọn, chỉ cần cho định dạng 'numpy'
+    np = None
+
+import functools
+import hashlib
+from array import array
+from types import MappingProxyType
+
+from csr_graph import CSRGraph
+from incremental import TRACKERS
+from records import NodeRecord, EdgeRecord
+from rwlock import ReadWriteLock, NULL_LOCK
+
+# content_hash lấy theo modulo 2^64
+HASH_MASK = (1 << 64) - 1
+
+
+def _element_hash(item):
+    """Băm blake2b 64 bit của một phần tử (đỉnh, cạnh hoặc cờ) cho content_hash"""
+    return int.from_bytes(hashlib.blake2b(repr(item).encode(), digest_size=8).digest(), 'little')
+
+
+def _readonly(values):
+    """View chỉ đọc của một mảng (mảng gốc có thể thuộc ảnh chụp CSR)"""
+    return memoryview(values).toreadonly()
+
+
+def _iter_matrix_rows(offsets, targets, values):
+    """Sinh lần lượt từng hàng của ma trận kề từ các mảng CSR đã chụp"""
+    n = len(offsets) - 1
+    for i in range(n):
+        row = [0] * n
+        for k in range(offsets[i], offsets[i + 1]):
+            row[targets[k]] = values[k]
+        yield row
+
+
+def _writes(method):
+    """Giữ khóa ghi trong khi chạy phương thức (chỉ khi bật thread_safe)"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._lock is None:
+            return method(self, *args, **kwargs)
+        with self._lock.write_locked():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _reads(method):
+    """Giữ khóa đọc trong khi chạy phương thức (chỉ khi bật thread_safe)"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._lock is None:
+            return method(self, *args, **kwargs)
+        with self._lock.read_locked():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class Graph:
-    def __init__(self, directed=False, weighted=False):
+    def __init__(self, directed=False, weighted=False, thread_safe=False):
         """
         Khởi tạo đồ thị
         :param directed: Đồ thị có hướng hay không
         :param weighted: Đồ thị có trọng số hay không
+        :param thread_safe: Bật khóa đọc/ghi để dùng đồ thị từ nhiều luồng
         """
-        self.nodes = {}  # {node_id: {'x': x, 'y': y, 'label': label}}
-        self.edges = []  # [{'from': node_id, 'to': node_id, 'weight': weight}]
-        self.directed = directed
-        self.weighted = weighted
+        self.nodes = {}  # {node_id: NodeRecord} - dùng như {'x': x, 'y': y, 'label': label}
+        # Cạnh (EdgeRecord, dùng như {'from': u, 'to': v, 'weight': w}) chỉ nằm trong chỉ mục kề
+        self._out = {}  # {node_id: {neighbor: edge}} - láng giềng ra (vô hướng: cả hai chiều)
+        self._in = {}  # {node_id: {neighbor: edge}} - láng giềng vào (vô hướng: luôn rỗng)
+        self._twins = {}  # {(from, to): edge} - vô hướng: cạnh ngược còn lại sau khi bỏ có hướng
+        self._edge_count = 0
+        self._directed = directed
+        self._weighted = weighted
         self.node_counter = 0
+        self._listeners = []
+        self.version = 0  # Tăng sau mỗi thay đổi
+        self._cache = {}  # {tên biểu diễn: giá trị} - chỉ hợp lệ với version hiện tại
+        # Copy-on-write với ảnh chụp (xem snapshot())
+        self._readonly = False  # True với ảnh chụp
+        self.snapshot_of = None  # Ảnh chụp: đồ thị được chụp
+        self._shared = False  # Các bảng đang dùng chung với một ảnh chụp
+        self._owned = None  # Đỉnh có danh sách kề đã tách riêng; None = tất cả
+        self._lock = ReadWriteLock() if thread_safe else None
+        self._trackers = {}  # {loại: bộ theo dõi gia tăng} (xem track())
+        self._content_sum = None  # Tổng băm các đỉnh/cạnh (xem content_hash); None = chưa tính
+    
+    def read_locked(self):
+        """
+        Context manager giữ khóa đọc, dùng khi duyệt trực tiếp self.nodes
+        hoặc incident_edges(). Không cần nếu đọc qua snapshot().
+        """
+        if self._lock is None:
+            return NULL_LOCK
+        return self._lock.read_locked()
+    
+    @property
+    @_reads
+    def edges(self):
+        """Danh sách cạnh, nhóm theo đỉnh nguồn (theo thứ tự thêm vào trong mỗi đỉnh)"""
+        return list(self._iter_edges())
+    
+    def _iter_edges(self):
+        """Duyệt mọi cạnh: lấy từ _out ở đỉnh nguồn, sau đó các cạnh ngược trong _twins"""
+        for node_id, out in self._out.items():
+            for edge in out.values():
+                if edge.source == node_id:  # Vô hướng: mỗi cạnh chỉ lấy một lần
+                    yield edge
+        yield from self._twins.values()
+    
+    @property
+    def directed(self):
+        return self._directed
+    
+    @directed.setter
+    @_writes
+    def directed(self, value):
+        """Đổi loại đồ thị thì phải dựng lại chỉ mục kề"""
+        if value != self._directed:
+            self._before_write()
+            edges = list(self._iter_edges())
+            self._directed = value
+            self._rebuild_index(edges)
+            self._notify('reset')
+    
+    @property
+    def weighted(self):
+        return self._weighted
+    
+    @weighted.setter
+    @_writes
+    def weighted(self, value):
+        if value != self._weighted:
+            self._before_write()
+            self._weighted = value
+            self._notify('reset')
+    
+    @_writes
+    def add_listener(self, listener):
+        """
+        Đăng ký hàm được gọi sau mỗi thay đổi: listener(event, data)
+        event: 'nodes_added', 'nodes_removed', 'nodes_moved', 'edges_added', 'edges_removed',
+               'edges_updated' (đổi trọng số, data chứa bản ghi mới), 'reset'
+        data: {'nodes': [node_id, ...], 'edges': [edge, ...]}
+        Các thao tác hàng loạt chỉ gọi listener một lần cho cả lô.
+        """
+        self._listeners.append(listener)
     
+    @_writes
+    def remove_listener(self, listener):
+        """Hủy đăng ký listener"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def _notify(self, event, nodes=(), edges=()):
+        """Tăng version, bỏ các biểu diễn đã lưu và báo thay đổi cho các listener"""
+        self.version += 1
+        self._cache.clear()
+        if self._content_sum is not None:
+            if event == 'reset':
+                self._content_sum = None
+            elif event in ('nodes_removed', 'edges_removed'):
+                self._content_sum = (self._content_sum - self._hash_elements(nodes, edges)) & HASH_MASK
+            elif event != 'nodes_moved':
+                self._content_sum = (self._content_sum + self._hash_elements(nodes, edges)) & HASH_MASK
+        if self._listeners:
+            data = {'nodes': list(nodes), 'edges': list(edges)}
+            for listener in list(self._listeners):
+                listener(event, data)
+    
+    @property
+    @_reads
+    def content_hash(self):
+        """
+        Băm nội dung 64 bit: tổng băm của từng đỉnh (id), từng cạnh (from, to, weight)
+        và hai cờ directed/weighted, modulo 2^64. Không phụ thuộc thứ tự thêm, tọa độ
+        hay nhãn đỉnh. Tính đầy đủ ở lần đọc đầu, sau đó chỉ cộng/trừ băm các phần tử
+        thay đổi.
+        """
+        if self._content_sum is None:
+            self._content_sum = self._hash_elements(self.nodes, self._iter_edges())
+        return (self._content_sum + _element_hash(('directed', self._directed))
+                + _element_hash(('weighted', self._weighted))) & HASH_MASK
+    
+    @staticmethod
+    def _hash_elements(nodes, edges):
+        total = 0
+        for node_id in nodes:
+            total += _element_hash(('node', node_id))
+        for edge in edges:
+            total += _element_hash(('edge', edge.source, edge.target, edge.weight))
+        return total & HASH_MASK
+    
+    @_writes
+    def track(self, kind):
+        """
+        Lấy (tạo nếu chưa có) bộ theo dõi gia tăng gắn với đồ thị, vd 'mst' (xem incremental.py).
+        Bộ theo dõi tự cập nhật sau mỗi thay đổi nên kết quả đọc được ngay.
+        """
+        tracker = self._trackers.get(kind)
+        if tracker is None:
+            if kind not in TRACKERS:
+                raise ValueError(f"Loại theo dõi không hợp lệ: {kind}")
+            tracker = TRACKERS[kind](self)
+            self._trackers[kind] = tracker
+        return tracker
+    
+    def get_tracker(self, kind):
+        """Bộ theo dõi đang gắn với đồ thị (None nếu chưa track())"""
+        return self._trackers.get(kind)
+    
+    @_writes
+    def untrack(self, kind):
+        """Gỡ bộ theo dõi đã tạo bằng track()"""
+        tracker = self._trackers.pop(kind, None)
+        if tracker is not None:
+            tracker.detach()
+    
+    @_reads
+    def snapshot(self):
+        """
+        Ảnh chụp chỉ đọc, dùng chung dữ liệu với đồ thị (copy-on-write).
+        Lần ghi đầu tiên sau khi chụp chỉ sao chép các bảng ngoài cùng (con trỏ);
+        bản ghi đỉnh/cạnh và danh sách kề của từng đỉnh chỉ bị sao chép khi được sửa.
+        Ảnh chụp CSR được dựng trước (một lần cho mỗi version, sau đó chụp là O(1))
+        nên mọi ảnh chụp cùng version dùng chung một CSR và memo của nó (vd cây
+        đường đi ngắn nhất).
+        Ở chế độ thread_safe, ảnh chụp được đọc từ luồng khác mà không cần khóa.
+        """
+        if self._readonly:
+            return self
+        self.freeze()
+        snap = Graph.__new__(Graph)
+        snap.__dict__.update(self.__dict__)
+        snap._listeners = []
+        snap._trackers = {}
+        snap._cache = dict(self._cache)
+        snap._readonly = True
+        snap.snapshot_of = self
+        snap._shared = False
+        snap._owned = None
+        snap._lock = None  # Ảnh chụp bất biến nên đọc không cần khóa
+        self._shared = True
+        return snap
+    
+    def _before_write(self):
+        """Gọi trước mọi thay đổi: chặn ghi vào ảnh chụp, tách các bảng đang dùng chung"""
+        if self._readonly:
+            raise TypeError("Không thể sửa ảnh chụp chỉ đọc của đồ thị")
+        if self._shared:
+            self.nodes = dict(self.nodes)
+            self._out = dict(self._out)
+            self._in = dict(self._in)
+            self._twins = dict(self._twins)
+            self._owned = set()
+            self._shared = False
+    
+    def _own(self, node_id):
+        """Tách riêng danh sách kề của một đỉnh trước khi sửa"""
+        owned = self._owned
+        if owned is not None and node_id not in owned:
+            self._out[node_id] = dict(self._out[node_id])
+            if self._directed:
+                self._in[node_id] = dict(self._in[node_id])
+            owned.add(node_id)
+    
+    def _index_edge(self, edge):
+        """Đưa một cạnh (chưa có cùng chiều) vào chỉ mục kề"""
+        u, v = edge.source, edge.target
+        self._own(u)
+        self._own(v)
+        if self._directed:
+            self._out[u][v] = edge
+            self._in[v][u] = edge
+        elif v in self._out[u]:
+            # Vô hướng đã có cạnh (v, u) (sau khi chuyển có hướng -> vô hướng): giữ cạnh
+            # đầu tiên làm đại diện, cạnh này để riêng cho tới khi cạnh kia bị xóa
+            self._twins[(u, v)] = edge
+        else:
+            self._out[u][v] = edge
+            self._out[v][u] = edge
+    
+    def _unindex_edge(self, edge):
+        """Gỡ một cạnh đại diện ra khỏi chỉ mục kề"""
+        u, v = edge.source, edge.target
+        self._own(u)
+        self._own(v)
+        del self._out[u][v]
+        if self._directed:
+            del self._in[v][u]
+        else:
+            self._out[v].pop(u, None)  # Khuyên (u == v) đã xóa ở trên
+            # Cạnh ngược còn lại (nếu có) trở thành cạnh đại diện
+            twin = self._twins.pop((v, u), None)
+            if twin is not None:
+                self._index_edge(twin)
+    
+    def _rebuild_index(self, edges):
+        """Dựng lại toàn bộ chỉ mục kề từ các cạnh cho trước (không trùng (from, to))"""
+        self._out = {node_id: {} for node_id in self.nodes}
+        # Vô hướng: _out đã chứa cả hai chiều, không dựng _in (đỡ một dict mỗi đỉnh)
+        self._in = {node_id: {} for node_id in self.nodes} if self._directed else {}
+        self._twins = {}
+        self._owned = None
+        self._edge_count = 0
+        for edge in edges:
+            self._index_edge(edge)
+            self._edge_count += 1
+    
+    @_writes
     def add_node(self, x, y, label=None):
         """Thêm đỉnh vào đồ thị"""
+        node_id = self._insert_node(x, y, label)
+        self._notify('nodes_added', nodes=[node_id])
+        return node_id
+    
+    @_writes
+    def add_nodes_from(self, nodes):
+        """
+        Thêm nhiều đỉnh trong một lượt
+        :param nodes: Các bộ (x, y) hoặc (x, y, label)
+        :return: (số đỉnh đã thêm, số phần tử bị loại); id được cấp liên tiếp từ node_counter
+        """
+        added = []
+        rejected = 0
+        for item in nodes:
+            try:
+                if len(item) == 2:
+                    x, y = item
+                    label = None
+                else:
+                    x, y, label = item
+            except (TypeError, ValueError):
+                rejected += 1
+                continue
+            if not isinstance(x, (int, float)) or not isinstance(y, (int, float)):
+                rejected += 1
+                continue
+            added.append(self._insert_node(x, y, label))
+        if added:
+            self._notify('nodes_added', nodes=added)
+        return len(added), rejected
+    
+    def _insert_node(self, x, y, label):
+        self._before_write()
         node_id = self.node_counter
         if label is None:
             label = str(node_id)
-        self.nodes[node_id] = {'x': x, 'y': y, 'label': label}
+        self.nodes[node_id] = NodeRecord(x, y, label)
+        self._out[node_id] = {}
+        if self._directed:
+            self._in[node_id] = {}
+        if self._owned is not None:
+            self._owned.add(node_id)
         self.node_counter += 1
         return node_id
     
+    @_writes
     def remove_node(self, node_id):
         """Xóa đỉnh khỏi đồ thị"""
         if node_id in self.nodes:
-            del self.nodes[node_id]
-            # Xóa tất cả cạnh liên quan
-            self.edges = [e for e in self.edges if e['from'] != node_id and e['to'] != node_id]
+            removed_edges = self._detach_node(node_id)
+            self._notify('nodes_removed', nodes=[node_id], edges=removed_edges)
             return True
         return False
     
+    @_writes
+    def remove_nodes(self, node_ids):
+        """Xóa nhiều đỉnh trong một lượt, trả về số đỉnh đã xóa"""
+        removed = []
+        removed_edges = []
+        for node_id in dict.fromkeys(node_ids):
+            if node_id in self.nodes:
+                removed_edges.extend(self._detach_node(node_id))
+                removed.append(node_id)
+        if removed:
+            self._notify('nodes_removed', nodes=removed, edges=removed_edges)
+        return len(removed)
+    
+    def _detach_node(self, node_id):
+        """Gỡ đỉnh và các cạnh liên quan qua chỉ mục kề, chỉ tốn O(bậc); trả về các cạnh đã xóa"""
+        self._before_write()
+        del self.nodes[node_id]
+        out_edges = self._out.pop(node_id)
+        in_edges = self._in.pop(node_id, {})
+        removed = []
+        for neighbor, edge in out_edges.items():
+            removed.append(edge)
+            if neighbor == node_id:
+                continue
+            self._own(neighbor)
+            if self._directed:
+                del self._in[neighbor][node_id]
+            else:
+                del self._out[neighbor][node_id]
+                twin = self._twins.pop((edge.target, edge.source), None)
+                if twin is not None:
+                    removed.append(twin)
+        for neighbor, edge in in_edges.items():
+            if neighbor != node_id:
+                removed.append(edge)
+                self._own(neighbor)
+                del self._out[neighbor][node_id]
+        self._edge_count -= len(removed)
+        return removed
+    
+    @_reads
+    def get_incident_edges(self, node_id):
+        """Các cạnh sẽ bị xóa cùng đỉnh node_id"""
+        if node_id not in self.nodes:
+            return []
+        incident = list(self._out[node_id].values())
+        if self._directed:
+            incident.extend(edge for neighbor, edge in self._in[node_id].items()
+                            if neighbor != node_id)
+        elif self._twins:
+            for edge in self._out[node_id].values():
+                twin = self._twins.get((edge.target, edge.source))
+                if twin is not None:
+                    incident.append(twin)
+        return incident
+    
+    @_writes
     def add_edge(self, from_node, to_node, weight=1):
         """Thêm cạnh vào đồ thị"""
-        if from_node in self.nodes and to_node in self.nodes:
-            # Kiểm tra cạnh đã tồn tại chưa
-            for edge in self.edges:
-                if edge['from'] == from_node and edge['to'] == to_node:
-                    return False  # Cạnh đã tồn tại
-                if not self.directed and edge['from'] == to_node and edge['to'] == from_node:
-                    return False  # Cạnh ngược đã tồn tại (đồ thị vô hướng)
-            
-            self.edges.append({'from': from_node, 'to': to_node, 'weight': weight})
-            return True
-        return False
+        edge = self._insert_edge(from_node, to_node, weight)
+        if edge is None:
+            return False
+        self._notify('edges_added', edges=[edge])
+        return True
     
+    @_writes
+    def add_edges_from(self, edges, weight=1):
+        """
+        Thêm nhiều cạnh trong một lượt
+        :param edges: Các bộ (from, to) hoặc (from, to, weight);
+                      với các mảng song song dùng zip(sources, targets, weights)
+        :param weight: Trọng số mặc định cho bộ (from, to)
+        :return: (số cạnh đã thêm, số phần tử bị loại - sai định dạng, thiếu đỉnh hoặc trùng)
+        """
+        added = []
+        rejected = 0
+        for item in edges:
+            try:
+                if len(item) == 2:
+                    from_node, to_node = item
+                    w = weight
+                else:
+                    from_node, to_node, w = item
+            except (TypeError, ValueError):
+                rejected += 1
+                continue
+            edge = self._insert_edge(from_node, to_node, w)
+            if edge is None:
+                rejected += 1
+            else:
+                added.append(edge)
+        if added:
+            self._notify('edges_added', edges=added)
+        return len(added), rejected
+    
+    def _insert_edge(self, from_node, to_node, weight):
+        """Thêm cạnh nếu hợp lệ, trả về bản ghi cạnh hoặc None"""
+        self._before_write()
+        out = self._out.get(from_node)
+        if out is None or to_node not in self.nodes:
+            return None
+        # Kiểm tra cạnh đã tồn tại chưa (vô hướng: chỉ mục chứa cả cạnh ngược)
+        if to_node in out:
+            return None
+        
+        edge = EdgeRecord(from_node, to_node, weight)
+        self._index_edge(edge)
+        self._edge_count += 1
+        return edge
+    
+    @_writes
     def remove_edge(self, from_node, to_node):
         """Xóa cạnh khỏi đồ thị"""
-        for i, edge in enumerate(self.edges):
-            if edge['from'] == from_node and edge['to'] == to_node:
-                self.edges.pop(i)
-                return True
-            if not self.directed and edge['from'] == to_node and edge['to'] == from_node:
-                self.edges.pop(i)
-                return True
-        return False
+        edge = self._delete_edge(from_node, to_node)
+        if edge is None:
+            return False
+        self._notify('edges_removed', edges=[edge])
+        return True
+    
+    @_writes
+    def remove_edges_from(self, pairs):
+        """
+        Xóa nhiều cạnh trong một lượt
+        :param pairs: Các bộ (from, to)
+        :return: (số cạnh đã xóa, số phần tử bị loại - sai định dạng hoặc không tồn tại)
+        """
+        removed = []
+        rejected = 0
+        for item in pairs:
+            try:
+                from_node, to_node = item[0], item[1]
+            except (TypeError, IndexError, KeyError):
+                rejected += 1
+                continue
+            edge = self._delete_edge(from_node, to_node)
+            if edge is None:
+                rejected += 1
+            else:
+                removed.append(edge)
+        if removed:
+            self._notify('edges_removed', edges=removed)
+        return len(removed), rejected
+    
+    def _delete_edge(self, from_node, to_node):
+        """Xóa cạnh nếu có, trả về bản ghi cạnh hoặc None"""
+        self._before_write()
+        edge = self.get_edge(from_node, to_node)
+        if edge is None:
+            return None
+        self._unindex_edge(edge)
+        self._edge_count -= 1
+        return edge
     
+    @_writes
+    def set_edge_weight(self, from_node, to_node, weight):
+        """
+        Đổi trọng số một cạnh. Bản ghi được thay mới (ảnh chụp cũ giữ trọng số cũ).
+        :return: True nếu cạnh tồn tại
+        """
+        self._before_write()
+        edge = self.get_edge(from_node, to_node)
+        if edge is None:
+            return False
+        u, v = edge.source, edge.target
+        updated = EdgeRecord(u, v, weight)
+        if self._content_sum is not None:
+            # Bỏ băm trọng số cũ, trọng số mới được cộng trong _notify
+            self._content_sum = (self._content_sum - self._hash_elements((), [edge])) & HASH_MASK
+        self._own(u)
+        self._own(v)
+        for index, a, b in ((self._out, u, v), (self._out, v, u), (self._in, v, u)):
+            neighbors = index.get(a)
+            if neighbors is not None and neighbors.get(b) is edge:
+                neighbors[b] = updated
+        self._notify('edges_updated', edges=[updated])
+        return True
+    
+    @_writes
+    def move_node(self, node_id, x, y):
+        """
+        Đổi tọa độ một đỉnh. Bản ghi được thay mới nên ảnh chụp cũ giữ nguyên tọa độ.
+        Ảnh chụp CSR chứa tọa độ (dùng cho heuristic A*) nên version vẫn tăng.
+        :return: True nếu đỉnh tồn tại
+        """
+        node = self.nodes.get(node_id)
+        if node is None:
+            return False
+        self._before_write()
+        self.nodes[node_id] = NodeRecord(x, y, node.label)
+        self._notify('nodes_moved', nodes=[node_id])
+        return True
+    
+    @_writes
+    def compact(self):
+        """
+        Đánh số lại các đỉnh thành 0..n-1 (giữ thứ tự id), lấp các lỗ do xóa đỉnh.
+        Nhãn mặc định (bằng id cũ) được đổi theo id mới.
+        :return: {id cũ: id mới}
+        """
+        self._before_write()
+        mapping = {old: new for new, old in enumerate(sorted(self.nodes))}
+        nodes = {}
+        for old, new in mapping.items():
+            node = self.nodes[old]
+            label = str(new) if node.label == str(old) else node.label
+            nodes[new] = NodeRecord(node.x, node.y, label)
+        edges = [EdgeRecord(mapping[edge.source], mapping[edge.target], edge.weight)
+                 for edge in self._iter_edges()]
+        self.nodes = nodes
+        self.node_counter = len(nodes)
+        self._rebuild_index(edges)
+        self._notify('reset')
+        return mapping
+    
+    @_reads
+    def get_edge(self, from_node, to_node):
+        """Lấy bản ghi cạnh (hoặc None), O(1)"""
+        out = self._out.get(from_node)
+        if out is None:
+            return None
+        return out.get(to_node)
+    
+    @_reads
     def get_neighbors(self, node_id):
         """Lấy danh sách láng giềng của một đỉnh"""
-        neighbors = []
-        for edge in self.edges:
-            if edge['from'] == node_id:
-                neighbors.append(edge['to'])
-            elif not self.directed and edge['to'] == node_id:
-                neighbors.append(edge['from'])
-        return neighbors
+        out = self._out.get(node_id)
+        if out is None:
+            return []
+        return list(out)
+    
+    @_reads
+    def get_in_neighbors(self, node_id):
+        """Lấy danh sách đỉnh có cạnh đi vào node_id"""
+        if not self._directed:
+            return self.get_neighbors(node_id)
+        return list(self._in.get(node_id, ()))
     
+    def incident_edges(self, node_id):
+        """Các cặp (láng giềng, cạnh) đi ra từ một đỉnh (view trực tiếp, xem read_locked())"""
+        return self._out[node_id].items()
+    
+    @_reads
     def get_edge_weight(self, from_node, to_node):
         """Lấy trọng số của cạnh"""
-        for edge in self.edges:
-            if edge['from'] == from_node and edge['to'] == to_node:
-                return edge['weight']
-            if not self.directed and edge['from'] == to_node and edge['to'] == from_node:
-                return edge['weight']
-        return None
+        edge = self.get_edge(from_node, to_node)
+        if edge is None:
+            return None
+        return edge['weight']
     
+    @_writes
     def clear(self):
         """Xóa toàn bộ đồ thị"""
+        self._before_write()
         self.nodes = {}
-        self.edges = []
+        self._out = {}
+        self._in = {}
+        self._twins = {}
+        self._owned = None
+        self._edge_count = 0
         self.node_counter = 0
+        self._notify('reset')
     
-    def get_adjacency_matrix(self):
-        """Chuyển đổi sang ma trận kề"""
-        n = len(self.nodes)
-        if n == 0:
-            return []
-        
-        # Tạo mapping từ node_id sang index
-        node_ids = sorted(self.nodes.keys())
-        id_to_index = {node_id: i for i, node_id in enumerate(node_ids)}
-        
-        # Khởi tạo ma trận
-        matrix = [[0] * n for _ in range(n)]
+    def _cached(self, key, build):
+        """
+        Trả về biểu diễn dẫn xuất đã lưu, chỉ dựng lại khi đồ thị đã đổi.
+        Kết quả được dùng chung giữa các lần gọi nên build() phải trả về dạng bất biến
+        (tuple, MappingProxyType, memoryview chỉ đọc, ndarray không ghi được).
+        """
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
+    
+    @_reads
+    def freeze(self):
+        """Tạo ảnh chụp CSR bất biến để chạy thuật toán"""
+        return self._cached('csr', lambda: CSRGraph(self))
+    
+    MATRIX_FORMATS = ('dense', 'numpy', 'coo', 'csr', 'rows')
+    
+    @_reads
+    def get_adjacency_matrix(self, fmt='dense'):
+        """
+        Chuyển đổi sang ma trận kề, trả về (ma trận, node_ids)
+        Các dạng được lưu lại giữa các lần gọi nên đều chỉ đọc; node_ids là tuple.
+        :param fmt: 'dense' - tuple các hàng (tuple) (mặc định)
+                    'numpy' - numpy.ndarray chỉ đọc, dtype int64 hoặc float64 theo trọng số
+                    'coo'   - (rows, cols, values): memoryview chỉ đọc, chỉ chứa ô khác 0
+                    'csr'   - (indptr, indices, data) dạng CSR (memoryview chỉ đọc),
+                              cột trong một hàng không sắp xếp
+                    'rows'  - iterator sinh lần lượt từng hàng (list), không giữ cả ma trận
+        """
+        if fmt == 'dense':
+            return self._cached('matrix', self._build_adjacency_matrix)
+        if fmt == 'numpy':
+            if np is None:
+                raise ImportError("Định dạng 'numpy' cần cài đặt NumPy")
+            return self._cached('matrix_numpy', self._build_numpy_matrix)
+        if fmt == 'coo':
+            return self._cached('matrix_coo', self._build_coo_matrix)
+        if fmt == 'csr':
+            return self._cached('matrix_csr', self._build_csr_matrix)
+        if fmt == 'rows':
+            # Lấy CSR ngay trong lúc giữ khóa: iterator chạy sau đó vẫn khớp với node_ids
+            (offsets, targets, values), node_ids = self.get_adjacency_matrix('csr')
+            return _iter_matrix_rows(offsets, targets, values), node_ids
+        raise ValueError(f"Định dạng ma trận không hợp lệ: {fmt}")
+    
+    def _matrix_values(self, csr):
+        """Giá trị từng ô khác 0: trọng số, hoặc 1 nếu đồ thị không trọng số"""
+        if self._weighted:
+            return csr.weights
+        return array('b', [1]) * len(csr.targets)
+    
+    def _build_adjacency_matrix(self):
+        csr = self.freeze()
+        if csr.n == 0:
+            return (), ()
         
-        # Điền giá trị
-        for edge in self.edges:
-            i = id_to_index[edge['from']]
-            j = id_to_index[edge['to']]
-            matrix[i][j] = edge['weight'] if self.weighted else 1
-            
-            if not self.directed:
-                matrix[j][i] = edge['weight'] if self.weighted else 1
+        # Chỉ số dày của CSR thay cho bảng id -> index
+        values = self._matrix_values(csr)
+        offsets, targets = csr.offsets, csr.targets
+        matrix = []
+        for i in range(csr.n):
+            row = [0] * csr.n
+            for k in range(offsets[i], offsets[i + 1]):
+                row[targets[k]] = values[k]
+            matrix.append(tuple(row))
         
+        return tuple(matrix), csr.node_ids
+    
+    def _build_numpy_matrix(self):
+        csr = self.freeze()
+        values = self._matrix_values(csr)
+        dtype = np.float64 if values.typecode == 'd' else np.int64
+        matrix = np.zeros((csr.n, csr.n), dtype=dtype)
+        (rows, cols, values), node_ids = self.get_adjacency_matrix('coo')
+        if len(cols):
+            matrix[np.asarray(rows), np.asarray(cols)] = np.asarray(values)
+        matrix.flags.writeable = False
         return matrix, node_ids
     
+    def _build_coo_matrix(self):
+        csr = self.freeze()
+        rows = array('i')
+        for i in range(csr.n):
+            rows.extend(array('i', [i]) * csr.degree(i))
+        return (_readonly(rows), _readonly(csr.targets),
+                _readonly(self._matrix_values(csr))), csr.node_ids
+    
+    def _build_csr_matrix(self):
+        csr = self.freeze()
+        return (_readonly(csr.offsets), _readonly(csr.targets),
+                _readonly(self._matrix_values(csr))), csr.node_ids
+    
+    @_reads
     def get_adjacency_list(self):
-        """Chuyển đổi sang danh sách kề"""
+        """Chuyển đổi sang danh sách kề (chỉ đọc): {node_id: tuple láng giềng}"""
+        return self._cached('adj_list', self._build_adjacency_list)
+    
+    def _build_adjacency_list(self):
         adj_list = {node_id: [] for node_id in self.nodes.keys()}
         
         for edge in self.edges:
@@ -119,32 +741,59 @@ class Graph:
                 info = (edge['from'], edge['weight']) if self.weighted else edge['from']
                 adj_list[edge['to']].append(info)
         
-        return adj_list
+        return MappingProxyType({node_id: tuple(neighbors) for node_id, neighbors in adj_list.items()})
     
+    @_reads
     def get_edge_list(self):
-        """Chuyển đổi sang danh sách cạnh"""
-        return [
+        """Chuyển đổi sang danh sách cạnh (tuple các bộ (from, to, weight))"""
+        return self._cached('edge_list', lambda: tuple(
             (edge['from'], edge['to'], edge['weight']) 
             for edge in self.edges
-        ]
+        ))
     
+    @_reads
+    def get_degree_table(self):
+        """Bảng bậc {node_id: (bậc ra, bậc vào)}; vô hướng thì hai giá trị bằng nhau"""
+        return self._cached('degrees', self._build_degree_table)
+    
+    def _build_degree_table(self):
+        if self._directed:
+            return MappingProxyType({node_id: (len(self._out[node_id]), len(self._in[node_id]))
+                                     for node_id in self.nodes})
+        return MappingProxyType({node_id: (len(out), len(out)) for node_id, out in self._out.items()})
+    
+    @_reads
     def to_dict(self):
         """Xuất đồ thị sang dictionary"""
         return {
-            'nodes': self.nodes.copy(),
-            'edges': self.edges.copy(),
+            'nodes': {node_id: node.to_dict() for node_id, node in self.nodes.items()},
+            'edges': [edge.to_dict() for edge in self._iter_edges()],
             'directed': self.directed,
             'weighted': self.weighted,
             'node_counter': self.node_counter
         }
     
+    @_writes
     def from_dict(self, data):
         """Nhập đồ thị từ dictionary"""
-        self.nodes = data['nodes'].copy()
-        self.edges = data['edges'].copy()
-        self.directed = data['directed']
-        self.weighted = data['weighted']
+        self._before_write()
+        # JSON biến khóa số thành chuỗi nên cần chuyển lại về int
+        self.nodes = {
+            int(node_id): NodeRecord(node['x'], node['y'], node['label'])
+            for node_id, node in data['nodes'].items()
+        }
+        self._directed = data['directed']
+        self._weighted = data['weighted']
         self.node_counter = data['node_counter']
+        # Giữ nguyên các cạnh như khi lưu, kể cả cặp (u, v)/(v, u) còn lại sau khi
+        # chuyển có hướng -> vô hướng: _rebuild_index chọn cạnh đại diện như khi đổi loại
+        edges = {}
+        for edge in data['edges']:
+            u, v = edge['from'], edge['to']
+            if u in self.nodes and v in self.nodes and (u, v) not in edges:
+                edges[(u, v)] = EdgeRecord(u, v, edge['weight'])
+        self._rebuild_index(edges.values())
+        self._notify('reset')
     
     def get_node_count(self):
         """Đếm số đỉnh"""
@@ -152,4 +801,4 @@ class Graph:
     
     def get_edge_count(self):
         """Đếm số cạnh"""
-        return len(self.edges)
+        return self._edge_count
@@ -0,0 +1,425 @@
+"""
+incremental.py - Các bộ theo dõi gia tăng gắn với Graph
+
+Mỗi bộ theo dõi đăng ký một listener với đồ thị và cập nhật kết quả của mình
+sau mỗi thay đổi, nên kết quả đọc được ngay (O(1)) thay vì chạy lại thuật toán.
+Lấy qua Graph.track(kind), vd graph.track('mst').
+"""
+
+import threading
+from collections import deque
+
+from algorithms import GraphAlgorithms
+from components import weak_components
+
+
+class DynamicMST:
+    """
+    Rừng khung nhỏ nhất được duy trì khi thêm/xóa/đổi trọng số cạnh (đồ thị vô hướng).
+    - Thêm cạnh (u, v): nếu u, v đã cùng cây thì so với cạnh nặng nhất trên đường
+      u -> v trong cây, nhẹ hơn thì thay (tính chất chu trình).
+    - Xóa cạnh của cây: tìm cạnh nhẹ nhất nối lại hai phía của lát cắt, duyệt
+      từ phía nhỏ hơn.
+    edges và weight luôn phản ánh đồ thị hiện tại. Đồ thị có hướng: rừng rỗng.
+    """
+
+    def __init__(self, graph):
+        """
+        :param graph: Đồ thị cần theo dõi
+        """
+        self.graph = graph
+        self._rebuild()
+        graph.add_listener(self._on_change)
+
+    def detach(self):
+        """Ngừng theo dõi đồ thị"""
+        self.graph.remove_listener(self._on_change)
+
+    def as_list(self):
+        """Các cạnh của rừng dạng (u, v, w) như kết quả của prim/kruskal"""
+        return [(edge.source, edge.target, edge.weight) for edge in self.edges.values()]
+
+    def _rebuild(self):
+        self.edges = {}  # {(from, to): EdgeRecord} - các cạnh của rừng khung
+        self.weight = 0  # Tổng trọng số rừng khung
+        self._adj = {node_id: {} for node_id in self.graph.nodes}
+        if self.graph.directed:
+            return
+        mst_edges, _ = GraphAlgorithms.kruskal(self.graph)
+        for u, v, _ in mst_edges:
+            self._link(self.graph.get_edge(u, v))
+
+    def _on_change(self, event, data):
+        if event == 'reset':
+            self._rebuild()
+            return
+        if event == 'nodes_added':
+            for node_id in data['nodes']:
+                self._adj[node_id] = {}
+            return
+        if self.graph.directed:
+            return
+
+        if event == 'edges_added':
+            for edge in data['edges']:
+                self._insert(edge)
+        elif event == 'edges_updated':
+            for edge in data['edges']:
+                old = self.edges.get((edge.source, edge.target))
+                if old is None:
+                    self._insert(edge)
+                elif edge.weight <= old.weight:
+                    # Cạnh của cây nhẹ đi: cây vẫn nhỏ nhất
+                    self._cut(old)
+                    self._link(edge)
+                else:
+                    self._delete([old])
+        elif event == 'edges_removed':
+            self._delete(data['edges'])
+        elif event == 'nodes_removed':
+            self._delete(data['edges'], data['nodes'])
+
+    def _link(self, edge):
+        u, v = edge.source, edge.target
+        self._adj[u][v] = edge
+        self._adj[v][u] = edge
+        self.edges[(u, v)] = edge
+        self.weight += edge.weight
+
+    def _cut(self, edge):
+        u, v = edge.source, edge.target
+        del self._adj[u][v]
+        del self._adj[v][u]
+        del self.edges[(u, v)]
+        self.weight -= edge.weight
+
+    def _insert(self, edge):
+        u, v = edge.source, edge.target
+        if u == v or self.graph.get_edge(u, v) is not edge:
+            return
+        path = self._tree_path(u, v)
+        if path is None:
+            self._link(edge)
+            return
+        heaviest = max(path, key=lambda e: e.weight)
+        if edge.weight < heaviest.weight:
+            self._cut(heaviest)
+            self._link(edge)
+
+    def _delete(self, edges, removed_nodes=()):
+        """Cắt các cạnh cây bị xóa, bỏ các đỉnh bị xóa rồi nối lại từng mảnh"""
+        cut = []
+        twins = []
+        for edge in edges:
+            if self.edges.get((edge.source, edge.target)) is edge:
+                self._cut(edge)
+                cut.append(edge)
+            # Cạnh ngược song song (nếu có) được đưa lên làm cạnh đại diện:
+            # coi như cạnh mới thêm, xử lý sau khi đã nối lại
+            twin = self.graph.get_edge(edge.source, edge.target)
+            if twin is not None and twin is not edge:
+                twins.append(twin)
+        for node_id in removed_nodes:
+            del self._adj[node_id]
+
+        skip = {id(twin) for twin in twins}
+        if len(cut) == 1 and cut[0].source in self._adj and cut[0].target in self._adj:
+            # Một lát cắt: chỉ cần duyệt phía nhỏ hơn
+            self._reconnect(self._smaller_side(cut[0].source, cut[0].target), skip)
+        else:
+            for edge in cut:
+                for end in (edge.source, edge.target):
+                    if end in self._adj:
+                        while self._reconnect(self._component(end), skip):
+                            pass
+        for twin in twins:
+            self._insert(twin)
+
+    def _reconnect(self, side, skip):
+        """
+        Thêm cạnh nhẹ nhất đi ra khỏi tập đỉnh side (nếu có); trả về True nếu đã thêm
+        :param skip: id các cạnh bỏ qua
+        """
+        best = None
+        for node_id in side:
+            for neighbor, edge in self.graph.incident_edges(node_id):
+                if (neighbor not in side and (best is None or edge.weight < best.weight)
+                        and id(edge) not in skip):
+                    best = edge
+        if best is None:
+            return False
+        self._link(best)
+        return True
+
+    def _component(self, start):
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            for neighbor in self._adj[queue.popleft()]:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    queue.append(neighbor)
+        return seen
+
+    def _smaller_side(self, a, b):
+        """Duyệt xen kẽ hai cây chứa a và b, trả về tập đỉnh của cây duyệt xong trước"""
+        sides = [({a}, deque([a])), ({b}, deque([b]))]
+        turn = 0
+        while True:
+            seen, queue = sides[turn]
+            if not queue:
+                return seen
+            for neighbor in self._adj[queue.popleft()]:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    queue.append(neighbor)
+            turn ^= 1
+
+    def _tree_path(self, u, v):
+        """Các cạnh trên đường u -> v trong rừng, None nếu khác cây"""
+        parent = {u: None}
+        queue = deque([u])
+        while queue and v not in parent:
+            x = queue.popleft()
+            for neighbor, edge in self._adj[x].items():
+                if neighbor not in parent:
+                    parent[neighbor] = edge
+                    queue.append(neighbor)
+        if v not in parent:
+            return None
+        path = []
+        x = v
+        while parent[x] is not None:
+            edge = parent[x]
+            path.append(edge)
+            x = edge.source if edge.target == x else edge.target
+        return path
+
+
+class BipartiteTracker:
+    """
+    Theo dõi tính 2 phía bằng union-find có chẵn lẻ: mỗi đỉnh lưu độ lệch màu so
+    với cha. Thêm cạnh (u, v) khác tập thì hợp sao cho u, v khác màu; cùng tập mà
+    cùng màu thì có chu trình lẻ. Thêm cạnh gần như O(1); xóa cạnh/đỉnh chỉ đánh
+    dấu để dựng lại khi đọc. Đồ thị có hướng được xét như vô hướng.
+    """
+
+    def __init__(self, graph):
+        """
+        :param graph: Đồ thị cần theo dõi
+        """
+        self.graph = graph
+        self._lock = threading.Lock()
+        self._rebuild()
+        graph.add_listener(self._on_change)
+
+    def detach(self):
+        """Ngừng theo dõi đồ thị"""
+        self.graph.remove_listener(self._on_change)
+
+    @property
+    def is_bipartite(self):
+        self._refresh()
+        return self._conflict is None
+
+    def coloring(self):
+        """Màu 0/1 của mỗi đỉnh (hợp lệ khi là đồ thị 2 phía)"""
+        self._refresh()
+        return {node_id: self._find(node_id)[1] for node_id in self._parent}
+
+    def odd_cycle(self):
+        """Một chu trình lẻ (danh sách id, đỉnh đầu lặp lại ở cuối), None nếu là đồ thị 2 phía"""
+        self._refresh()
+        if self._conflict is None:
+            return None
+        u, v = self._conflict
+        if u == v:
+            return [u, u]
+        # Đường u -> v trong rừng các cạnh đã dùng để hợp tập (độ dài chẵn) + cạnh (v, u)
+        previous = {u: None}
+        queue = deque([u])
+        while v not in previous:
+            x = queue.popleft()
+            for neighbor in self._forest[x]:
+                if neighbor not in previous:
+                    previous[neighbor] = x
+                    queue.append(neighbor)
+        path = [v]
+        while previous[path[-1]] is not None:
+            path.append(previous[path[-1]])
+        path.reverse()
+        return path + [u]
+
+    def _refresh(self):
+        if self._dirty:
+            with self._lock, self.graph.read_locked():
+                if self._dirty:
+                    self._rebuild()
+
+    def _rebuild(self):
+        self._parent = {node_id: node_id for node_id in self.graph.nodes}
+        self._parity = dict.fromkeys(self.graph.nodes, 0)  # Lệch màu so với cha
+        self._rank = dict.fromkeys(self.graph.nodes, 0)
+        self._forest = {node_id: [] for node_id in self.graph.nodes}
+        self._conflict = None  # Cạnh đầu tiên tạo chu trình lẻ
+        for edge in self.graph.edges:
+            self._add(edge.source, edge.target)
+        self._dirty = False
+
+    def _on_change(self, event, data):
+        if self._dirty:
+            return
+        if event == 'nodes_added':
+            for node_id in data['nodes']:
+                self._parent[node_id] = node_id
+                self._parity[node_id] = 0
+                self._rank[node_id] = 0
+                self._forest[node_id] = []
+        elif event == 'edges_added':
+            for edge in data['edges']:
+                self._add(edge.source, edge.target)
+        elif event in ('edges_removed', 'nodes_removed', 'reset'):
+            self._dirty = True
+
+    def _find(self, x):
+        """(gốc, màu của x so với gốc), nén nửa đường và cộng dồn chẵn lẻ"""
+        parent, parity = self._parent, self._parity
+        color = 0
+        while parent[x] != x:
+            up = parent[x]
+            if parent[up] != up:
+                parity[x] ^= parity[up]
+                parent[x] = parent[up]
+            color ^= parity[x]
+            x = parent[x]
+        return x, color
+
+    def _add(self, u, v):
+        (ru, cu), (rv, cv) = self._find(u), self._find(v)
+        if ru == rv:
+            if cu == cv and self._conflict is None:
+                self._conflict = (u, v)
+            return
+        if self._rank[ru] < self._rank[rv]:
+            ru, rv = rv, ru
+        self._parent[rv] = ru
+        self._parity[rv] = cu ^ cv ^ 1
+        if self._rank[ru] == self._rank[rv]:
+            self._rank[ru] += 1
+        self._forest[u].append(v)
+        self._forest[v].append(u)
+
+
+class ComponentTracker:
+    """
+    Thành phần liên thông được duy trì bằng union-find trên id đỉnh (có hướng:
+    liên thông yếu). Thêm cạnh chỉ là một phép hợp; xóa cạnh/đỉnh đánh dấu để
+    dựng lại khi đọc từ nhãn BFS trên ảnh chụp CSR. Đọc nhãn gần như O(1).
+    """
+
+    def __init__(self, graph):
+        """
+        :param graph: Đồ thị cần theo dõi
+        """
+        self.graph = graph
+        self._lock = threading.Lock()
+        self._dirty = True
+        self._refresh()
+        graph.add_listener(self._on_change)
+
+    def detach(self):
+        """Ngừng theo dõi đồ thị"""
+        self.graph.remove_listener(self._on_change)
+
+    @property
+    def count(self):
+        """Số thành phần liên thông"""
+        self._refresh()
+        return self._count
+
+    def component(self, node_id):
+        """Id đại diện của thành phần chứa đỉnh (None nếu không có đỉnh)"""
+        self._refresh()
+        if node_id not in self._parent:
+            return None
+        return self._find(node_id)
+
+    def connected(self, u, v):
+        """Hai đỉnh có cùng thành phần hay không"""
+        self._refresh()
+        if u not in self._parent or v not in self._parent:
+            return False
+        return self._find(u) == self._find(v)
+
+    def labels(self):
+        """{id đỉnh: id đại diện thành phần}"""
+        self._refresh()
+        return {node_id: self._find(node_id) for node_id in self._parent}
+
+    def components(self):
+        """Danh sách các thành phần, mỗi thành phần là danh sách id đỉnh"""
+        groups = {}
+        for node_id, root in self.labels().items():
+            groups.setdefault(root, []).append(node_id)
+        return list(groups.values())
+
+    def _refresh(self):
+        if self._dirty:
+            with self._lock, self.graph.read_locked():
+                if self._dirty:
+                    self._rebuild()
+
+    def _rebuild(self):
+        csr = self.graph.freeze()
+        labels, self._count = weak_components(csr)
+        # Đỉnh đầu tiên của mỗi thành phần làm gốc, các đỉnh khác trỏ thẳng vào gốc
+        roots = [None] * self._count
+        self._parent = {}
+        for i, node_id in enumerate(csr.node_ids):
+            if roots[labels[i]] is None:
+                roots[labels[i]] = node_id
+            self._parent[node_id] = roots[labels[i]]
+        self._size = dict.fromkeys(roots, 0)
+        for i in range(csr.n):
+            self._size[roots[labels[i]]] += 1
+        self._dirty = False
+
+    def _on_change(self, event, data):
+        if self._dirty:
+            return
+        if event == 'nodes_added':
+            for node_id in data['nodes']:
+                self._parent[node_id] = node_id
+                self._size[node_id] = 1
+            self._count += len(data['nodes'])
+        elif event == 'edges_added':
+            for edge in data['edges']:
+                self._union(edge.source, edge.target)
+        elif event in ('edges_removed', 'nodes_removed', 'reset'):
+            self._dirty = True
+
+    def _find(self, x):
+        parent = self._parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def _union(self, u, v):
+        ru, rv = self._find(u), self._find(v)
+        if ru == rv:
+            return
+        # Hợp theo kích thước
+        if self._size[ru] < self._size[rv]:
+            ru, rv = rv, ru
+        self._parent[rv] = ru
+        self._size[ru] += self._size.pop(rv)
+        self._count -= 1
+
+
+# Các loại bộ theo dõi cho Graph.track()
+TRACKERS = {
+    'mst': DynamicMST,
+    'bipartite': BipartiteTracker,
+    'components': ComponentTracker,
+}
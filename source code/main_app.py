@@ -4,30 +4,54 @@ main_app.py - Controller chính của ứng dụng
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, simpledialog
+import argparse
 import json
 import math
-import time
+import os
+import sqlite3
 
 from graph import Graph
-from algorithms import GraphAlgorithms
 from canvas_view import GraphCanvas
+from result_cache import ResultCache, CODE_VERSION
+from result_store import ResultStore
+from steps import StepRunner, Finished
 from ui_components import Sidebar, Toolbar, StatusBar, InfoPanel, InputDialog
 
 
 class GraphVisualizerApp:
     """Ứng dụng trực quan hóa đồ thị"""
     
-    def __init__(self, root):
+    # Trên ngưỡng số đỉnh này ma trận kề được hiển thị ở dạng thưa
+    SPARSE_MATRIX_THRESHOLD = 100
+    
+    def __init__(self, root, results_path=None):
+        """
+        :param results_path: Tệp SQLite lưu kết quả tốn kém xuống đĩa (None: chỉ đệm trong bộ nhớ)
+        """
         self.root = root
         self.root.title("Graph Visualizer - Python Tkinter")
         self.root.geometry("1400x800")
         
         # Graph và state
         self.graph = Graph()
+        # Kết quả thuật toán theo version đồ thị, bấm lại nút không phải tính lại;
+        # nếu có results_path, kết quả tốn kém còn được lưu xuống đĩa để dùng lại
+        # khi mở lại đồ thị
+        store = None
+        if results_path:
+            try:
+                store = ResultStore(results_path, CODE_VERSION)
+            except (OSError, sqlite3.Error):
+                store = None  # Không ghi được tệp: chỉ đệm trong bộ nhớ
+        self.results = ResultCache(store=store)
         self.mode = 'add_node'
         self.selected_node = None
         self.animation_speed = 500
         self.is_animating = False
+        self.steps = None  # StepRunner của hoạt ảnh đang chạy (xem animate())
+        self.run_graph = None  # Ảnh chụp mà thuật toán đang/vừa chạy trên đó (xem run_algorithm())
+        self.paused = False
+        self._after_id = None
         
         # Setup UI
         self.setup_styles()
@@ -184,8 +208,9 @@ class GraphVisualizerApp:
         
         elif self.mode == 'remove_node':
             if clicked_node is not None:
+                incident = self.graph.get_incident_edges(clicked_node)
                 self.graph.remove_node(clicked_node)
-                self.canvas.draw_all()
+                self.canvas.erase_node(clicked_node, incident)
                 self.update_counts()
                 self.update_status(f"Đã xóa đỉnh {clicked_node}")
         
@@ -213,6 +238,15 @@ class GraphVisualizerApp:
             self.update_counts()
             self.update_status("Đã xóa toàn bộ đồ thị")
     
+    def compact_graph(self):
+        """Đánh số lại các đỉnh thành 0..n-1"""
+        mapping = self.graph.compact()
+        changed = sum(1 for old, new in mapping.items() if old != new)
+        self.selected_node = None
+        self.canvas.reset_colors()
+        self.update_counts()
+        self.update_status(f"Đã đánh số lại {changed} đỉnh")
+    
     def generate_random_graph(self):
         """Tạo đồ thị ngẫu nhiên"""
         dialog = InputDialog(self.root, "Tạo đồ thị ngẫu nhiên", [
@@ -232,28 +266,32 @@ class GraphVisualizerApp:
                 cx, cy = self.canvas.get_canvas_center()
                 radius = min(self.canvas.winfo_width(), self.canvas.winfo_height()) // 2 - 100
                 
-                for i in range(num_nodes):
-                    angle = 2 * math.pi * i / num_nodes
-                    x = cx + radius * math.cos(angle)
-                    y = cy + radius * math.sin(angle)
-                    self.graph.add_node(x, y)
+                self.graph.add_nodes_from(
+                    (cx + radius * math.cos(2 * math.pi * i / num_nodes),
+                     cy + radius * math.sin(2 * math.pi * i / num_nodes))
+                    for i in range(num_nodes)
+                )
                 
-                # Tạo các cạnh ngẫu nhiên
+                # Tạo các cạnh ngẫu nhiên theo từng lô
                 import random
                 added_edges = 0
                 max_attempts = num_edges * 10
                 attempts = 0
                 
                 while added_edges < num_edges and attempts < max_attempts:
-                    from_node = random.randint(0, num_nodes - 1)
-                    to_node = random.randint(0, num_nodes - 1)
-                    
-                    if from_node != to_node:
-                        weight = random.randint(1, 10) if self.graph.weighted else 1
-                        if self.graph.add_edge(from_node, to_node, weight):
-                            added_edges += 1
+                    batch = []
+                    for _ in range(min(num_edges - added_edges, max_attempts - attempts)):
+                        from_node = random.randint(0, num_nodes - 1)
+                        to_node = random.randint(0, num_nodes - 1)
+                        
+                        if from_node != to_node:
+                            weight = random.randint(1, 10) if self.graph.weighted else 1
+                            batch.append((from_node, to_node, weight))
+                        
+                        attempts += 1
                     
-                    attempts += 1
+                    added, _ = self.graph.add_edges_from(batch)
+                    added_edges += added
                 
                 self.canvas.draw_all()
                 self.update_counts()
@@ -262,99 +300,221 @@ class GraphVisualizerApp:
             except ValueError:
                 messagebox.showerror("Lỗi", "Vui lòng nhập số hợp lệ!")
     
+    def animate(self, runner, render, finish, pace=1.0):
+        """
+        Chạy hoạt ảnh bằng root.after: mỗi nhịp lấy một bước từ runner (StepRunner)
+        và vẽ bằng render(step); hết bước thì gọi finish(result). Giao diện không bị
+        chặn trong lúc chạy, điều khiển bằng các nút dừng/từng bước/tua nhanh.
+        :param pace: Hệ số nhân thời gian giữa hai bước
+        """
+        self.stop_animation()
+        self.steps = runner
+        self._render = render
+        self._finish = finish
+        self._pace = pace
+        self.paused = False
+        self.is_animating = True
+        self._tick()
+    
+    def _tick(self):
+        self._after_id = None
+        if self.steps is None or self.paused:
+            return
+        self._advance()
+        if self.steps is not None:
+            delay = int(self.animation_speed * self._pace)
+            self._after_id = self.root.after(delay, self._tick)
+    
+    def _advance(self):
+        """Lấy và vẽ một bước; bước cuối thì kết thúc hoạt ảnh"""
+        try:
+            step = next(self.steps)
+        except Exception:
+            self.stop_animation()
+            raise
+        if isinstance(step, Finished):
+            self._end(step.result)
+        elif self._render is not None:
+            self._render(step)
+    
+    def _end(self, result):
+        finish = self._finish
+        self.steps = None
+        self.is_animating = False
+        finish(result)
+    
+    def pause_animation(self):
+        """Tạm dừng / tiếp tục hoạt ảnh"""
+        if self.steps is None:
+            return
+        self.paused = not self.paused
+        if self.paused:
+            if self._after_id is not None:
+                self.root.after_cancel(self._after_id)
+                self._after_id = None
+            self.update_status("Đã tạm dừng - bấm Từng bước hoặc Dừng/Tiếp")
+        else:
+            self._tick()
+    
+    def step_animation(self):
+        """Đi đúng một bước (hoạt ảnh chuyển sang tạm dừng)"""
+        if self.steps is None:
+            return
+        if not self.paused:
+            self.pause_animation()
+        self._advance()
+    
+    def fast_forward_animation(self):
+        """Chạy nốt thuật toán, vẽ các bước còn lại một lần"""
+        if self.steps is None:
+            return
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        try:
+            remaining = self.steps.drain()
+        except Exception:
+            self.stop_animation()
+            raise
+        if self._render is not None:
+            with self.canvas.batch():
+                for step in remaining:
+                    self._render(step)
+        self._end(self.steps.result)
+    
+    def stop_animation(self):
+        """Bỏ dở hoạt ảnh đang chạy (nếu có)"""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        if self.steps is not None:
+            self.steps.close()
+            self.steps = None
+        self.paused = False
+        self.is_animating = False
+    
+    def run_algorithm(self, name, *args, render=None, finish=None, pace=1.0, **kwargs):
+        """
+        Chạy GraphAlgorithms.<name> (qua bộ đệm kết quả) dưới dạng hoạt ảnh. Luồng
+        thuật toán chạy trên ảnh chụp nên đồ thị vẫn sửa được trong lúc chạy, kể cả
+        khi hoạt ảnh đã bị dừng mà thuật toán còn chạy nốt ở nền.
+        """
+        self.run_graph = self.graph.snapshot()
+        runner = StepRunner(self.results.run, self.run_graph, name, *args, **kwargs)
+        self.animate(runner, render, finish, pace)
+    
+    def _color_edge(self, edge, color_key):
+        """Tô một cạnh của ảnh chụp đã chạy, bỏ qua nếu cạnh không còn trên đồ thị"""
+        if self.graph.get_edge(edge['from'], edge['to']) is not None:
+            self.canvas.set_edge_color(edge['from'], edge['to'], color_key)
+    
     def run_bfs(self):
         """Chạy thuật toán BFS"""
         try:
             start = int(self.sidebar.start_node_var.get())
-            if start not in self.graph.nodes:
-                messagebox.showerror("Lỗi", "Đỉnh bắt đầu không tồn tại!")
-                return
-            
-            self.is_animating = True
-            self.canvas.reset_colors()
-            
-            def callback(node_id, state):
-                if state == 'visiting':
-                    self.canvas.set_node_color(node_id, 'node_visiting')
-                elif state == 'queued':
-                    self.canvas.set_node_color(node_id, 'node_selected')
-                elif state == 'visited':
-                    self.canvas.set_node_color(node_id, 'node_visited')
-                self.root.update()
-                time.sleep(self.animation_speed / 1000)
-            
-            order = GraphAlgorithms.bfs(self.graph, start, callback)
-            self.update_status(f"BFS hoàn thành: {' → '.join(map(str, order))}")
-            messagebox.showinfo("BFS", f"Thứ tự duyệt:\n{' → '.join(map(str, order))}")
-            
         except ValueError:
             messagebox.showerror("Lỗi", "Vui lòng nhập đỉnh hợp lệ!")
-        finally:
-            self.is_animating = False
+            return
+        if start not in self.graph.nodes:
+            messagebox.showerror("Lỗi", "Đỉnh bắt đầu không tồn tại!")
+            return
+        
+        self.canvas.reset_colors()
+        
+        def render(step):
+            if step.state == 'visiting':
+                self.canvas.set_node_color(step.node, 'node_visiting')
+            elif step.state == 'queued':
+                self.canvas.set_node_color(step.node, 'node_selected')
+            elif step.state == 'visited':
+                self.canvas.set_node_color(step.node, 'node_visited')
+        
+        def finish(order):
+            self.update_status(f"BFS hoàn thành: {' → '.join(map(str, order))}")
+            messagebox.showinfo("BFS", f"Thứ tự duyệt:\n{' → '.join(map(str, order))}")
+        
+        self.run_algorithm('bfs', start, render=render, finish=finish)
     
     def run_dfs(self):
         """Chạy thuật toán DFS"""
         try:
             start = int(self.sidebar.start_node_var.get())
-            if start not in self.graph.nodes:
-                messagebox.showerror("Lỗi", "Đỉnh bắt đầu không tồn tại!")
-                return
-            
-            self.is_animating = True
-            self.canvas.reset_colors()
+        except ValueError:
+            messagebox.showerror("Lỗi", "Vui lòng nhập đỉnh hợp lệ!")
+            return
+        if start not in self.graph.nodes:
+            messagebox.showerror("Lỗi", "Đỉnh bắt đầu không tồn tại!")
+            return
+        
+        self.canvas.reset_colors()
+        
+        def render(step):
+            if step.state == 'visiting':
+                self.canvas.set_node_color(step.node, 'node_visiting')
+            elif step.state == 'visited':
+                self.canvas.set_node_color(step.node, 'node_visited')
+        
+        def finish(result):
+            order = result.order
             
-            def callback(node_id, state):
-                if state == 'visiting':
-                    self.canvas.set_node_color(node_id, 'node_visiting')
-                elif state == 'visited':
-                    self.canvas.set_node_color(node_id, 'node_visited')
-                self.root.update()
-                time.sleep(self.animation_speed / 1000)
+            names = {'tree': 'cây', 'back': 'ngược', 'forward': 'xuôi', 'cross': 'ngang'}
+            counts = {}
+            for kind in result.edge_types.values():
+                counts[kind] = counts.get(kind, 0) + 1
+            summary = ", ".join(f"{names[kind]}: {counts[kind]}" for kind in names if kind in counts)
             
-            order = GraphAlgorithms.dfs(self.graph, start, callback)
             self.update_status(f"DFS hoàn thành: {' → '.join(map(str, order))}")
-            messagebox.showinfo("DFS", f"Thứ tự duyệt:\n{' → '.join(map(str, order))}")
-            
-        except ValueError:
-            messagebox.showerror("Lỗi", "Vui lòng nhập đỉnh hợp lệ!")
-        finally:
-            self.is_animating = False
+            messagebox.showinfo("DFS", f"Thứ tự duyệt:\n{' → '.join(map(str, order))}\n\n"
+                                       f"Phân loại cạnh: {summary if summary else '(không có)'}")
+        
+        self.run_algorithm('dfs_tree', start, render=render, finish=finish)
     
     def run_dijkstra(self):
         """Chạy thuật toán Dijkstra"""
+        self.run_shortest_path("Dijkstra", 'dijkstra')
+    
+    def run_astar(self):
+        """Chạy thuật toán A* (heuristic theo tọa độ đỉnh)"""
+        self.run_shortest_path("A*", 'astar')
+    
+    def run_bidirectional_dijkstra(self):
+        """Chạy Dijkstra hai chiều"""
+        self.run_shortest_path("Dijkstra hai chiều", 'bidirectional_dijkstra')
+    
+    def run_shortest_path(self, title, algorithm):
+        """
+        Chạy một thuật toán đường đi ngắn nhất có cùng callback với Dijkstra
+        :param algorithm: Tên phương thức của GraphAlgorithms
+        """
         try:
             source = int(self.sidebar.source_node_var.get())
             target = int(self.sidebar.target_node_var.get())
-            
-            if source not in self.graph.nodes or target not in self.graph.nodes:
-                messagebox.showerror("Lỗi", "Đỉnh không tồn tại!")
-                return
-            
-            self.is_animating = True
-            self.canvas.reset_colors()
-            
-            def callback(node_id, state, distance):
-                if state == 'visiting':
-                    self.canvas.set_node_color(node_id, 'node_visiting')
-                elif state == 'visited':
-                    self.canvas.set_node_color(node_id, 'node_visited')
-                self.root.update()
-                time.sleep(self.animation_speed / 1000)
-            
-            path, distance = GraphAlgorithms.dijkstra(self.graph, source, target, callback)
-            
+        except ValueError:
+            messagebox.showerror("Lỗi", "Vui lòng nhập đỉnh hợp lệ!")
+            return
+        if source not in self.graph.nodes or target not in self.graph.nodes:
+            messagebox.showerror("Lỗi", "Đỉnh không tồn tại!")
+            return
+        
+        self.canvas.reset_colors()
+        
+        def render(step):
+            if step.state == 'visiting':
+                self.canvas.set_node_color(step.node, 'node_visiting')
+            elif step.state == 'visited':
+                self.canvas.set_node_color(step.node, 'node_visited')
+        
+        def finish(result):
+            path, distance = result
             if path:
                 self.canvas.highlight_path(path)
                 self.update_status(f"Đường đi ngắn nhất: {' → '.join(map(str, path))}, độ dài: {distance}")
-                messagebox.showinfo("Dijkstra", 
+                messagebox.showinfo(title, 
                                   f"Đường đi ngắn nhất:\n{' → '.join(map(str, path))}\n\nĐộ dài: {distance}")
             else:
-                messagebox.showinfo("Dijkstra", "Không có đường đi!")
-            
-        except ValueError:
-            messagebox.showerror("Lỗi", "Vui lòng nhập đỉnh hợp lệ!")
-        finally:
-            self.is_animating = False
+                messagebox.showinfo(title, "Không có đường đi!")
+        
+        self.run_algorithm(algorithm, source, target, render=render, finish=finish)
     
     def check_bipartite(self):
         """Kiểm tra đồ thị 2 phía"""
@@ -362,31 +522,54 @@ class GraphVisualizerApp:
             messagebox.showwarning("Cảnh báo", "Đồ thị rỗng!")
             return
         
-        self.is_animating = True
         self.canvas.reset_colors()
         
-        def callback(node_id, state, color):
-            if state == 'visiting':
-                color_key = 'node_bipartite_0' if color == 0 else 'node_bipartite_1'
-                self.canvas.set_node_color(node_id, color_key)
-            elif state == 'colored':
-                color_key = 'node_bipartite_0' if color == 0 else 'node_bipartite_1'
-                self.canvas.set_node_color(node_id, color_key)
-            elif state == 'conflict':
-                self.canvas.set_node_color(node_id, 'node_conflict')
-            self.root.update()
-            time.sleep(self.animation_speed / 1000)
-        
-        is_bipartite, coloring = GraphAlgorithms.check_bipartite(self.graph, callback)
-        
-        if is_bipartite:
-            messagebox.showinfo("Kết quả", "Đây LÀ đồ thị 2 phía!")
-            self.update_status("Đồ thị 2 phía - Các tập được tô màu xanh và tím")
-        else:
-            messagebox.showinfo("Kết quả", "Đây KHÔNG PHẢI là đồ thị 2 phía!")
-            self.update_status("Không phải đồ thị 2 phía - Các đỉnh đỏ vi phạm")
+        def render(step):
+            if step.state in ('visiting', 'colored'):
+                color_key = 'node_bipartite_0' if step.value == 0 else 'node_bipartite_1'
+                self.canvas.set_node_color(step.node, color_key)
+            elif step.state == 'conflict':
+                self.canvas.set_node_color(step.node, 'node_conflict')
+        
+        def finish(result):
+            is_bipartite, coloring, odd_cycle = result
+            if is_bipartite:
+                messagebox.showinfo("Kết quả", "Đây LÀ đồ thị 2 phía!")
+                self.update_status("Đồ thị 2 phía - Các tập được tô màu xanh và tím")
+            else:
+                # Tô chu trình lẻ làm bằng chứng; cạnh lấy từ ảnh chụp đã chạy vì đồ thị
+                # có thể đã bị sửa trong lúc chạy hoạt ảnh
+                graph = self.run_graph
+                for u, v in zip(odd_cycle, odd_cycle[1:]):
+                    self.canvas.set_node_color(u, 'node_conflict')
+                    # Đồ thị có hướng: chu trình có thể đi ngược chiều cạnh
+                    edge = graph.get_edge(u, v) or graph.get_edge(v, u)
+                    self._color_edge(edge, 'edge_rejected')
+                messagebox.showinfo("Kết quả", "Đây KHÔNG PHẢI là đồ thị 2 phía!\n\n"
+                                    f"Chu trình lẻ: {' → '.join(map(str, odd_cycle))}")
+                self.update_status("Không phải đồ thị 2 phía - Chu trình lẻ được tô đỏ")
+        
+        self.run_algorithm('check_bipartite', render=render, finish=finish, witness=True)
+    
+    def show_components(self):
+        """Tô màu các thành phần liên thông (đồ thị có hướng: liên thông mạnh)"""
+        if len(self.graph.nodes) == 0:
+            messagebox.showwarning("Cảnh báo", "Đồ thị rỗng!")
+            return
         
-        self.is_animating = False
+        # color_components tự xóa màu cũ; lần tô lại chỉ cập nhật đỉnh đổi thành phần
+        if self.graph.directed:
+            labels = self.results.run(self.graph, 'component_labels', strong=True)
+            kind = "liên thông mạnh"
+        else:
+            # Bộ theo dõi giữ nhãn qua các lần sửa đồ thị, lần sau không phải duyệt lại
+            labels = self.graph.track('components').labels()
+            kind = "liên thông"
+        self.canvas.color_components(labels)
+        
+        count = len(set(labels.values()))
+        self.update_status(f"{count} thành phần {kind} - mỗi thành phần một màu")
+        messagebox.showinfo("Kết quả", f"Đồ thị có {count} thành phần {kind}.")
     
     def run_prim(self):
         """Chạy thuật toán Prim"""
@@ -398,23 +581,23 @@ class GraphVisualizerApp:
             messagebox.showwarning("Cảnh báo", "Đồ thị rỗng!")
             return
         
-        self.is_animating = True
         self.canvas.reset_colors()
         
-        def callback(node_id, state, from_node, to_node, weight):
-            if state == 'added':
-                self.canvas.set_node_color(node_id, 'node_visiting')
-                self.canvas.set_edge_color(from_node, to_node, 'edge_mst')
-                self.root.update()
-                time.sleep(self.animation_speed / 1000)
-        
-        mst_edges, total_weight = GraphAlgorithms.prim(self.graph, callback)
-        
-        messagebox.showinfo("Prim's Algorithm",
-                          f"Cây khung nhỏ nhất\n\nSố cạnh: {len(mst_edges)}\nTổng trọng số: {total_weight}")
-        self.update_status(f"Prim hoàn thành - Tổng trọng số: {total_weight}")
-        
-        self.is_animating = False
+        def render(step):
+            if step.state == 'added':
+                self.canvas.set_node_color(step.node, 'node_visiting')
+                self.canvas.set_edge_color(step.source, step.target, 'edge_mst')
+        
+        def finish(result):
+            mst_edges, total_weight = result
+            # Đồ thị không liên thông: mỗi thành phần một cây
+            trees = len(self.run_graph.nodes) - len(mst_edges)
+            title = "Cây khung nhỏ nhất" if trees == 1 else f"Rừng khung nhỏ nhất ({trees} cây)"
+            messagebox.showinfo("Prim's Algorithm",
+                              f"{title}\n\nSố cạnh: {len(mst_edges)}\nTổng trọng số: {total_weight}")
+            self.update_status(f"Prim hoàn thành - Tổng trọng số: {total_weight}")
+        
+        self.run_algorithm('prim', render=render, finish=finish)
     
     def run_kruskal(self):
         """Chạy thuật toán Kruskal"""
@@ -426,28 +609,25 @@ class GraphVisualizerApp:
             messagebox.showwarning("Cảnh báo", "Đồ thị rỗng!")
             return
         
-        self.is_animating = True
         self.canvas.reset_colors()
         
-        def callback(node_id, state, from_node, to_node, weight):
-            if state == 'checking':
-                self.canvas.set_edge_color(from_node, to_node, 'node_visiting')
-            elif state == 'added':
-                self.canvas.set_edge_color(from_node, to_node, 'edge_mst')
-                self.canvas.set_node_color(from_node, 'node_visiting')
-                self.canvas.set_node_color(to_node, 'node_visiting')
-            elif state == 'rejected':
-                self.canvas.set_edge_color(from_node, to_node, 'edge_rejected')
-            self.root.update()
-            time.sleep(self.animation_speed / 1000)
-        
-        mst_edges, total_weight = GraphAlgorithms.kruskal(self.graph, callback)
-        
-        messagebox.showinfo("Kruskal's Algorithm",
-                          f"Cây khung nhỏ nhất\n\nSố cạnh: {len(mst_edges)}\nTổng trọng số: {total_weight}")
-        self.update_status(f"Kruskal hoàn thành - Tổng trọng số: {total_weight}")
-        
-        self.is_animating = False
+        def render(step):
+            if step.state == 'checking':
+                self.canvas.set_edge_color(step.source, step.target, 'node_visiting')
+            elif step.state == 'added':
+                self.canvas.set_edge_color(step.source, step.target, 'edge_mst')
+                self.canvas.set_node_color(step.source, 'node_visiting')
+                self.canvas.set_node_color(step.target, 'node_visiting')
+            elif step.state == 'rejected':
+                self.canvas.set_edge_color(step.source, step.target, 'edge_rejected')
+        
+        def finish(result):
+            mst_edges, total_weight = result
+            messagebox.showinfo("Kruskal's Algorithm",
+                              f"Cây khung nhỏ nhất\n\nSố cạnh: {len(mst_edges)}\nTổng trọng số: {total_weight}")
+            self.update_status(f"Kruskal hoàn thành - Tổng trọng số: {total_weight}")
+        
+        self.run_algorithm('kruskal', render=render, finish=finish)
     
     def run_ford_fulkerson(self):
         """Chạy thuật toán Ford-Fulkerson"""
@@ -461,36 +641,44 @@ class GraphVisualizerApp:
         ])
         self.root.wait_window(dialog)
         
-        if dialog.result:
-            try:
-                source = int(dialog.result['source'])
-                sink = int(dialog.result['sink'])
-                
-                if source not in self.graph.nodes or sink not in self.graph.nodes:
-                    messagebox.showerror("Lỗi", "Đỉnh không tồn tại!")
-                    return
-                
-                self.is_animating = True
+        if not dialog.result:
+            return
+        try:
+            source = int(dialog.result['source'])
+            sink = int(dialog.result['sink'])
+        except ValueError:
+            messagebox.showerror("Lỗi", "Vui lòng nhập số hợp lệ!")
+            return
+        if source not in self.graph.nodes or sink not in self.graph.nodes:
+            messagebox.showerror("Lỗi", "Đỉnh không tồn tại!")
+            return
+        
+        self.canvas.reset_colors()
+        
+        def render(step):
+            if step.state == 'path_found':
+                # Mỗi bước chỉ tô đường tăng luồng hiện tại
+                with self.canvas.batch():
+                    self.canvas.reset_colors()
+                    for i in range(len(step.path) - 1):
+                        self.canvas.set_edge_color(step.path[i], step.path[i+1], 'edge_selected')
+        
+        def finish(result):
+            max_flow = result.value
+            
+            # Tô các cạnh của lát cắt nhỏ nhất
+            with self.canvas.batch():
                 self.canvas.reset_colors()
-                
-                def callback(path, state, flow, iterations):
-                    if state == 'path_found':
-                        for i in range(len(path) - 1):
-                            self.canvas.set_edge_color(path[i], path[i+1], 'edge_selected')
-                        self.root.update()
-                        time.sleep(self.animation_speed / 1000)
-                        self.canvas.reset_colors()
-                
-                max_flow = GraphAlgorithms.ford_fulkerson(self.graph, source, sink, callback)
-                
-                messagebox.showinfo("Ford-Fulkerson",
-                                  f"Luồng cực đại: {max_flow}")
-                self.update_status(f"Ford-Fulkerson hoàn thành - Luồng cực đại: {max_flow}")
-                
-            except ValueError:
-                messagebox.showerror("Lỗi", "Vui lòng nhập số hợp lệ!")
-            finally:
-                self.is_animating = False
+                for from_node, to_node in result.cut_edges:
+                    self.canvas.set_edge_color(from_node, to_node, 'edge_selected')
+            cut = ", ".join(f"{u}→{v}" for u, v in result.cut_edges)
+            
+            messagebox.showinfo("Ford-Fulkerson",
+                              f"Luồng cực đại: {max_flow}\n"
+                              f"Lát cắt nhỏ nhất: {cut if cut else '(rỗng)'}")
+            self.update_status(f"Ford-Fulkerson hoàn thành - Luồng cực đại: {max_flow}")
+        
+        self.run_algorithm('max_flow', source, sink, render=render, finish=finish)
     
     def run_fleury(self):
         """Chạy thuật toán Fleury"""
@@ -498,70 +686,84 @@ class GraphVisualizerApp:
             messagebox.showwarning("Cảnh báo", "Thuật toán Fleury chỉ áp dụng cho đồ thị vô hướng!")
             return
         
-        self.is_animating = True
         self.canvas.reset_colors()
         
-        def callback(circuit, state, edge):
-            if state == 'edge_added':
-                self.canvas.set_edge_color(edge['from'], edge['to'], 'edge_selected')
-                self.root.update()
-                time.sleep(self.animation_speed / 1000)
-        
-        circuit = GraphAlgorithms.fleury(self.graph, callback)
-        
-        if circuit:
-            self.canvas.highlight_path(circuit)
-            messagebox.showinfo("Fleury's Algorithm",
-                              f"Chu trình Euler:\n{' → '.join(map(str, circuit))}")
-            self.update_status(f"Fleury hoàn thành - Tìm thấy chu trình Euler")
-        else:
-            messagebox.showinfo("Fleury's Algorithm",
-                              "Đồ thị không có chu trình Euler!\n(Cần tất cả đỉnh có bậc chẵn)")
-            self.update_status("Không có chu trình Euler")
+        def render(step):
+            if step.state == 'edge_added':
+                self._color_edge(step.value, 'edge_selected')
+        
+        def finish(circuit):
+            if circuit:
+                kind = "Chu trình Euler" if circuit[0] == circuit[-1] else "Đường đi Euler"
+                self.canvas.highlight_path(circuit)
+                messagebox.showinfo("Fleury's Algorithm",
+                                  f"{kind}:\n{' → '.join(map(str, circuit))}")
+                self.update_status(f"Fleury hoàn thành - Tìm thấy {kind.lower()}")
+            else:
+                messagebox.showinfo("Fleury's Algorithm",
+                                  "Đồ thị không có chu trình hay đường đi Euler!\n"
+                                  "(Cần 0 hoặc 2 đỉnh bậc lẻ, các cạnh phải liên thông)")
+                self.update_status("Không có chu trình/đường đi Euler")
         
-        self.is_animating = False
+        self.run_algorithm('fleury', render=render, finish=finish, allow_path=True)
     
     def run_hierholzer(self):
         """Chạy thuật toán Hierholzer"""
-        if self.graph.directed or len(self.graph.nodes) == 0:
-            messagebox.showwarning("Cảnh báo", "Thuật toán Hierholzer chỉ áp dụng cho đồ thị vô hướng!")
+        if len(self.graph.nodes) == 0:
+            messagebox.showwarning("Cảnh báo", "Đồ thị rỗng!")
             return
         
-        self.is_animating = True
         self.canvas.reset_colors()
         
-        def callback(data, state):
-            self.root.update()
-            time.sleep(self.animation_speed / 2000)
-        
-        circuit = GraphAlgorithms.hierholzer(self.graph, callback)
-        
-        if circuit:
-            self.canvas.highlight_path(circuit)
-            messagebox.showinfo("Hierholzer's Algorithm",
-                              f"Chu trình Euler:\n{' → '.join(map(str, circuit))}")
-            self.update_status(f"Hierholzer hoàn thành - Tìm thấy chu trình Euler")
-        else:
-            messagebox.showinfo("Hierholzer's Algorithm",
-                              "Đồ thị không có chu trình Euler!\n(Cần tất cả đỉnh có bậc chẵn)")
-            self.update_status("Không có chu trình Euler")
+        def render(step):
+            # Đỉnh đang nằm trên đường đi dở / đã được nối vào chu trình
+            if step.state == 'exploring':
+                self.canvas.set_node_color(step.node, 'node_visiting')
+            elif step.state == 'backtrack':
+                self.canvas.set_node_color(step.node, 'node_visited')
+        
+        def finish(circuit):
+            if circuit:
+                kind = "Chu trình Euler" if circuit[0] == circuit[-1] else "Đường đi Euler"
+                self.canvas.highlight_path(circuit)
+                messagebox.showinfo("Hierholzer's Algorithm",
+                                  f"{kind}:\n{' → '.join(map(str, circuit))}")
+                self.update_status(f"Hierholzer hoàn thành - Tìm thấy {kind.lower()}")
+            else:
+                if self.run_graph.directed:
+                    condition = "Cần bậc vào = bậc ra (lệch nhau tối đa ở 2 đỉnh)"
+                else:
+                    condition = "Cần 0 hoặc 2 đỉnh bậc lẻ"
+                messagebox.showinfo("Hierholzer's Algorithm",
+                                  f"Đồ thị không có chu trình hay đường đi Euler!\n"
+                                  f"({condition}, các cạnh phải liên thông)")
+                self.update_status("Không có chu trình/đường đi Euler")
         
-        self.is_animating = False
+        self.run_algorithm('hierholzer', render=render, finish=finish, pace=0.5, allow_path=True)
     
     def show_representation(self, rep_type):
         """Hiển thị biểu diễn đồ thị"""
         content = ""
         
         if rep_type == 'matrix':
-            matrix, node_ids = self.graph.get_adjacency_matrix()
-            if not matrix:
+            if self.graph.get_node_count() == 0:
                 messagebox.showinfo("Ma trận kề", "Đồ thị rỗng!")
                 return
             
-            content = "MA TRẬN KỀ\n\n"
-            content += "    " + "  ".join(str(i).rjust(2) for i in node_ids) + "\n"
-            for i, row in enumerate(matrix):
-                content += f"{node_ids[i]:2d} [{' '.join(str(v).rjust(2) for v in row)}]\n"
+            if self.graph.get_node_count() > self.SPARSE_MATRIX_THRESHOLD:
+                # Đồ thị lớn: chỉ liệt kê các ô khác 0 theo từng hàng (dạng CSR)
+                (indptr, indices, data), node_ids = self.graph.get_adjacency_matrix('csr')
+                content = f"MA TRẬN KỀ (thưa, {len(node_ids)}x{len(node_ids)})\n\n"
+                for i, node_id in enumerate(node_ids):
+                    cells = ", ".join(f"[{node_ids[indices[k]]}]={data[k]}"
+                                      for k in range(indptr[i], indptr[i + 1]))
+                    content += f"{node_id}: {cells if cells else '(rỗng)'}\n"
+            else:
+                matrix, node_ids = self.graph.get_adjacency_matrix()
+                content = "MA TRẬN KỀ\n\n"
+                content += "    " + "  ".join(str(i).rjust(2) for i in node_ids) + "\n"
+                for i, row in enumerate(matrix):
+                    content += f"{node_ids[i]:2d} [{' '.join(str(v).rjust(2) for v in row)}]\n"
         
         elif rep_type == 'list':
             adj_list = self.graph.get_adjacency_list()
@@ -592,6 +794,32 @@ class GraphVisualizerApp:
                 else:
                     content += f"{from_node} {arrow} {to_node}\n"
         
+        elif rep_type == 'distances':
+            if self.graph.get_node_count() == 0:
+                messagebox.showinfo("Bảng khoảng cách", "Đồ thị rỗng!")
+                return
+            
+            result = self.results.run(self.graph, 'all_pairs_shortest_paths')
+            node_ids = result.node_ids
+            
+            def fmt(d):
+                return "∞" if d == float('inf') else f"{d:g}"
+            
+            if len(node_ids) > self.SPARSE_MATRIX_THRESHOLD:
+                # Đồ thị lớn: chỉ liệt kê các đỉnh tới được từ mỗi đỉnh
+                content = f"BẢNG KHOẢNG CÁCH ({len(node_ids)} đỉnh, {result.backend})\n\n"
+                for i, node_id in enumerate(node_ids):
+                    row = result.dist[i]
+                    cells = ", ".join(f"{node_ids[j]}={fmt(row[j])}"
+                                      for j in range(len(node_ids))
+                                      if j != i and row[j] != float('inf'))
+                    content += f"{node_id}: {cells if cells else '(rỗng)'}\n"
+            else:
+                content = f"BẢNG KHOẢNG CÁCH ({result.backend})\n\n"
+                content += "    " + "  ".join(str(i).rjust(3) for i in node_ids) + "\n"
+                for i, row in enumerate(result.dist):
+                    content += f"{node_ids[i]:2d} [{' '.join(fmt(d).rjust(4) for d in row)}]\n"
+        
         InfoPanel(self.root, f"Biểu diễn đồ thị - {rep_type}", content)
     
     def save_graph(self):
@@ -626,7 +854,13 @@ class GraphVisualizerApp:
                 self.canvas.draw_all()
                 self.update_counts()
                 messagebox.showinfo("Thành công", "Đã tải đồ thị!")
-                self.update_status(f"Đã tải: {filename}")
+                stored = 0
+                if self.results.store is not None:
+                    stored = self.results.store.count(self.graph.content_hash)
+                if stored:
+                    self.update_status(f"Đã tải: {filename} ({stored} kết quả đã tính sẵn)")
+                else:
+                    self.update_status(f"Đã tải: {filename}")
             except Exception as e:
                 messagebox.showerror("Lỗi", f"Không thể tải file: {str(e)}")
     
@@ -683,7 +917,7 @@ class GraphVisualizerApp:
     
     def reset_visualization(self):
         """Reset trực quan hóa"""
-        self.is_animating = False
+        self.stop_animation()
         self.canvas.reset_colors()
         self.update_status("Đã reset")
     
@@ -704,8 +938,15 @@ class GraphVisualizerApp:
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Graph Visualizer")
+    parser.add_argument('--results-db', metavar='PATH',
+                        default=os.environ.get('GRAPH_VISUALIZER_RESULTS'),
+                        help="Tệp SQLite lưu kết quả tốn kém giữa các lần chạy "
+                             "(mặc định: biến môi trường GRAPH_VISUALIZER_RESULTS, không đặt thì không lưu)")
+    args = parser.parse_args()
+    
     root = tk.Tk()
-    app = GraphVisualizerApp(root)
+    app = GraphVisualizerApp(root, results_path=args.results_db)
     root.mainloop()
 
 
@@ -0,0 +1,371 @@
+"""
+max_flow.py - Luồng cực đại trên mạng thặng dư dạng mảng
+
+Mỗi cạnh e sinh hai cung thặng dư 2e (thuận) và 2e + 1 (ngược), nên cung
+đối của a là a ^ 1. Hai thuật toán:
+- 'dinic': đồ thị phân tầng + luồng chặn, mỗi đường tăng luồng được báo qua callback.
+- 'push_relabel': đẩy-dán nhãn theo nhãn cao nhất, có heuristic khoảng trống (gap);
+  luồng thu được được phân rã thành các đường để báo qua callback.
+"""
+
+from array import array
+from collections import deque
+
+
+class MaxFlowResult:
+    """
+    Kết quả luồng cực đại:
+    - value: giá trị luồng
+    - edge_flows: {(u, v): luồng} theo chiều luồng chảy (vô hướng có thể là (to, from))
+    - source_side / sink_side: hai phía của lát cắt nhỏ nhất (tập id đỉnh)
+    - cut_edges: các cạnh (u, v) đi từ source_side sang sink_side
+    """
+
+    def __init__(self, value, edge_flows, source_side, sink_side, cut_edges):
+        self.value = value
+        self.edge_flows = edge_flows
+        self.source_side = source_side
+        self.sink_side = sink_side
+        self.cut_edges = cut_edges
+
+    def __repr__(self):
+        return f"MaxFlowResult(value={self.value!r}, cut_edges={self.cut_edges!r})"
+
+
+class ResidualNetwork:
+    """Mạng thặng dư dựng từ ảnh chụp CSR: head/cap theo cung, cung ra của đỉnh theo CSR"""
+
+    def __init__(self, csr):
+        n = csr.n
+        num_edges = csr.edge_count
+        head = array('i', [0]) * (2 * num_edges)
+        cap = [0] * (2 * num_edges)
+        degree = [0] * (n + 1)
+        for e in range(num_edges):
+            u, v = csr.edge_from[e], csr.edge_to[e]
+            w = max(csr.edge_weight[e], 0)
+            head[2 * e] = v
+            head[2 * e + 1] = u
+            if u != v:
+                cap[2 * e] = w
+                # Cạnh vô hướng cho luồng đi cả hai chiều
+                cap[2 * e + 1] = 0 if csr.directed else w
+                degree[u + 1] += 1
+                degree[v + 1] += 1
+        for i in range(n):
+            degree[i + 1] += degree[i]
+
+        offsets = array('i', degree)
+        arcs = array('i', [0]) * degree[n]
+        position = degree[:-1]
+        for e in range(num_edges):
+            u, v = csr.edge_from[e], csr.edge_to[e]
+            if u != v:
+                arcs[position[u]] = 2 * e
+                position[u] += 1
+                arcs[position[v]] = 2 * e + 1
+                position[v] += 1
+
+        self.csr = csr
+        self.n = n
+        self.head = head
+        self.cap = cap
+        self.capacity = list(cap)
+        self.offsets = offsets
+        self.arcs = arcs
+
+    def reachable(self, s):
+        """Các đỉnh tới được từ s qua cung còn dư (phía nguồn của lát cắt)"""
+        head, cap, offsets, arcs = self.head, self.cap, self.offsets, self.arcs
+        seen = bytearray(self.n)
+        seen[s] = 1
+        queue = deque([s])
+        while queue:
+            u = queue.popleft()
+            for k in range(offsets[u], offsets[u + 1]):
+                a = arcs[k]
+                v = head[a]
+                if cap[a] > 0 and not seen[v]:
+                    seen[v] = 1
+                    queue.append(v)
+        return seen
+
+    def result(self, s, value):
+        csr, cap, capacity = self.csr, self.cap, self.capacity
+        ids = csr.node_ids
+        edge_flows = {}
+        for e in range(csr.edge_count):
+            u, v = ids[csr.edge_from[e]], ids[csr.edge_to[e]]
+            flow = capacity[2 * e] - cap[2 * e]
+            if flow < 0:
+                edge_flows[(v, u)] = -flow
+            else:
+                edge_flows[(u, v)] = flow
+
+        side = self.reachable(s)
+        cut_edges = []
+        for e in range(csr.edge_count):
+            a, b = csr.edge_from[e], csr.edge_to[e]
+            if side[a] and not side[b] and capacity[2 * e] > 0:
+                cut_edges.append((ids[a], ids[b]))
+            elif side[b] and not side[a] and capacity[2 * e + 1] > 0:
+                cut_edges.append((ids[b], ids[a]))
+        return MaxFlowResult(
+            value, edge_flows,
+            {ids[i] for i in range(self.n) if side[i]},
+            {ids[i] for i in range(self.n) if not side[i]},
+            cut_edges
+        )
+
+    def path_ids(self, s, path_arcs):
+        ids, head = self.csr.node_ids, self.head
+        return [ids[s]] + [ids[head[a]] for a in path_arcs]
+
+
+def dinic(net, s, t, on_path=None):
+    """
+    Dinic: BFS dựng đồ thị phân tầng, rồi tìm luồng chặn bằng DFS không đệ quy
+    với con trỏ cung hiện tại cho mỗi đỉnh.
+    :param on_path: Hàm gọi với (danh sách cung, lượng luồng) mỗi lần tăng luồng
+    """
+    n, head, cap, offsets, arcs = net.n, net.head, net.cap, net.offsets, net.arcs
+    value = 0
+
+    while True:
+        level = [-1] * n
+        level[s] = 0
+        queue = deque([s])
+        while queue and level[t] < 0:
+            u = queue.popleft()
+            for k in range(offsets[u], offsets[u + 1]):
+                a = arcs[k]
+                v = head[a]
+                if cap[a] > 0 and level[v] < 0:
+                    level[v] = level[u] + 1
+                    queue.append(v)
+        if level[t] < 0:
+            return value
+
+        current = list(offsets[:-1])
+        stack = []  # Các cung trên đường đang đi từ s
+        u = s
+        while True:
+            if u == t:
+                flow = min(cap[a] for a in stack)
+                for a in stack:
+                    cap[a] -= flow
+                    cap[a ^ 1] += flow
+                value += flow
+                if on_path:
+                    on_path(stack, flow)
+                # Lùi về đầu cung bão hòa đầu tiên
+                for i, a in enumerate(stack):
+                    if cap[a] == 0:
+                        del stack[i:]
+                        break
+                u = head[stack[-1]] if stack else s
+                continue
+
+            end = offsets[u + 1]
+            k = current[u]
+            while k < end:
+                a = arcs[k]
+                if cap[a] > 0 and level[head[a]] == level[u] + 1:
+                    break
+                k += 1
+            current[u] = k
+
+            if k < end:
+                stack.append(arcs[k])
+                u = head[arcs[k]]
+            elif u == s:
+                break
+            else:
+                # Ngõ cụt: bỏ đỉnh khỏi tầng và bỏ qua cung vừa đi
+                level[u] = -1
+                stack.pop()
+                u = head[stack[-1]] if stack else s
+                current[u] += 1
+
+
+def push_relabel(net, s, t):
+    """
+    Đẩy-dán nhãn theo nhãn cao nhất với heuristic khoảng trống.
+    Nhãn ban đầu là khoảng cách tới t (BFS ngược); đỉnh có nhãn >= n
+    đẩy phần dư trở về s nên kết quả cuối là một luồng hợp lệ.
+    """
+    n, head, cap, offsets, arcs = net.n, net.head, net.cap, net.offsets, net.arcs
+    height = [n] * n
+    height[t] = 0
+    queue = deque([t])
+    while queue:
+        v = queue.popleft()
+        for k in range(offsets[v], offsets[v + 1]):
+            a = arcs[k]
+            u = head[a]
+            # u -> v còn dư khi cung đối của a còn dư
+            if cap[a ^ 1] > 0 and height[u] == n and u != t:
+                height[u] = height[v] + 1
+                queue.append(u)
+    height[s] = n
+
+    count = [0] * (2 * n + 1)
+    for h in height:
+        count[h] += 1
+    excess = [0] * n
+    buckets = [[] for _ in range(2 * n + 1)]  # Đỉnh còn dư theo nhãn
+    active = bytearray(n)
+    highest = 0
+
+    def activate(v):
+        nonlocal highest
+        if not active[v] and v != s and v != t:
+            active[v] = 1
+            buckets[height[v]].append(v)
+            if height[v] > highest:
+                highest = height[v]
+
+    for k in range(offsets[s], offsets[s + 1]):
+        a = arcs[k]
+        if cap[a] > 0:
+            v = head[a]
+            flow = cap[a]
+            cap[a] = 0
+            cap[a ^ 1] += flow
+            excess[v] += flow
+            excess[s] -= flow
+            activate(v)
+
+    current = list(offsets[:-1])
+    while True:
+        while highest >= 0 and not buckets[highest]:
+            highest -= 1
+        if highest < 0:
+            break
+        u = buckets[highest].pop()
+        active[u] = 0
+
+        # Xả hết phần dư của u
+        while excess[u] > 0:
+            k = current[u]
+            if k == offsets[u + 1]:
+                old = height[u]
+                new = 2 * n
+                for j in range(offsets[u], offsets[u + 1]):
+                    a = arcs[j]
+                    if cap[a] > 0 and height[head[a]] + 1 < new:
+                        new = height[head[a]] + 1
+                count[old] -= 1
+                height[u] = new
+                count[new] += 1
+                current[u] = offsets[u]
+                if count[old] == 0 and old < n:
+                    # Khoảng trống: các đỉnh nhãn trên old (dưới n) không còn tới được t
+                    for v in range(n):
+                        if old < height[v] < n and v != s:
+                            count[height[v]] -= 1
+                            height[v] = n + 1
+                            count[n + 1] += 1
+                            if active[v]:
+                                buckets[n + 1].append(v)
+                                highest = max(highest, n + 1)
+                    if old < height[u] < n:
+                        count[height[u]] -= 1
+                        height[u] = n + 1
+                        count[n + 1] += 1
+                    # Dọn các thùng cũ (đỉnh trong đó đã đổi nhãn)
+                    for h in range(old + 1, n):
+                        buckets[h].clear()
+                if height[u] >= 2 * n:
+                    break
+                continue
+
+            a = arcs[k]
+            v = head[a]
+            if cap[a] > 0 and height[u] == height[v] + 1:
+                flow = excess[u] if excess[u] < cap[a] else cap[a]
+                cap[a] -= flow
+                cap[a ^ 1] += flow
+                excess[u] -= flow
+                excess[v] += flow
+                activate(v)
+            else:
+                current[u] = k + 1
+
+        if excess[u] > 0 and height[u] < 2 * n:
+            activate(u)
+        if height[u] > highest and active[u]:
+            highest = height[u]
+
+    return excess[t]
+
+
+def decompose_paths(net, s, t):
+    """Phân rã luồng hiện có trên mạng thành các đường s -> t: [(danh sách cung, lượng)]"""
+    head, cap, capacity, offsets, arcs = net.head, net.cap, net.capacity, net.offsets, net.arcs
+    n = net.n
+    remaining = [capacity[a] - cap[a] for a in range(len(cap))]
+    paths = []
+    while True:
+        # DFS theo các cung còn luồng dương
+        parent_arc = [-1] * n
+        seen = bytearray(n)
+        seen[s] = 1
+        stack = [s]
+        while stack and not seen[t]:
+            u = stack.pop()
+            for k in range(offsets[u], offsets[u + 1]):
+                a = arcs[k]
+                v = head[a]
+                if remaining[a] > 0 and not seen[v]:
+                    seen[v] = 1
+                    parent_arc[v] = a
+                    stack.append(v)
+        if not seen[t]:
+            return paths
+
+        path = []
+        v = t
+        while v != s:
+            a = parent_arc[v]
+            path.append(a)
+            v = head[a ^ 1]
+        path.reverse()
+        flow = min(remaining[a] for a in path)
+        for a in path:
+            remaining[a] -= flow
+            remaining[a ^ 1] += flow
+        paths.append((path, flow))
+
+
+METHODS = ('dinic', 'push_relabel')
+
+
+def max_flow(csr, s, t, method='dinic', callback=None):
+    """
+    Luồng cực đại từ chỉ số s tới chỉ số t trên ảnh chụp CSR
+    :param method: 'dinic' hoặc 'push_relabel'
+    :param callback: callback(path, 'path_found', flow, iterations) với path là danh sách id
+    """
+    if method not in METHODS:
+        raise ValueError(f"Thuật toán không hợp lệ: {method}")
+
+    net = ResidualNetwork(csr)
+    if s == t:
+        return net.result(s, 0)
+
+    iterations = [0]
+
+    def on_path(path_arcs, flow):
+        iterations[0] += 1
+        callback(net.path_ids(s, path_arcs), 'path_found', flow, iterations[0])
+
+    if method == 'dinic':
+        value = dinic(net, s, t, on_path if callback else None)
+    else:
+        value = push_relabel(net, s, t)
+        if callback:
+            for path_arcs, flow in decompose_paths(net, s, t):
+                on_path(path_arcs, flow)
+
+    return net.result(s, value)
@@ -0,0 +1,98 @@
+"""
+records.py - Bản ghi đỉnh/cạnh gọn nhẹ (__slots__) nhưng dùng được như dict
+"""
+
+import sys
+
+
+class _Record:
+    """
+    Lớp cơ sở: lưu trường bằng __slots__, đọc được bằng record['key']
+    để canvas và phần lưu JSON vẫn dùng như dict cũ. Bản ghi chỉ đọc: muốn
+    đổi thì Graph thay bằng bản ghi mới.
+    """
+
+    __slots__ = ()
+    _KEYS = ()    # Khóa kiểu dict, vd 'from'
+    _FIELDS = {}  # Khóa dict -> tên slot
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, self._FIELDS[key])
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        # Bản ghi có thể dùng chung với ảnh chụp và đã được băm vào content_hash:
+        # sửa tại chỗ sẽ bỏ qua version, bộ đệm và listener của Graph
+        raise TypeError(f"Bản ghi chỉ đọc, không gán được '{key}': "
+                        "dùng Graph.move_node / Graph.set_edge_weight")
+
+    def __contains__(self, key):
+        return key in self._FIELDS
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self):
+        return len(self._KEYS)
+
+    def __eq__(self, other):
+        if isinstance(other, (_Record, dict)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def get(self, key, default=None):
+        if key in self._FIELDS:
+            return self[key]
+        return default
+
+    def keys(self):
+        return list(self._KEYS)
+
+    def values(self):
+        return [self[key] for key in self._KEYS]
+
+    def items(self):
+        return [(key, self[key]) for key in self._KEYS]
+
+    def to_dict(self):
+        """Chuyển về dict thường (dùng khi lưu JSON)"""
+        return dict(self.items())
+
+
+class NodeRecord(_Record):
+    """Đỉnh: {'x', 'y', 'label'}"""
+
+    __slots__ = ('x', 'y', 'label')
+    _KEYS = ('x', 'y', 'label')
+    _FIELDS = {'x': 'x', 'y': 'y', 'label': 'label'}
+
+    def __init__(self, x, y, label):
+        self.x = x
+        self.y = y
+        self.label = sys.intern(label) if isinstance(label, str) else label
+
+    def copy(self):
+        return NodeRecord(self.x, self.y, self.label)
+
+
+class EdgeRecord(_Record):
+    """Cạnh: {'from', 'to', 'weight'}"""
+
+    __slots__ = ('source', 'target', 'weight')
+    _KEYS = ('from', 'to', 'weight')
+    _FIELDS = {'from': 'source', 'to': 'target', 'weight': 'weight'}
+
+    def __init__(self, source, target, weight):
+        self.source = source
+        self.target = target
+        self.weight = weight
+
+    def copy(self):
+        return EdgeRecord(self.source, self.target, self.weight)
@@ -0,0 +1,230 @@
+"""
+result_cache.py - Bộ đệm kết quả cho GraphAlgorithms
+
+Khóa là (đồ thị, version, tên thuật toán, tham số) nên kết quả chỉ dùng lại khi
+đồ thị chưa đổi; mỗi lần đồ thị thay đổi các mục của nó bị bỏ ngay để trả bộ nhớ.
+Bộ đệm giới hạn theo số mục và theo tổng dung lượng ước lượng, bỏ mục lâu không
+dùng nhất (LRU). Các sự kiện callback được ghi lại khi tính và phát lại khi
+lấy từ bộ đệm, nên hoạt ảnh trên giao diện vẫn chạy như lần đầu.
+Nếu có ResultStore, kết quả của các thuật toán tốn kém (PERSISTENT) còn được
+lưu xuống đĩa theo Graph.content_hash để dùng lại khi mở lại đồ thị; kho cần được
+mở với CODE_VERSION để không dùng lại kết quả của mã thuật toán cũ.
+"""
+
+import hashlib
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from functools import partial
+
+import algorithms
+import all_pairs
+import components
+import csr_graph
+import max_flow
+from algorithms import GraphAlgorithms
+from csr_graph import CSRGraph
+
+# Số kết quả tối đa giữ lại
+MAX_ENTRIES = 64
+# Tổng dung lượng ước lượng tối đa (byte)
+MAX_BYTES = 64 * 1024 * 1024
+# Các thuật toán tốn kém có kết quả được lưu xuống ResultStore (không phụ thuộc tọa độ đỉnh)
+PERSISTENT = frozenset({
+    'all_pairs_shortest_paths', 'max_flow', 'ford_fulkerson', 'component_labels',
+})
+
+
+def _code_version(modules):
+    """Băm mã nguồn các module tạo ra kết quả: sửa thuật toán là ra phiên bản mới"""
+    digest = hashlib.blake2b(digest_size=8)
+    for module in modules:
+        with open(module.__file__, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+# Phiên bản mã của các kết quả lưu xuống đĩa (xem ResultStore)
+CODE_VERSION = _code_version((algorithms, all_pairs, components, csr_graph, max_flow))
+
+
+def estimate_size(obj, limit=MAX_BYTES):
+    """
+    Ước lượng dung lượng (byte) của obj và các đối tượng nó chứa, dừng sớm khi
+    vượt limit. Mảng array/ndarray đã tính cả dữ liệu trong sys.getsizeof.
+    """
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack and total <= limit:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, (str, bytes, bytearray, int, float)):
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif hasattr(item, '__dict__'):
+            stack.append(item.__dict__)
+        elif hasattr(item, '__slots__'):
+            stack.extend(getattr(item, name, None) for name in item.__slots__)
+    return total
+
+
+class _Entry:
+    __slots__ = ('result', 'events', 'size')
+
+    def __init__(self, result, events, size):
+        self.result = result
+        self.events = events  # Danh sách tham số các lần gọi callback, None nếu chưa ghi
+        self.size = size
+
+
+class ResultCache:
+    """
+    Bộ đệm LRU cho các thuật toán của GraphAlgorithms, dùng chung cho nhiều đồ thị.
+    Kết quả trả về được dùng chung giữa các lần gọi nên không được sửa.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, store=None):
+        """
+        :param max_entries: Số kết quả tối đa
+        :param max_bytes: Tổng dung lượng ước lượng tối đa; kết quả lớn hơn không được lưu
+        :param store: ResultStore để lưu kết quả xuống đĩa (None: chỉ trong bộ nhớ)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.store = store
+        self.size = 0  # Tổng dung lượng ước lượng hiện tại
+        self.hits = 0
+        self.misses = 0  # Kể cả các lần lấy được từ store
+        self.store_hits = 0
+        self._entries = OrderedDict()  # {khóa: _Entry}, cũ nhất ở đầu
+        self._graphs = {}  # {id đồ thị: listener đã đăng ký}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def run(self, graph, name, *args, callback=None, **kwargs):
+        """
+        Chạy GraphAlgorithms.<name>(graph, *args, callback=callback, **kwargs) hoặc lấy
+        kết quả đã lưu; khi lấy từ bộ đệm các sự kiện đã ghi được phát lại qua callback.
+        Ảnh chụp CSR hoặc tham số không băm được thì chạy thẳng, không lưu. Ảnh chụp
+        Graph.snapshot() dùng chung kết quả với đồ thị được chụp ở cùng version.
+        """
+        algorithm = getattr(GraphAlgorithms, name)
+        if callback is not None:
+            kwargs_with_callback = dict(kwargs, callback=callback)
+        else:
+            kwargs_with_callback = kwargs
+        if isinstance(graph, CSRGraph):
+            return algorithm(graph, *args, **kwargs_with_callback)
+        owner = graph.snapshot_of or graph
+        try:
+            key = (id(owner), graph.version, name, args, tuple(sorted(kwargs.items())))
+            hash(key)
+        except TypeError:
+            return algorithm(graph, *args, **kwargs_with_callback)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (callback is None or entry.events is not None):
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                entry = None
+                self.misses += 1
+        if entry is None and self.store is not None and name in PERSISTENT:
+            stored_key = repr(key[2:])
+            content_hash = graph.content_hash
+            stored = self.store.get(content_hash, stored_key)
+            if stored is not None and (callback is None or stored[1] is not None):
+                self.store_hits += 1
+                self._store(owner, key, *stored)
+                entry = _Entry(stored[0], stored[1], 0)
+        if entry is not None:
+            if callback is not None:
+                for event in entry.events:
+                    callback(*event)
+            return entry.result
+
+        events = None
+        if callback is not None:
+            events = []
+
+            def recording(*event):
+                # Đường đi/chu trình truyền qua callback còn bị thuật toán sửa tiếp: lưu bản sao
+                events.append(tuple(list(arg) if isinstance(arg, list) else arg for arg in event))
+                return callback(*event)
+
+            result = algorithm(graph, *args, callback=recording, **kwargs)
+        else:
+            result = algorithm(graph, *args, **kwargs)
+
+        if self._store(owner, key, result, events) and self.store is not None and name in PERSISTENT:
+            self.store.put(content_hash, stored_key, (result, events))
+        return result
+
+    def clear(self):
+        """Bỏ mọi kết quả đã lưu"""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def invalidate(self, graph):
+        """Bỏ các kết quả của một đồ thị"""
+        self._drop(id(graph))
+
+    def _store(self, graph, key, result, events):
+        """Lưu vào bộ nhớ; trả về False nếu đồ thị đã đổi trong lúc tính"""
+        self._watch(graph)
+        size = estimate_size((result, events), self.max_bytes)
+        with self._lock:
+            # Đồ thị đã đổi trong lúc tính: kết quả không còn dùng được
+            if graph.version != key[1]:
+                return False
+            if size > self.max_bytes:
+                return True
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old.size
+            self._entries[key] = _Entry(result, events, size)
+            self.size += size
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or self.size > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted.size
+        return True
+
+    def _watch(self, graph):
+        """
+        Đăng ký listener bỏ kết quả khi đồ thị đổi (một lần cho mỗi đồ thị), gọi
+        ngoài self._lock vì listener chạy trong khóa ghi của đồ thị
+        """
+        graph_id = id(graph)
+        with self._lock:
+            if graph_id in self._graphs:
+                return
+            self._graphs[graph_id] = partial(self._on_change, graph_id)
+        graph.add_listener(self._graphs[graph_id])
+        # id có thể được dùng lại sau khi đồ thị bị thu hồi
+        weakref.finalize(graph, self._forget, graph_id)
+
+    def _forget(self, graph_id):
+        self._drop(graph_id)
+        self._graphs.pop(graph_id, None)
+
+    def _on_change(self, graph_id, event, data):
+        self._drop(graph_id)
+
+    def _drop(self, graph_id):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == graph_id]:
+                self.size -= self._entries.pop(key).size
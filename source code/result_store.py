@@ -0,0 +1,134 @@
+"""
+result_store.py - Lưu kết quả thuật toán xuống đĩa theo băm nội dung đồ thị
+
+Mỗi kết quả được pickle vào một bảng SQLite, khóa là (phiên bản, Graph.content_hash,
+khóa thuật toán). Mở lại cùng một đồ thị (cùng đỉnh, cạnh, trọng số) là dùng lại được
+kết quả của lần trước; kết quả do phiên bản mã khác tạo ra không bao giờ được đọc
+và bị xóa khi mở kho. Khi tổng dung lượng vượt ngưỡng, các kết quả lâu không dùng
+nhất bị xóa trước. Chỉ đọc cơ sở dữ liệu do chính ứng dụng tạo ra (pickle).
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+# Tổng dung lượng tối đa (byte) của các kết quả đã lưu
+MAX_BYTES = 256 * 1024 * 1024
+
+
+class ResultStore:
+    """Kho kết quả trên đĩa, dùng được từ nhiều luồng"""
+
+    def __init__(self, path, version, max_bytes=MAX_BYTES):
+        """
+        :param path: Tệp SQLite (thư mục được tạo nếu chưa có), ':memory:' để không ghi đĩa
+        :param version: Phiên bản mã tạo ra kết quả (vd result_cache.CODE_VERSION);
+                        chỉ đọc được kết quả lưu với cùng phiên bản
+        :param max_bytes: Tổng dung lượng tối đa; kết quả lớn hơn không được lưu
+        """
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.version = version
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            # Bảng results (bố cục cũ) không có cột phiên bản nên bỏ đi
+            self._db.execute("DROP TABLE IF EXISTS results")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results_v2 ("
+                "version TEXT, graph_hash TEXT, key TEXT, value BLOB, size INTEGER, used REAL, "
+                "PRIMARY KEY (version, graph_hash, key))"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_v2_used ON results_v2 (used)")
+            # Kết quả của phiên bản khác không còn đọc được: trả lại dung lượng
+            self._db.execute("DELETE FROM results_v2 WHERE version != ?", (self.version,))
+
+    def get(self, graph_hash, key, default=None):
+        """Kết quả đã lưu (default nếu không có hoặc không đọc được)"""
+        row_key = (self.version, _hex(graph_hash), key)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM results_v2 WHERE version = ? AND graph_hash = ? AND key = ?",
+                row_key
+            ).fetchone()
+            if row is None:
+                return default
+            with self._db:
+                self._db.execute(
+                    "UPDATE results_v2 SET used = ? "
+                    "WHERE version = ? AND graph_hash = ? AND key = ?",
+                    (time.time(),) + row_key
+                )
+        try:
+            return pickle.loads(row[0])
+        except (pickle.UnpicklingError, AttributeError, ImportError, EOFError, TypeError):
+            # Không đọc lại được (vd lớp đã đổi tên): bỏ đi
+            self.delete(graph_hash, key)
+            return default
+
+    def put(self, graph_hash, key, value):
+        """Lưu (ghi đè) một kết quả; trả về False nếu quá lớn"""
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes:
+            return False
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results_v2 VALUES (?, ?, ?, ?, ?, ?)",
+                (self.version, _hex(graph_hash), key, data, len(data), time.time())
+            )
+            self._evict()
+        return True
+
+    def delete(self, graph_hash, key):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM results_v2 WHERE version = ? AND graph_hash = ? AND key = ?",
+                             (self.version, _hex(graph_hash), key))
+
+    def count(self, graph_hash):
+        """Số kết quả đã lưu cho một đồ thị"""
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM results_v2 WHERE version = ? AND graph_hash = ?",
+                (self.version, _hex(graph_hash))
+            ).fetchone()[0]
+
+    def total_size(self):
+        """Tổng dung lượng (byte) các kết quả đã lưu"""
+        with self._lock:
+            return self._total_size()
+
+    def clear(self):
+        """Xóa mọi kết quả"""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM results_v2")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _total_size(self):
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results_v2").fetchone()[0]
+
+    def _evict(self):
+        """Xóa các kết quả lâu không dùng nhất cho tới khi không vượt max_bytes"""
+        total = self._total_size()
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute(
+            "SELECT version, graph_hash, key, size FROM results_v2 ORDER BY used"
+        ).fetchall()
+        for version, graph_hash, key, size in rows:
+            self._db.execute("DELETE FROM results_v2 WHERE version = ? AND graph_hash = ? AND key = ?",
+                             (version, graph_hash, key))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+def _hex(graph_hash):
+    # SQLite chỉ có số nguyên có dấu 64 bit nên lưu băm dạng chuỗi hex
+    return f"{graph_hash:016x}"
@@ -0,0 +1,183 @@
+"""
+steps.py - Chạy thuật toán thành một dãy bước kéo lần lượt (thay cho callback chặn)
+
+StepRunner chạy thuật toán trong một luồng riêng. Mỗi lần thuật toán gọi callback,
+luồng đó đưa ra một bước có kiểu (NodeStep, EdgeStep, PathStep) rồi đứng chờ cho
+tới khi bước tiếp theo được lấy, nên người dùng có thể dừng bao lâu cũng được,
+đi từng bước bằng next() hoặc tua nhanh bằng drain(). Bước cuối là Finished(result).
+
+Dùng luồng thay cho generator để các thuật toán viết theo callback chạy được
+nguyên vẹn, không phải viết lại thành generator. Cái giá là mỗi bước tốn một lần
+đưa vào hàng đợi và một lần chờ semaphore (hai lần chuyển luồng), đắt hơn một
+lần yield; chấp nhận được vì hoạt ảnh chỉ lấy vài bước mỗi giây. Khi chạy không
+có callback (callback=None) thì không có chi phí này.
+"""
+
+import queue
+import threading
+import weakref
+from collections import namedtuple
+
+from algorithms import GraphAlgorithms
+
+# Đỉnh đổi trạng thái: bfs/dfs ('visiting', 'queued', 'visited'), dijkstra/astar
+# (value = khoảng cách), check_bipartite (value = màu), hierholzer ('exploring',
+# 'backtrack': đỉnh được đẩy vào / lấy ra khỏi ngăn xếp)
+NodeStep = namedtuple('NodeStep', 'node state value')
+# Cạnh được xét: prim/kruskal ('checking', 'added', 'rejected'); node là đỉnh vừa
+# được thêm vào cây (Prim), None với Kruskal
+EdgeStep = namedtuple('EdgeStep', 'source target state weight node')
+# Đường đi/chu trình: max_flow ('path_found', value = lượng luồng, iteration),
+# fleury ('edge_added', value = cạnh)
+PathStep = namedtuple('PathStep', 'path state value iteration')
+# Bước cuối cùng, mang kết quả của thuật toán
+Finished = namedtuple('Finished', 'result')
+
+
+def to_step(*event):
+    """Chuyển tham số một lần gọi callback thành bước có kiểu"""
+    first, state = event[0], event[1]
+    if len(event) == 5:
+        return EdgeStep(event[2], event[3], state, event[4], first)
+    if isinstance(first, list):
+        # Bản sao: thuật toán còn sửa tiếp danh sách này
+        return PathStep(list(first), state,
+                        event[2] if len(event) > 2 else None,
+                        event[3] if len(event) > 3 else None)
+    return NodeStep(first, state, event[2] if len(event) > 2 else None)
+
+
+class _Cancelled(Exception):
+    """Ném vào thuật toán từ callback khi StepRunner đã bị đóng, để dừng lượt chạy"""
+
+
+class _Channel:
+    """
+    Trạng thái dùng chung giữa StepRunner và luồng thuật toán. Luồng chỉ giữ
+    kênh, không giữ StepRunner, nên StepRunner bị thu hồi khi không còn ai dùng.
+    """
+
+    def __init__(self):
+        self.steps = queue.Queue()  # ('step' | 'done' | 'error', giá trị)
+        self.demand = threading.Semaphore(0)  # Số bước đã được yêu cầu
+        self.free = False  # Luồng thuật toán không chờ nữa (drain/close)
+        self.closed = False  # Bỏ dở: không đưa ra bước nào nữa
+
+    def emit(self, *event):
+        """
+        callback của thuật toán: đưa ra một bước rồi chờ lượt lấy kế tiếp.
+        Đã bị đóng thì ném _Cancelled để thuật toán dừng ngay (các kết quả
+        dùng chung như cây đường đi trong memo chịu được callback ném lỗi).
+        """
+        if self.closed:
+            raise _Cancelled
+        self.steps.put(('step', to_step(*event)))
+        if not self.free:
+            self.demand.acquire()
+        if self.closed:
+            raise _Cancelled
+
+    def close(self):
+        self.closed = True
+        self.free = True
+        self.demand.release()
+
+
+def _work(channel, algorithm, args, kwargs):
+    channel.demand.acquire()
+    if channel.closed:
+        return
+    try:
+        result = algorithm(*args, callback=channel.emit, **kwargs)
+    except _Cancelled:
+        return
+    except Exception as error:
+        channel.steps.put(('error', error))
+        return
+    channel.steps.put(('done', result))
+
+
+class StepRunner:
+    """
+    Iterator các bước của một thuật toán; luồng thuật toán chỉ chạy trước đúng
+    một bước so với người lấy. Dùng từ một luồng (vd luồng giao diện), nên đóng
+    bằng close() hoặc khối with; bị thu hồi khi chưa đóng thì tự đóng.
+    """
+
+    def __init__(self, algorithm, *args, **kwargs):
+        """
+        :param algorithm: Hàm nhận tham số callback=, vd GraphAlgorithms.bfs hoặc
+                          ResultCache.run (khi đó args bắt đầu bằng graph, tên thuật toán)
+        """
+        self.result = None
+        self.done = False
+        self._call = (algorithm, args, kwargs)
+        self._channel = _Channel()
+        self._thread = None
+        self._finalizer = weakref.finalize(self, self._channel.close)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.done:
+            raise StopIteration
+        self._start()
+        self._channel.demand.release()
+        return self._take()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def drain(self):
+        """
+        Chạy nốt thuật toán không dừng; trả về các bước còn lại (không kể Finished),
+        kết quả ở self.result
+        """
+        if self.done:
+            return []
+        self._channel.free = True
+        self._start()
+        self._channel.demand.release()
+        steps = []
+        while True:
+            step = self._take()
+            if self.done:
+                return steps
+            steps.append(step)
+
+    def close(self):
+        """
+        Bỏ dở: không đưa ra bước nào nữa. Thuật toán đang chạy dở dừng ở lần gọi
+        callback kế tiếp (kết quả không được lưu vào bộ đệm); chưa bắt đầu thì không chạy.
+        """
+        self._finalizer()
+        self.done = True
+
+    def _start(self):
+        if self._thread is None:
+            algorithm, args, kwargs = self._call
+            self._thread = threading.Thread(target=_work, daemon=True,
+                                            args=(self._channel, algorithm, args, kwargs))
+            self._thread.start()
+
+    def _take(self):
+        kind, value = self._channel.steps.get()
+        if kind == 'step':
+            return value
+        self.done = True
+        if kind == 'error':
+            raise value
+        self.result = value
+        return Finished(value)
+
+
+def steps(graph, name, *args, **kwargs):
+    """
+    Các bước của GraphAlgorithms.<name>(graph, *args, **kwargs), vd
+    for step in steps(graph, 'bfs', 0): ...
+    """
+    return StepRunner(getattr(GraphAlgorithms, name), graph, *args, **kwargs)
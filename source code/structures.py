@@ -0,0 +1,136 @@
+"""
+structures.py - Cấu trúc dữ liệu dùng chung cho các thuật toán
+"""
+
+from array import array
+
+
+class IndexedMinHeap:
+    """
+    Đống nhị phân nhỏ nhất trên các phần tử 0..n-1, mỗi phần tử một khóa.
+    Vị trí của từng phần tử được lưu lại nên giảm khóa chỉ mất O(log n).
+    """
+
+    def __init__(self, n):
+        """
+        :param n: Số phần tử tối đa (phần tử là số nguyên 0..n-1)
+        """
+        self._heap = []
+        self._keys = [None] * n
+        self._pos = array('i', [-1]) * n
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __contains__(self, item):
+        return self._pos[item] >= 0
+
+    def key(self, item):
+        """Khóa hiện tại của phần tử (None nếu chưa từng được thêm)"""
+        return self._keys[item]
+
+    def push(self, item, key):
+        """Thêm phần tử chưa có trong đống"""
+        self._keys[item] = key
+        self._pos[item] = len(self._heap)
+        self._heap.append(item)
+        self._sift_up(len(self._heap) - 1)
+
+    def decrease_key(self, item, key):
+        """Giảm khóa của phần tử đang có trong đống"""
+        self._keys[item] = key
+        self._sift_up(self._pos[item])
+
+    def push_or_decrease(self, item, key):
+        """Thêm phần tử hoặc giảm khóa nếu khóa mới nhỏ hơn; trả về True nếu có thay đổi"""
+        if self._pos[item] < 0:
+            self.push(item, key)
+            return True
+        if key < self._keys[item]:
+            self.decrease_key(item, key)
+            return True
+        return False
+
+    def pop(self):
+        """Lấy ra phần tử có khóa nhỏ nhất: (item, key)"""
+        heap = self._heap
+        item = heap[0]
+        last = heap.pop()
+        self._pos[item] = -1
+        if heap:
+            heap[0] = last
+            self._pos[last] = 0
+            self._sift_down(0)
+        return item, self._keys[item]
+
+    def _sift_up(self, i):
+        heap, keys, pos = self._heap, self._keys, self._pos
+        item = heap[i]
+        key = keys[item]
+        while i > 0:
+            parent = (i - 1) >> 1
+            above = heap[parent]
+            if not key < keys[above]:
+                break
+            heap[i] = above
+            pos[above] = i
+            i = parent
+        heap[i] = item
+        pos[item] = i
+
+    def _sift_down(self, i):
+        heap, keys, pos = self._heap, self._keys, self._pos
+        size = len(heap)
+        item = heap[i]
+        key = keys[item]
+        while True:
+            child = 2 * i + 1
+            if child >= size:
+                break
+            if child + 1 < size and keys[heap[child + 1]] < keys[heap[child]]:
+                child += 1
+            below = heap[child]
+            if not keys[below] < key:
+                break
+            heap[i] = below
+            pos[below] = i
+            i = child
+        heap[i] = item
+        pos[item] = i
+
+
+class UnionFind:
+    """
+    Các tập rời nhau trên phần tử 0..n-1: mảng cha, hợp theo hạng, find không
+    đệ quy với nén nửa đường (mỗi đỉnh trên đường trỏ lên ông của nó).
+    """
+
+    def __init__(self, n):
+        self.parent = array('i', range(n))
+        self.rank = bytearray(n)
+        self.count = n  # Số tập hiện có
+
+    def find(self, x):
+        """Đại diện của tập chứa x"""
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, x, y):
+        """Hợp hai tập chứa x và y; trả về False nếu đã cùng tập"""
+        x, y = self.find(x), self.find(y)
+        if x == y:
+            return False
+        rank = self.rank
+        if rank[x] < rank[y]:
+            x, y = y, x
+        self.parent[y] = x
+        if rank[x] == rank[y]:
+            rank[x] += 1
+        self.count -= 1
+        return True
+
+    def connected(self, x, y):
+        return self.find(x) == self.find(y)
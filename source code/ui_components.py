@@ -73,6 +73,9 @@ class Sidebar(ttk.Frame):
         ttk.Button(scrollable_frame, text="🗑️ Xóa toàn bộ",
                   command=self.controller.clear_graph).pack(fill='x', padx=10, pady=2)
         
+        ttk.Button(scrollable_frame, text="🔢 Đánh số lại đỉnh",
+                  command=self.controller.compact_graph).pack(fill='x', padx=10, pady=2)
+        
         # Traversal Algorithms
         self.create_section(scrollable_frame, "🔍 THUẬT TOÁN DUYỆT")
         
@@ -95,6 +98,12 @@ class Sidebar(ttk.Frame):
         ttk.Button(scrollable_frame, text="Dijkstra Algorithm",
                   command=self.controller.run_dijkstra).pack(fill='x', padx=10, pady=2)
         
+        ttk.Button(scrollable_frame, text="A* (theo tọa độ)",
+                  command=self.controller.run_astar).pack(fill='x', padx=10, pady=2)
+        
+        ttk.Button(scrollable_frame, text="Dijkstra hai chiều",
+                  command=self.controller.run_bidirectional_dijkstra).pack(fill='x', padx=10, pady=2)
+        
         ttk.Label(scrollable_frame, text="Từ đỉnh:",
                  style='Label.TLabel').pack(anchor='w', padx=20, pady=(5, 0))
         
@@ -115,6 +124,9 @@ class Sidebar(ttk.Frame):
         ttk.Button(scrollable_frame, text="Kiểm tra đồ thị 2 phía",
                   command=self.controller.check_bipartite).pack(fill='x', padx=10, pady=2)
         
+        ttk.Button(scrollable_frame, text="Thành phần liên thông",
+                  command=self.controller.show_components).pack(fill='x', padx=10, pady=2)
+        
         # Advanced Algorithms
         self.create_section(scrollable_frame, "🚀 THUẬT TOÁN NÂNG CAO")
         
@@ -145,6 +157,9 @@ class Sidebar(ttk.Frame):
         ttk.Button(scrollable_frame, text="Danh sách cạnh",
                   command=lambda: self.controller.show_representation('edges')).pack(fill='x', padx=10, pady=2)
         
+        ttk.Button(scrollable_frame, text="Bảng khoảng cách",
+                  command=lambda: self.controller.show_representation('distances')).pack(fill='x', padx=10, pady=2)
+        
         # Save/Load
         self.create_section(scrollable_frame, "💾 LƯU/TẢI ĐỒ THỊ")
         
@@ -195,6 +210,18 @@ class Toolbar(ttk.Frame):
                                    width=10, state='readonly')
         speed_combo.pack(side='left', padx=5)
         speed_combo.bind('<<ComboboxSelected>>', self.controller.update_speed)
+        
+        ttk.Separator(self, orient='vertical').pack(side='left', fill='y', padx=10)
+        
+        # Điều khiển hoạt ảnh
+        ttk.Button(self, text="⏯ Dừng/Tiếp",
+                  command=self.controller.pause_animation).pack(side='left', padx=5)
+        
+        ttk.Button(self, text="⏭ Từng bước",
+                  command=self.controller.step_animation).pack(side='left', padx=5)
+        
+        ttk.Button(self, text="⏩ Tua nhanh",
+                  command=self.controller.fast_forward_animation).pack(side='left', padx=5)
 
 
 class StatusBar(ttk.Frame):